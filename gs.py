@@ -29,9 +29,33 @@ Geliştirilmiş Özellikler:
  - Takvimde "Kaç günde bir" tekrar türüne göre günler gösterilir
 """
 
-import sys, os, sqlite3, json, io
-from datetime import datetime, date, time, timedelta
+import sys
+import gs_core
+
+# Komut satırı alt komutları Qt ve arayüz modülleri yüklenmeden çalışır: python gs.py report today | due --shift night
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] in gs_core.COMMANDS:
+    sys.exit(gs_core.main(sys.argv[1:]))
+# Koridor ekranları için salt okunur pano: python gs.py kiosk [--screens 0:day,1:night]
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == "kiosk":
+    import gs_kiosk
+    sys.exit(gs_kiosk.main(sys.argv[2:]))
+
+import os, sqlite3, json, io, bisect, csv, zipfile, re, shutil, threading
+from datetime import datetime, date, timedelta
+from time import monotonic, perf_counter
 from functools import partial
+from dataclasses import dataclass
+from xml.sax.saxutils import escape as xml_escape
+
+import gs_sync
+import gs_api
+from gs_core import (
+    DATA_DIR, DB_PATH, HISTORY_DB_PATH, ARCHIVE_DB_PATH, BACKUP_DIR, DEFAULT_SETTINGS,
+    get_conn, load_settings, save_settings, SECTION_TITLES, parse_time, is_daytime_task, classify_task,
+    calendar_day_entries, visible_calendar_entries, completed_task_ids, notification_due, perf, timed,
+    StallWatchdog, STALL_LOG_PATH, QUERIES, task_clock, task_sort_key, is_overdue, TURKISH_MONTHS,
+    completion_partition,
+)
 
 os.environ["QT_MAC_WANTS_LAYER"] = "1"
 
@@ -46,32 +70,10 @@ from PyQt5.QtWidgets import (
 )
 
 # Paths and resources
-APP_DIR = os.path.abspath(os.path.dirname(__file__))
-DATA_DIR = os.path.join(APP_DIR, "data")
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
-
-DB_PATH = os.path.join(DATA_DIR, "huzurevi.db")
-SETTINGS_PATH = os.path.join(DATA_DIR, "settings.json")
 LOGO_PATH = os.path.join(DATA_DIR, "GSYV_LOGO.png")
 DEVELOPER_PHOTO_PATH = os.path.join(DATA_DIR, "developer.png")
 DEFAULT_PATIENT_PHOTO_PATH = os.path.join(DATA_DIR, "default_patient.png")  # Varsayılan hasta fotoğrafı (opsiyonel)
 
-# Default settings
-DEFAULT_SETTINGS = {
-    "theme": "Galatasaray",
-    "font_size": 14,
-    "notifications_enabled": True,
-    "completed_task_timeout": 4,  # hours
-    "clock_format": "24 Saat",
-    "auto_refresh": True,
-    "notification_duration": 10,  # seconds
-    "day_start": "08:00",
-    "day_end": "20:00",
-    "night_start": "20:00",
-    "night_end": "08:00"
-}
-
 # Themes
 THEMES = {
     "Galatasaray": {
@@ -86,17 +88,100 @@ THEMES = {
     }
 }
 
-TURKISH_MONTHS = {
-    1: "Ocak", 2: "Şubat", 3: "Mart", 4: "Nisan", 5: "Mayıs", 6: "Haziran",
-    7: "Temmuz", 8: "Ağustos", 9: "Eylül", 10: "Ekim", 11: "Kasım", 12: "Aralık"
-}
-
 # Database helpers
-def get_conn():
-    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES|sqlite3.PARSE_COLNAMES)
-    conn.row_factory = sqlite3.Row
+def get_archive_conn(history=False):
+    # Arşiv ayrı dosyada tutulur ve "arc" adıyla bağlanır. Varsayılan (rollback) günlük kipinde
+    # iki dosyaya yazan tek bir işlem atomik olarak commit edilir.
+    conn = get_conn()
+    conn.execute("ATTACH DATABASE ? AS arc", (ARCHIVE_DB_PATH,))
+    if history:
+        # Görev silen işlemler tamamlanma kayıtlarını önce geçmiş veritabanına kopyalar (copy_completions_to_history)
+        conn.execute("ATTACH DATABASE ? AS hist", (HISTORY_DB_PATH,))
     return conn
 
+# tasks için tamsayı sütunlar: gün sırası (Python date.toordinal() ile aynı) ve gün içi dakika.
+# Üretilmiş (generated) sütunlar oldukları için her yazmada SQLite tarafından date/end_date/time ile tutarlı kalır.
+TASK_INTEGER_COLUMNS = {
+    "date_ord": "CAST(julianday(NULLIF(date, '')) - 1721424.5 AS INTEGER)",
+    "end_date_ord": "CAST(julianday(NULLIF(end_date, '')) - 1721424.5 AS INTEGER)",
+    "time_min": "CASE WHEN time GLOB '[0-9]*:[0-9][0-9]' THEN CAST(substr(time, 1, instr(time, ':') - 1) AS INTEGER) * 60 + CAST(substr(time, instr(time, ':') + 1) AS INTEGER) END",
+}
+
+# Görev silinince (arşivleme dahil) tamamlanma kayıtları da silinir
+TASK_COMPLETIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_id INTEGER,
+        completion_date TEXT,
+        FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE
+    )
+    """
+
+def history_partition(cur, month):
+    """Create the hist table for one YYYY-MM month if needed and return its name; hist must be attached."""
+    table = completion_partition(month)
+    cur.execute(f"""
+    CREATE TABLE IF NOT EXISTS hist.{table} (
+        id INTEGER PRIMARY KEY,
+        task_id INTEGER,
+        completion_date TEXT
+    )
+    """)
+    cur.execute(f"CREATE INDEX IF NOT EXISTS hist.idx_{table}_task_date ON {table}(task_id, completion_date)")
+    return table
+
+def copy_completions_to_history(cur, where, params=()):
+    """Copy the main.task_completions rows matching `where` into their monthly hist tables; returns the row count.
+    Callers deleting tasks run this first so ON DELETE CASCADE does not erase the completion history."""
+    cur.execute("CREATE TEMP TABLE IF NOT EXISTS history_staging (id INTEGER PRIMARY KEY, task_id INTEGER, completion_date TEXT)")
+    cur.execute("DELETE FROM temp.history_staging")
+    cur.execute(f"INSERT INTO temp.history_staging SELECT id, task_id, completion_date FROM main.task_completions WHERE {where}", params)
+    copied = cur.rowcount
+    cur.execute("SELECT DISTINCT substr(completion_date, 1, 7) FROM temp.history_staging")
+    for month in [r[0] for r in cur.fetchall() if r[0]]:
+        table = history_partition(cur, month)
+        cur.execute(
+            f"""INSERT OR IGNORE INTO hist.{table} (id, task_id, completion_date)
+            SELECT id, task_id, completion_date FROM temp.history_staging WHERE substr(completion_date, 1, 7) = ?""",
+            (month,)
+        )
+    cur.execute("DELETE FROM temp.history_staging")
+    return copied
+
+def rebuild_task_completions(conn):
+    """Recreate task_completions with ON DELETE CASCADE; completions of tasks that no longer exist move to the history DB.
+    The AUTOINCREMENT counter is carried over so new rows never reuse an id already stored in history."""
+    cur = conn.cursor()
+    conn.commit()
+    cur.execute("PRAGMA foreign_keys=OFF")  # işlem içinde değiştirilemez
+    cur.execute("ATTACH DATABASE ? AS hist", (HISTORY_DB_PATH,))
+    try:
+        cur.execute("BEGIN")
+        copy_completions_to_history(cur, "task_id NOT IN (SELECT id FROM main.tasks)")
+        cur.execute("SELECT seq FROM main.sqlite_sequence WHERE name='task_completions'")
+        r = cur.fetchone()
+        last_id = r[0] if r else 0
+        cur.execute("SELECT name FROM hist.sqlite_master WHERE type='table' AND name LIKE 'completions\\_%' ESCAPE '\\'")
+        for table in [r[0] for r in cur.fetchall()]:
+            cur.execute(f"SELECT COALESCE(MAX(id), 0) FROM hist.{table}")
+            last_id = max(last_id, cur.fetchone()[0])
+        cur.execute(TASK_COMPLETIONS_TABLE.format(name="task_completions_new"))
+        cur.execute("""INSERT INTO task_completions_new (id, task_id, completion_date)
+            SELECT id, task_id, completion_date FROM task_completions WHERE task_id IN (SELECT id FROM tasks)""")
+        cur.execute("DROP TABLE task_completions")
+        cur.execute("ALTER TABLE task_completions_new RENAME TO task_completions")
+        # DROP + RENAME sayacı kalan en büyük kimliğe indirir; taşınan kayıtların kimlikleri yeniden verilmesin
+        cur.execute("UPDATE main.sqlite_sequence SET seq=MAX(seq, ?) WHERE name='task_completions'", (last_id,))
+        if not cur.rowcount:
+            cur.execute("INSERT INTO main.sqlite_sequence (name, seq) VALUES ('task_completions', ?)", (last_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.execute("DETACH DATABASE hist")
+        cur.execute("PRAGMA foreign_keys=ON")
+
 def init_db_and_migrate():
     conn = get_conn()
     cur = conn.cursor()
@@ -108,13 +193,6 @@ def init_db_and_migrate():
     )
     """)
     cur.execute("""
-    CREATE TABLE IF NOT EXISTS archive_patients (
-        room_number TEXT PRIMARY KEY,
-        name TEXT, surname TEXT, notes TEXT,
-        photo BLOB, tc_no TEXT, birth_date TEXT, phone TEXT
-    )
-    """)
-    cur.execute("""
     CREATE TABLE IF NOT EXISTS tasks (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         room_number TEXT,
@@ -132,43 +210,1123 @@ def init_db_and_migrate():
         completed_time TIMESTAMP
     )
     """)
+    cur.execute(TASK_COMPLETIONS_TABLE.format(name="task_completions"))
+    cur.execute("PRAGMA foreign_key_list(task_completions)")
+    if not any(r["on_delete"] == "CASCADE" for r in cur.fetchall()):
+        rebuild_task_completions(conn)  # eşitleme açıksa tetikleyiciler enable_change_log ile yeniden kurulur
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_task_completions_task_date ON task_completions(task_id, completion_date)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_task_completions_date ON task_completions(completion_date, task_id)")
     cur.execute("""
-    CREATE TABLE IF NOT EXISTS archive (
+    CREATE TABLE IF NOT EXISTS maintenance_log (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        room_number TEXT, task TEXT, time TEXT, date TEXT, end_date TEXT, time_type TEXT
+        started TIMESTAMP,
+        file TEXT,
+        size_before INTEGER,
+        size_after INTEGER,
+        duration_ms INTEGER,
+        steps TEXT
     )
     """)
     cur.execute("""
-    CREATE TABLE IF NOT EXISTS task_completions (
+    CREATE TABLE IF NOT EXISTS care_plans (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        task_id INTEGER,
-        completion_date TEXT,
-        FOREIGN KEY (task_id) REFERENCES tasks(id)
+        name TEXT UNIQUE
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS care_plan_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        plan_id INTEGER,
+        task TEXT, time TEXT, time_type TEXT, repeat_type TEXT,
+        repeat_days TEXT, repeat_interval INTEGER,
+        FOREIGN KEY (plan_id) REFERENCES care_plans(id)
     )
     """)
+    cur.execute("PRAGMA table_xinfo(tasks)")
+    columns = {r[1] for r in cur.fetchall()}
+    if "template_item_id" not in columns:
+        cur.execute("ALTER TABLE tasks ADD COLUMN template_item_id INTEGER")
+    for name, expr in TASK_INTEGER_COLUMNS.items():
+        if name not in columns:
+            cur.execute(f"ALTER TABLE tasks ADD COLUMN {name} INTEGER GENERATED ALWAYS AS ({expr}) VIRTUAL")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_template_item ON tasks(template_item_id)")
+    # Sıralı görev listeleri, hasta görevleri ve bildirim taraması için (bkz. QUERIES)
+    cur.execute("DROP INDEX IF EXISTS idx_tasks_date_time")
+    cur.execute("DROP INDEX IF EXISTS idx_tasks_room_date_time")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_day_minute ON tasks(date_ord, time_min)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_room_day_minute ON tasks(room_number, date_ord, time_min)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_tasks_pending_notify ON tasks(id) WHERE done=0 AND cancelled=0 AND (notified=0 OR notified IS NULL)")
     conn.commit()
+    gs_sync.install_change_log(conn)
+    gs_sync.enable_change_log(conn, load_settings().get("sync_enabled", False))
     conn.close()
+    init_archive_db()
+
+def init_archive_db():
+    conn = get_archive_conn()
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS arc.archive_patients (
+        room_number TEXT PRIMARY KEY,
+        name TEXT, surname TEXT, notes TEXT,
+        photo BLOB, tc_no TEXT, birth_date TEXT, phone TEXT
+    )
+    """)
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS arc.archive (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        room_number TEXT, task TEXT, time TEXT, date TEXT, end_date TEXT, time_type TEXT,
+        source_task_id INTEGER, repeat_type TEXT, repeat_days TEXT, repeat_interval INTEGER
+    )
+    """)
+    cur.execute("PRAGMA arc.table_info(archive)")
+    columns = {r[1] for r in cur.fetchall()}
+    for name, kind in (("source_task_id", "INTEGER"), ("repeat_type", "TEXT"), ("repeat_days", "TEXT"), ("repeat_interval", "INTEGER")):
+        if name not in columns:
+            cur.execute(f"ALTER TABLE arc.archive ADD COLUMN {name} {kind}")
+    cur.execute("CREATE INDEX IF NOT EXISTS arc.idx_archive_date ON archive(date)")
+    cur.execute("CREATE INDEX IF NOT EXISTS arc.idx_archive_source_task ON archive(source_task_id)")
+    # Eski sürümlerde arşiv ana veritabanındaydı: tek işlemde taşı, ardından boşalan alanı geri kazan
+    cur.execute("SELECT name FROM main.sqlite_master WHERE type='table' AND name IN ('archive', 'archive_patients')")
+    legacy = {r[0] for r in cur.fetchall()}
+    if legacy:
+        cur.execute("BEGIN")
+        if "archive_patients" in legacy:
+            cur.execute("""INSERT OR IGNORE INTO arc.archive_patients (room_number,name,surname,notes,photo,tc_no,birth_date,phone)
+                SELECT room_number,name,surname,notes,photo,tc_no,birth_date,phone FROM main.archive_patients""")
+            cur.execute("DROP TABLE main.archive_patients")
+        if "archive" in legacy:
+            cur.execute("""INSERT OR IGNORE INTO arc.archive (id,room_number,task,time,date,end_date,time_type)
+                SELECT id,room_number,task,time,date,end_date,time_type FROM main.archive""")
+            cur.execute("DROP TABLE main.archive")
+    conn.commit()
+    conn.close()
+    if legacy:
+        conn = get_conn()
+        conn.execute("VACUUM")
+        conn.close()
 
 init_db_and_migrate()
 
-# Settings
-def load_settings():
-    if not os.path.exists(SETTINGS_PATH):
-        save_settings(DEFAULT_SETTINGS)
-        return DEFAULT_SETTINGS.copy()
+# Completion history
+# Ufuktan eski tamamlanma kayıtları ayrı bir veritabanında aylık tablolara (completions_YYYY_MM) taşınır.
+# Güncel ekranlar yalnızca task_completions tablosunu okur; raporlar all_completions görünümünü kullanır.
+HISTORY_MOVE_INTERVAL_MS = 6 * 60 * 60 * 1000
+
+# Arşive taşınan görevin kimliği ve tekrar kuralı saklanır; raporlar all_tasks görünümüyle geçmiş tamamlanmaları
+# arşivdeki kurala eşleştirir.
+ARCHIVE_TASK_COLUMNS = "room_number,task,time,date,end_date,time_type,repeat_type,repeat_days,repeat_interval"
+ARCHIVE_INSERT_SQL = f"INSERT INTO arc.archive (source_task_id,{ARCHIVE_TASK_COLUMNS}) SELECT id,{ARCHIVE_TASK_COLUMNS} FROM main.tasks"
+
+def get_completions_conn(start=None, end=None, archived=False):
+    """Connection with a TEMP view all_completions over task_completions and the history partitions overlapping start..end.
+    With archived=True the arc database is attached and a TEMP view all_tasks adds archived tasks under their old ids."""
+    conn = get_conn()
+    if archived:
+        conn.execute("ATTACH DATABASE ? AS arc", (ARCHIVE_DB_PATH,))
+        conn.execute(f"""CREATE TEMP VIEW all_tasks AS
+            SELECT id, {ARCHIVE_TASK_COLUMNS} FROM main.tasks
+            UNION ALL
+            SELECT source_task_id, {ARCHIVE_TASK_COLUMNS} FROM arc.archive WHERE source_task_id IS NOT NULL""")
+    parts = ["SELECT id, task_id, completion_date FROM main.task_completions"]
+    if os.path.exists(HISTORY_DB_PATH):
+        conn.execute("ATTACH DATABASE ? AS hist", (HISTORY_DB_PATH,))
+        cur = conn.execute("SELECT name FROM hist.sqlite_master WHERE type='table' AND name LIKE 'completions\\_%' ESCAPE '\\' ORDER BY name")
+        lo = completion_partition(start.strftime("%Y-%m")) if start else ""
+        hi = completion_partition(end.strftime("%Y-%m")) if end else "~"
+        parts += [f"SELECT id, task_id, completion_date FROM hist.{r[0]}" for r in cur.fetchall() if lo <= r[0] <= hi]
+    conn.execute("CREATE TEMP VIEW all_completions AS " + " UNION ALL ".join(parts))
+    return conn
+
+def move_old_completions(horizon_days):
+    """Move completions older than the horizon into the monthly history tables in one cross-database transaction."""
+    cutoff = (date.today() - timedelta(days=horizon_days)).isoformat()
+    conn = get_conn()
     try:
-        with open(SETTINGS_PATH, "r", encoding="utf-8") as f:
-            s = json.load(f)
+        cur = conn.cursor()
+        cur.execute("SELECT EXISTS (SELECT 1 FROM task_completions WHERE completion_date < ?)", (cutoff,))
+        if not cur.fetchone()[0]:
+            return 0
+        cur.execute("ATTACH DATABASE ? AS hist", (HISTORY_DB_PATH,))
+        cur.execute("BEGIN IMMEDIATE")
+        copy_completions_to_history(cur, "completion_date < ?", (cutoff,))
+        gs_sync.set_local_only(cur, True)  # taşıma diğer istasyonlara silme olarak gönderilmez
+        cur.execute("DELETE FROM main.task_completions WHERE completion_date < ?", (cutoff,))
+        moved = cur.rowcount
+        gs_sync.set_local_only(cur, False)
+        conn.commit()
+        return moved
     except Exception:
-        s = DEFAULT_SETTINGS.copy()
-    for k, v in DEFAULT_SETTINGS.items():
-        if k not in s:
-            s[k] = v
-    return s
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+# End-of-life archiving
+# Bitiş tarihi saklama süresinden önce geçmiş görevler ile tamamlanmış ya da iptal edilmiş tek seferlik görevler
+# arşive taşınır; canlı tasks tablosunda yalnızca işlem bekleyebilecek satırlar kalır. Tamamlanma "done" ile
+# değil task_completions kaydıyla anlaşılır; bu kayıtlar silinmeden önce geçmiş veritabanına kopyalanır.
+EXPIRED_ARCHIVE_INTERVAL_MS = 6 * 60 * 60 * 1000
+EXPIRED_TASKS_WHERE = """end_date_ord < :cutoff
+    OR (COALESCE(repeat_type, 'Yok') IN ('Yok', '') AND date_ord < :cutoff
+        AND (cancelled=1 OR EXISTS (SELECT 1 FROM main.task_completions c WHERE c.task_id = tasks.id)))"""
+
+def archive_expired_tasks(retention_days, today=None):
+    """Move tasks past the retention period to the archive with one INSERT ... SELECT and one DELETE. Returns the moved count."""
+    params = {"cutoff": (today or date.today()).toordinal() - retention_days}
+    conn = get_archive_conn(history=True)
+    try:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        copy_completions_to_history(cur, f"task_id IN (SELECT id FROM main.tasks WHERE {EXPIRED_TASKS_WHERE})", params)
+        cur.execute(f"{ARCHIVE_INSERT_SQL} WHERE {EXPIRED_TASKS_WHERE} ORDER BY id", params)
+        # Her istasyon aynı ölçütle kendi arşivine taşır; silmeler diğer istasyonlara gönderilmez
+        gs_sync.set_local_only(cur, True)
+        cur.execute(f"DELETE FROM main.tasks WHERE {EXPIRED_TASKS_WHERE}", params)
+        moved = cur.rowcount
+        gs_sync.set_local_only(cur, False)
+        conn.commit()
+        return moved
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+class ExpiredTaskWorker(QtCore.QThread):
+    archived = pyqtSignal(int)
+
+    def __init__(self, retention_days, parent=None):
+        super().__init__(parent)
+        self.retention_days = retention_days
+
+    def run(self):
+        try:
+            n = archive_expired_tasks(self.retention_days)
+        except Exception as e:
+            print(f"Expired task archive error: {e}")
+            return
+        self.archived.emit(n)
+
+class CompletionHistoryWorker(QtCore.QThread):
+    moved = pyqtSignal(int)
+
+    def __init__(self, horizon_days, parent=None):
+        super().__init__(parent)
+        self.horizon_days = horizon_days
+
+    def run(self):
+        try:
+            n = move_old_completions(self.horizon_days)
+        except Exception as e:
+            print(f"Completion history error: {e}")
+            return
+        self.moved.emit(n)
+
+# Settings
+SETTINGS_SAVE_DELAY_MS = 500
+PERF_PANEL_INTERVAL_MS = 2000
+SETTING_TYPES = {k: type(v) for k, v in DEFAULT_SETTINGS.items()}
+SHIFT_TIME_KEYS = ("day_start", "day_end", "night_start", "night_end")
+
+class SettingsStore(QtCore.QObject):
+    """In-memory settings with typed keys, per-key observers and debounced atomic write-behind."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.values = load_settings()  # tanınmayan eski anahtarlar olduğu gibi geri yazılır
+        for k in SETTING_TYPES:
+            self.values[k] = self.coerce(k, self.values[k])
+        self.derived = {}
+        self.observers = {}
+        self.dirty = False
+        for key in SHIFT_TIME_KEYS:
+            self.update_derived(key)
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SETTINGS_SAVE_DELAY_MS)
+        self.save_timer.timeout.connect(self.flush)
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush)
+
+    @staticmethod
+    def coerce(key, value):
+        if key not in SETTING_TYPES:
+            raise KeyError(f"Bilinmeyen ayar: {key}")
+        try:
+            return SETTING_TYPES[key](value)
+        except (TypeError, ValueError):
+            return DEFAULT_SETTINGS[key]
+
+    def update_derived(self, key):
+        # Vardiya saatleri her sınıflandırmada yeniden ayrıştırılmasın diye time nesnesi olarak tutulur
+        if key in SHIFT_TIME_KEYS:
+            self.derived[key + "_time"] = parse_time(self.values[key])
+
+    def get(self, key, default=None):
+        if key in self.derived:
+            return self.derived[key]
+        return self.values.get(key, default)
+
+    def __getitem__(self, key):
+        return self.derived[key] if key in self.derived else self.values[key]
+
+    def __setitem__(self, key, value):
+        self.set(key, value)
+
+    def __contains__(self, key):
+        return key in self.values or key in self.derived
+
+    def set(self, key, value):
+        value = self.coerce(key, value)
+        if self.values.get(key) == value:
+            return
+        self.values[key] = value
+        self.update_derived(key)
+        self.dirty = True
+        self.save_timer.start()  # ardışık değişiklikler tek yazımda birleşir
+        for callback in list(self.observers.get(key, [])):
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"Settings observer error ({key}): {e}")
+
+    def observe(self, keys, callback):
+        for key in (keys,) if isinstance(keys, str) else keys:
+            self.observers.setdefault(key, []).append(callback)
+
+    def flush(self):
+        self.save_timer.stop()
+        if not self.dirty:
+            return
+        self.dirty = False
+        try:
+            save_settings(self.values)
+        except Exception as e:
+            print(f"Settings save error: {e}")
+
+# Data change events
+@dataclass(frozen=True)
+class PatientChanged:
+    room: str
+
+@dataclass(frozen=True)
+class TaskChanged:
+    task_id: int
+
+@dataclass(frozen=True)
+class CompletionRecorded:
+    task_id: int
+    date: str
+
+@dataclass(frozen=True)
+class Archived:
+    kind: str  # "task" veya "patient"
+    key: object  # arşiv satırı id'si ya da oda numarası
+
+class EventBus:
+    """In-process publish/subscribe for data change events; handlers run synchronously in order."""
+
+    def __init__(self):
+        self.subscribers = {}
+
+    def subscribe(self, event_type, handler):
+        self.subscribers.setdefault(event_type, []).append(handler)
+
+    def unsubscribe(self, event_type, handler):
+        handlers = self.subscribers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def publish(self, *events):
+        for event in events:
+            for handler in list(self.subscribers.get(type(event), [])):
+                try:
+                    handler(event)
+                except Exception as e:
+                    print(f"Event handler error ({type(event).__name__}): {e}")
+
+event_bus = EventBus()
+
+# Bir olay grubunda bundan fazla arşiv satırı değişirse arşiv tabloları satır satır yamanmaz, baştan yüklenir
+ARCHIVE_PATCH_LIMIT = 2000
+
+def row_runs(rows):
+    """Group sorted row numbers into (start, count) runs of consecutive rows."""
+    runs = []
+    for row in rows:
+        if runs and runs[-1][0] + runs[-1][1] == row:
+            runs[-1][1] += 1
+        else:
+            runs.append([row, 1])
+    return [tuple(run) for run in runs]
+
+def fetch_task_row(task_id):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute(QUERIES["task_with_patient"].sql, (task_id,))
+    r = cur.fetchone()
+    conn.close()
+    return dict(r) if r else None
+
+# Compliance analytics
+# Beklenen görev tekrarları tarih aralığı için SQL içinde üretilir ve tamamlanma kayıtlarıyla
+# tek sorguda eşleştirilir; Python tarafında gün gün döngü yapılmaz.
+COMPLIANCE_SQL = """
+WITH RECURSIVE days(d, dom, wd, jd) AS (
+    SELECT date(:start), CAST(strftime('%d', :start) AS INTEGER),
+        (CAST(strftime('%w', :start) AS INTEGER) + 6) % 7, CAST(julianday(:start) AS INTEGER)
+    UNION ALL
+    SELECT date(d, '+1 day'), CAST(strftime('%d', d, '+1 day') AS INTEGER), (wd + 1) % 7, jd + 1
+    FROM days WHERE d < date(:end)
+),
+rules AS (
+    SELECT t.id AS task_id, t.room_number, t.task, t.repeat_type, t.repeat_interval,
+        COALESCE(NULLIF(t.date, ''), '0000-00-00') AS start_d,
+        COALESCE(NULLIF(t.end_date, ''), '9999-12-31') AS end_d,
+        -- Tarihi boş "Kaç Günde Bir" görevi takvimdeki gibi bugünden başlar (calendar_day_entries)
+        CAST(julianday(COALESCE(NULLIF(t.date, ''), :today)) AS INTEGER) AS start_jd,
+        ',' || replace(COALESCE(t.repeat_days, ''), ' ', '') || ',' AS repeat_days,
+        CASE
+            WHEN t.time_type = 'Gün İçinde' THEN 'day'
+            WHEN t.time_type = 'Akşam' THEN 'night'
+            WHEN t.time >= :day_start AND t.time < :day_end THEN 'day'
+            ELSE 'night'
+        END AS shift
+    FROM all_tasks t
+    WHERE (:room IS NULL OR t.room_number = :room) AND COALESCE(NULLIF(t.end_date, ''), '9999-12-31') >= :start
+),
+expected AS (
+    SELECT r.task_id, r.room_number, r.task, r.shift, days.d AS day
+    FROM rules r JOIN days ON days.d BETWEEN r.start_d AND r.end_d
+    WHERE CASE r.repeat_type
+        WHEN 'Her Gün' THEN 1
+        WHEN 'Tek Günler' THEN days.dom % 2 = 1
+        WHEN 'Çift Günler' THEN days.dom % 2 = 0
+        WHEN 'Haftanın Günleri' THEN instr(r.repeat_days, ',' || days.wd || ',') > 0
+        WHEN 'Kaç Günde Bir' THEN r.repeat_interval > 0 AND days.jd >= r.start_jd AND (days.jd - r.start_jd) % r.repeat_interval = 0
+        ELSE days.d = r.start_d
+    END
+)
+SELECT {columns}, COUNT(*) AS expected,
+    SUM(EXISTS (SELECT 1 FROM all_completions c WHERE c.task_id = e.task_id AND c.completion_date = e.day)) AS completed
+FROM expected e LEFT JOIN patients p ON p.room_number = e.room_number
+GROUP BY {group}
+ORDER BY {group}
+"""
+
+COMPLIANCE_GROUPS = {
+    "patient": ("e.room_number, p.name, p.surname", "e.room_number"),
+    "task": ("e.task_id, e.room_number, p.name, p.surname, e.task, e.shift", "e.room_number, e.task_id"),
+    "shift": ("e.shift", "e.shift"),
+}
+
+def compliance_report(start, end, group_by="patient", room=None, settings=None):
+    """Completion rates per patient, task or shift for the occurrences expected between start and end."""
+    settings = settings or DEFAULT_SETTINGS
+    end = min(end, date.today())  # gelecekteki tekrarlar kaçırılmış sayılmaz
+    if end < start:
+        return []
+    columns, group = COMPLIANCE_GROUPS[group_by]
+    conn = get_completions_conn(start, end, archived=True)
+    cur = conn.cursor()
+    cur.execute(COMPLIANCE_SQL.format(columns=columns, group=group), {
+        "start": start.isoformat(), "end": end.isoformat(), "room": room, "today": date.today().isoformat(),
+        "day_start": parse_time(settings.get("day_start")).strftime("%H:%M"),
+        "day_end": parse_time(settings.get("day_end", "20:00")).strftime("%H:%M"),
+    })
+    rows = []
+    for r in cur.fetchall():
+        row = dict(r)
+        row["missed"] = row["expected"] - row["completed"]
+        row["rate"] = row["completed"] / row["expected"] if row["expected"] else 0.0
+        rows.append(row)
+    conn.close()
+    return rows
+
+# Calendar helpers
+CALENDAR_PREFETCH_DAYS = 3  # seçili günün önünde ve arkasında önceden hesaplanan gün sayısı
+
+def load_calendar_days(days):
+    """Compute calendar entries for several days with one task scan and one completion query."""
+    conn = get_completions_conn(min(days), max(days))
+    cur = conn.cursor()
+    cur.execute(QUERIES["calendar_tasks"].sql)
+    rows = [dict(r) for r in cur.fetchall()]
+    cur.execute(QUERIES["calendar_completions"].sql, (min(days).isoformat(), max(days).isoformat()))
+    completions = {}
+    for c in cur.fetchall():
+        completions.setdefault(c["completion_date"], set()).add(c["task_id"])
+    conn.close()
+    return {d: calendar_day_entries(rows, d, completions.get(d.isoformat(), set())) for d in days}
+
+class CalendarPrefetchWorker(QtCore.QThread):
+    days_ready = pyqtSignal(int, object)
+
+    def __init__(self, generation, days, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.days = days
+        self.failed = False
+
+    def run(self):
+        try:
+            result = load_calendar_days(self.days)
+        except Exception as e:
+            print(f"Calendar prefetch error: {e}")
+            self.failed = True
+            return
+        self.days_ready.emit(self.generation, result)
+
+# Export
+# Satırlar veritabanından parça parça okunup doğrudan dosyaya yazılır; geçmiş ne kadar büyük olursa
+# olsun bellekte en fazla EXPORT_BATCH_SIZE satır tutulur.
+EXPORT_BATCH_SIZE = 500
+EXPORT_SOURCES = {
+    "tasks": ("Görevler", ["ID", "Oda", "Hasta", "Görev", "Saat", "Zaman Tipi", "Tekrar", "Başlangıç", "Bitiş", "İptal", "Son Tamamlanma"], """
+        SELECT t.id, t.room_number, TRIM(COALESCE(p.name, '') || ' ' || COALESCE(p.surname, '')), t.task, t.time, t.time_type,
+            t.repeat_type, t.date, t.end_date, t.cancelled, t.completed_time
+        FROM tasks t LEFT JOIN patients p ON p.room_number = t.room_number
+        ORDER BY t.room_number, t.id
+    """),
+    "task_completions": ("Tamamlanma Kayıtları", ["ID", "Görev ID", "Oda", "Hasta", "Görev", "Tarih"], """
+        SELECT c.id, c.task_id, t.room_number, TRIM(COALESCE(p.name, '') || ' ' || COALESCE(p.surname, '')), t.task, c.completion_date
+        FROM all_completions c
+        LEFT JOIN all_tasks t ON t.id = c.task_id
+        LEFT JOIN patients p ON p.room_number = t.room_number
+        ORDER BY c.completion_date, c.id
+    """),
+    "archive": ("Arşiv (Görevler)", ["ID", "Oda", "Görev", "Saat", "Başlangıç", "Bitiş", "Zaman Tipi"], """
+        SELECT id, room_number, task, time, date, end_date, time_type FROM arc.archive ORDER BY id
+    """),
+    "archive_patients": ("Arşiv (Hastalar)", ["Oda", "Ad", "Soyad", "T.C. No", "Doğum Tarihi", "Telefon", "Notlar"], """
+        SELECT room_number, name, surname, tc_no, birth_date, phone, notes FROM arc.archive_patients ORDER BY room_number
+    """),
+}
+EXPORT_FORMATS = [("csv", "CSV (*.csv)"), ("xlsx", "Excel (*.xlsx)"), ("pdf", "PDF (*.pdf)")]
 
-def save_settings(s):
-    with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
-        json.dump(s, f, ensure_ascii=False, indent=2)
+def get_export_conn(source):
+    return get_archive_conn() if source in ("archive", "archive_patients") else get_completions_conn(archived=True)
+
+def count_export_rows(source):
+    conn = get_export_conn(source)
+    cur = conn.cursor()
+    cur.execute(f"SELECT COUNT(*) FROM ({EXPORT_SOURCES[source][2]})")
+    total = cur.fetchone()[0]
+    conn.close()
+    return total
+
+def iter_export_rows(source, batch_size=EXPORT_BATCH_SIZE):
+    conn = get_export_conn(source)
+    try:
+        cur = conn.cursor()
+        cur.execute(EXPORT_SOURCES[source][2])
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for r in rows:
+                yield ["" if v is None else v for v in r]
+    finally:
+        conn.close()
+
+def write_csv(path, title, headers, rows):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for r in rows:
+            writer.writerow(r)
+
+XLSX_INVALID_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+def xlsx_cell(v):
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return f"<c><v>{v}</v></c>"
+    text = xml_escape(XLSX_INVALID_CHARS.sub("", str(v)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+def write_xlsx(path, title, headers, rows):
+    # Hücreler paylaşılan dize tablosu yerine satır içi yazılır, böylece sayfa akış halinde üretilebilir
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, content in XLSX_STATIC_PARTS.items():
+            zf.writestr(name, content)
+        zf.writestr("xl/workbook.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{xml_escape(title[:31])}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ))
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as raw:
+            f = io.TextIOWrapper(raw, encoding="utf-8")
+            f.write('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+            f.write("<row>" + "".join(xlsx_cell(h) for h in headers) + "</row>")
+            for r in rows:
+                f.write("<row>" + "".join(xlsx_cell(v) for v in r) + "</row>")
+            f.write("</sheetData></worksheet>")
+            f.flush()
+            f.detach()
+
+def write_pdf(path, title, headers, rows):
+    writer = QtGui.QPdfWriter(path)
+    writer.setPageSize(QtGui.QPageSize(QtGui.QPageSize.A4))
+    writer.setPageOrientation(QtGui.QPageLayout.Landscape)
+    writer.setResolution(96)
+    writer.setTitle(title)
+    painter = QtGui.QPainter(writer)
+    try:
+        font = QFont("Arial", 8)
+        painter.setFont(font)
+        metrics = QtGui.QFontMetrics(font, writer)
+        line_h = metrics.height() + 4
+        page_w = writer.width()
+        page_h = writer.height()
+        col_w = page_w / len(headers)
+        page_no = 1
+
+        def draw_row(y, values, bold=False):
+            f = QFont(font)
+            f.setBold(bold)
+            painter.setFont(f)
+            for i, v in enumerate(values):
+                text = metrics.elidedText(str(v), Qt.ElideRight, int(col_w) - 6)
+                painter.drawText(QtCore.QRectF(i * col_w + 2, y, col_w - 4, line_h), Qt.AlignLeft | Qt.AlignVCenter, text)
+            painter.drawLine(QtCore.QPointF(0, y + line_h), QtCore.QPointF(page_w, y + line_h))
+
+        def draw_header():
+            painter.setFont(font)
+            painter.drawText(QtCore.QRectF(0, 0, page_w, line_h), Qt.AlignLeft | Qt.AlignVCenter,
+                             f"{title} - {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+            painter.drawText(QtCore.QRectF(0, 0, page_w, line_h), Qt.AlignRight | Qt.AlignVCenter, f"Sayfa {page_no}")
+            draw_row(line_h * 1.5, headers, bold=True)
+            return line_h * 2.5
+
+        y = draw_header()
+        for r in rows:
+            if y + line_h > page_h:
+                writer.newPage()
+                page_no += 1
+                y = draw_header()
+            draw_row(y, r)
+            y += line_h
+    finally:
+        painter.end()
+
+EXPORT_WRITERS = {"csv": write_csv, "xlsx": write_xlsx, "pdf": write_pdf}
+
+class ExportWorker(QtCore.QThread):
+    progress = pyqtSignal(int, int)
+    done = pyqtSignal(bool, str)
+
+    def __init__(self, source, fmt, path, parent=None):
+        super().__init__(parent)
+        self.source = source
+        self.fmt = fmt
+        self.path = path
+
+    def tracked_rows(self, total):
+        n = 0
+        for r in iter_export_rows(self.source):
+            if self.isInterruptionRequested():
+                return
+            yield r
+            n += 1
+            if n % EXPORT_BATCH_SIZE == 0:
+                self.progress.emit(n, total)
+        self.progress.emit(n, total)
+
+    def run(self):
+        title, headers, _ = EXPORT_SOURCES[self.source]
+        try:
+            total = count_export_rows(self.source)
+            self.progress.emit(0, total)
+            EXPORT_WRITERS[self.fmt](self.path, title, headers, self.tracked_rows(total))
+        except Exception as e:
+            print(f"Export error: {e}")
+            self.remove_partial()
+            self.done.emit(False, f"Dışa aktarma başarısız: {e}")
+            return
+        if self.isInterruptionRequested():
+            self.remove_partial()
+            self.done.emit(False, "Dışa aktarma iptal edildi.")
+            return
+        self.done.emit(True, f"{total} kayıt dışa aktarıldı: {self.path}")
+
+    def remove_partial(self):
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError as e:
+            print(f"Export cleanup error: {e}")
+
+# Backups
+# Her yedek BACKUP_DIR altında zaman damgalı bir klasördür ve tüm veritabanı dosyalarını içerir.
+# Kopyalama SQLite backup API ile küçük sayfa adımlarında yapılır; adımlar arasında kilit bırakılır.
+BACKUP_PAGES_PER_STEP = 64
+BACKUP_CHECK_INTERVAL_MS = 60 * 60 * 1000
+RESTORE_MARKER = os.path.join(DATA_DIR, "restore_pending")
+
+def backup_sources():
+    return [path for path in (DB_PATH, ARCHIVE_DB_PATH, HISTORY_DB_PATH) if os.path.exists(path)]
+
+def copy_database(src_path, dest_path, progress=None):
+    src = sqlite3.connect(src_path)
+    dst = sqlite3.connect(dest_path)
+    try:
+        src.backup(dst, pages=BACKUP_PAGES_PER_STEP, progress=progress, sleep=0.005)
+    finally:
+        dst.close()
+        src.close()
+
+def quick_check(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        conn.close()
+
+def list_snapshots():
+    if not os.path.isdir(BACKUP_DIR):
+        return []
+    return sorted((n for n in os.listdir(BACKUP_DIR) if not n.endswith(".tmp")), reverse=True)
+
+def rotate_snapshots(keep):
+    stale = set(list_snapshots()[keep:])
+    for name in os.listdir(BACKUP_DIR):
+        if name.endswith(".tmp") or name in stale:
+            shutil.rmtree(os.path.join(BACKUP_DIR, name), ignore_errors=True)
+
+def new_snapshot_dir():
+    """Claim a unique generation name; a second backup within the same second gets a _02, _03... suffix."""
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    base = datetime.now().strftime("%Y%m%d_%H%M%S")
+    for n in range(1, 100):
+        name = base if n == 1 else f"{base}_{n:02d}"
+        if os.path.exists(os.path.join(BACKUP_DIR, name)):
+            continue
+        try:
+            os.mkdir(os.path.join(BACKUP_DIR, name + ".tmp"))
+        except FileExistsError:
+            continue
+        return name
+    raise RuntimeError("Yedek klasörü adı oluşturulamadı")
+
+def create_snapshot(keep, progress=None):
+    """Copy every database into a new generation, verify it with quick_check and drop generations beyond keep."""
+    name = new_snapshot_dir()
+    tmp_dir = os.path.join(BACKUP_DIR, name + ".tmp")
+    for path in backup_sources():
+        dest = os.path.join(tmp_dir, os.path.basename(path))
+        copy_database(path, dest, progress)
+        result = quick_check(dest)
+        if result != "ok":
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise RuntimeError(f"{os.path.basename(path)} doğrulanamadı: {result}")
+    os.replace(tmp_dir, os.path.join(BACKUP_DIR, name))
+    rotate_snapshots(keep)
+    return name
+
+def restore_snapshot(name, progress=None):
+    """Replace every database with the snapshot; callers must stop all other writers first."""
+    snapshot_dir = os.path.join(BACKUP_DIR, name)
+    targets = {os.path.basename(p): p for p in (DB_PATH, ARCHIVE_DB_PATH, HISTORY_DB_PATH)}
+    files = [f for f in os.listdir(snapshot_dir) if f in targets]
+    for f in files:
+        result = quick_check(os.path.join(snapshot_dir, f))
+        if result != "ok":
+            raise RuntimeError(f"{f} bozuk: {result}")
+    # Üç dosya tek işlemde değiştirilemez; yarıda kalan geri yükleme işaret dosyasından anlaşılır ve
+    # bir sonraki açılışta aynı yedekten tamamlanır, veritabanları karışık sürümlerde kalmaz
+    with open(RESTORE_MARKER + ".tmp", "w", encoding="utf-8") as f:
+        f.write(name)
+    os.replace(RESTORE_MARKER + ".tmp", RESTORE_MARKER)
+    # Yedekten sonra oluşmuş arşiv/geçmiş dosyaları kalırsa veritabanları birbirine uymaz; silinir,
+    # init_db_and_migrate boş olarak yeniden oluşturur
+    for f, path in targets.items():
+        if f not in files:
+            for leftover in (path, path + "-journal", path + "-wal", path + "-shm"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+    for f in files:
+        copy_database(os.path.join(snapshot_dir, f), targets[f], progress)
+    init_db_and_migrate()  # eski sürümden alınmış yedeklerin şemasını güncelle
+    os.remove(RESTORE_MARKER)
+
+def finish_interrupted_restore():
+    if not os.path.exists(RESTORE_MARKER):
+        return
+    with open(RESTORE_MARKER, encoding="utf-8") as f:
+        name = f.read().strip()
+    if not name or not os.path.isdir(os.path.join(BACKUP_DIR, name)):
+        os.remove(RESTORE_MARKER)
+        return
+    try:
+        restore_snapshot(name)
+    except Exception as e:
+        print(f"Restore error: {e}")
+
+finish_interrupted_restore()
+
+class BackupWorker(QtCore.QThread):
+    progress = pyqtSignal(int, int)
+    done = pyqtSignal(bool, str)
+
+    def __init__(self, keep, restore_name=None, parent=None):
+        super().__init__(parent)
+        self.keep = keep
+        self.restore_name = restore_name
+
+    def on_step(self, status, remaining, total):
+        self.progress.emit(total - remaining, total)
+
+    def run(self):
+        try:
+            if self.restore_name:
+                restore_snapshot(self.restore_name, self.on_step)
+                message = f"{self.restore_name} yedeği geri yüklendi."
+            else:
+                message = f"{create_snapshot(self.keep, self.on_step)} yedeği alındı."
+        except Exception as e:
+            print(f"Backup error: {e}")
+            self.done.emit(False, str(e))
+            return
+        self.done.emit(True, message)
+
+# Idle-time database maintenance
+# Gece vardiyasında, kullanıcı girişi ve vakti gelen görev yokken günde en fazla bir kez çalışır.
+MAINTENANCE_CHECK_INTERVAL_MS = 5 * 60 * 1000
+MAINTENANCE_INTERVAL_HOURS = 24
+MAINTENANCE_BUDGET_SEC = 30  # tüm dosyalar için adım adım boşaltmaya ayrılan toplam süre
+VACUUM_STEP_PAGES = 256
+ANALYSIS_LIMIT = 1000  # ANALYZE her indeksten en fazla bu kadar satır örnekler
+IDLE_RESUME_SEC = 60
+
+class IdleTracker(QtCore.QObject):
+    """Remembers the last keyboard/mouse input anywhere in the application."""
+    resumed = pyqtSignal()  # IDLE_RESUME_SEC'den uzun bir aradan sonraki ilk girişte
+
+    INPUT_EVENTS = {QtCore.QEvent.KeyPress, QtCore.QEvent.MouseButtonPress, QtCore.QEvent.MouseMove, QtCore.QEvent.Wheel}
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.last_input = monotonic()
+        QApplication.instance().installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() in self.INPUT_EVENTS:
+            now = monotonic()
+            if now - self.last_input > IDLE_RESUME_SEC:
+                self.resumed.emit()
+            self.last_input = now
+        return False
+
+    def idle_seconds(self):
+        return monotonic() - self.last_input
+
+def maintenance_targets():
+    targets = [("main", DB_PATH), ("arc", ARCHIVE_DB_PATH), ("hist", HISTORY_DB_PATH)]
+    return [(name, path) for name, path in targets if os.path.exists(path)]
+
+def maintain_database(conn, path, stop, deadline):
+    """Refresh planner statistics, release free pages in bounded steps and checkpoint the WAL. Returns a report row."""
+    t0 = perf_counter()
+    size_before = os.path.getsize(path)
+    steps = []
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # Adım adım boşaltma için dosya bir kez yeniden yazılır; sonraki çalıştırmalar yalnızca boş sayfaları bırakır
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        steps.append("vacuum")
+    conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize")
+    steps += ["analyze", "optimize"]
+    pages = 0
+    while not stop.is_set() and perf_counter() < deadline:
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free:
+            break
+        conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_STEP_PAGES})")  # execute() tek adımda yalnızca bir sayfa bırakır
+        pages += min(free, VACUUM_STEP_PAGES)
+    if pages:
+        steps.append(f"incremental_vacuum {pages}")
+    if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        steps.append("wal_checkpoint")
+    return {
+        "size_before": size_before, "size_after": os.path.getsize(path),
+        "duration_ms": round((perf_counter() - t0) * 1000), "steps": ", ".join(steps),
+    }
+
+def log_maintenance(started, reports):
+    conn = get_conn()
+    conn.executemany(
+        "INSERT INTO maintenance_log (started, file, size_before, size_after, duration_ms, steps) VALUES (?, ?, ?, ?, ?, ?)",
+        [(started, r["file"], r["size_before"], r["size_after"], r["duration_ms"], r["steps"]) for r in reports]
+    )
+    conn.commit()
+    conn.close()
+
+def last_maintenance():
+    """Rows of the most recent maintenance run (one per database file)."""
+    conn = get_conn()
+    rows = conn.execute("SELECT * FROM maintenance_log WHERE started=(SELECT MAX(started) FROM maintenance_log) ORDER BY id").fetchall()
+    conn.close()
+    return [dict(r) for r in rows]
+
+def format_maintenance(reports):
+    if not reports:
+        return "Henüz bakım yapılmadı."
+    reclaimed = sum(r["size_before"] - r["size_after"] for r in reports) / (1024 * 1024)
+    ms = sum(r["duration_ms"] for r in reports)
+    files = ", ".join(r["file"] for r in reports)
+    return f"Son bakım: {reports[0]['started']:%d.%m.%Y %H:%M} ({files}) - {reclaimed:.1f} MB geri kazanıldı, {ms} ms"
+
+class MaintenanceWorker(QtCore.QThread):
+    done = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.stop_event = threading.Event()
+        self.conn = None
+
+    def run(self):
+        started = datetime.now().replace(microsecond=0)
+        deadline = perf_counter() + MAINTENANCE_BUDGET_SEC
+        reports = []
+        try:
+            for name, path in maintenance_targets():
+                if self.stop_event.is_set():
+                    break
+                self.conn = sqlite3.connect(path, timeout=5)
+                try:
+                    reports.append(dict(maintain_database(self.conn, path, self.stop_event, deadline), file=name, started=started))
+                finally:
+                    self.conn, conn = None, self.conn
+                    conn.close()
+        except Exception as e:
+            print(f"Maintenance error: {e}")
+        if reports:
+            log_maintenance(started, reports)
+        self.done.emit(reports)
+
+    def stop(self):
+        # Kullanıcı döndüğünde çalışan ifade kesilir; yarım kalan VACUUM geri alınır ve sonraki boşta yeniden denenir
+        self.stop_event.set()
+        conn = self.conn
+        if conn is not None:
+            try:
+                conn.interrupt()
+            except sqlite3.ProgrammingError:
+                pass
+
+# Station sync
+class SyncWorker(QtCore.QThread):
+    applied = pyqtSignal(int)
+
+    def __init__(self, port, peers, host, token, parent=None):
+        super().__init__(parent)
+        self.port = port
+        self.peers = peers
+        self.host = host
+        self.token = token
+        self.stop_event = threading.Event()
+
+    def run(self):
+        try:
+            gs_sync.run_node(DB_PATH, self.port, self.peers, self.token, host=self.host,
+                             stop=self.stop_event, on_applied=self.applied.emit)
+        except Exception as e:
+            print(f"Sync error: {e}")
+
+    def stop(self):
+        # Beklemez: süren eş isteği (en fazla gs_sync.SYNC_TIMEOUT_SEC) bitince iş parçacığı kendiliğinden sonlanır
+        self.stop_event.set()
+
+# Tablet API
+class ApiWorker(QtCore.QThread):
+    """Runs the read-only JSON API's event loop; requests never touch the GUI thread."""
+
+    def __init__(self, port, host, token, parent=None):
+        super().__init__(parent)
+        self.port = port
+        self.host = host
+        self.token = token
+        self.stop_event = threading.Event()
+
+    def run(self):
+        try:
+            gs_api.run_server(self.port, self.host, self.token, stop=self.stop_event)
+        except Exception as e:
+            print(f"API error: {e}")
+
+    def stop(self):
+        self.stop_event.set()
+        self.wait()
+
+# UI refresh scheduling
+SETTINGS_DEBOUNCE_MS = 400
+
+class RefreshScheduler(QtCore.QObject):
+    """Collects dirty marks for named views and rebuilds each one at most once per event-loop turn."""
+
+    def __init__(self, views, parent=None):
+        super().__init__(parent)
+        self.views = views  # [(name, callback)] in rebuild order
+        self.dirty = set()
+        self.pending = set()
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(0)
+        self.flush_timer.timeout.connect(self.flush)
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.timeout.connect(self.flush_pending)
+
+    def invalidate(self, *names):
+        self.dirty.update(names)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def invalidate_later(self, *names, delay=SETTINGS_DEBOUNCE_MS):
+        # Her yeni işaret beklemeyi baştan başlatır; art arda gelen değişiklikler tek yenilemeye iner
+        self.pending.update(names)
+        self.debounce_timer.start(delay)
+
+    def flush_pending(self):
+        names, self.pending = self.pending, set()
+        self.invalidate(*names)
+
+    def flush(self):
+        for name, callback in self.views:
+            if name in self.dirty:
+                self.dirty.discard(name)
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Refresh error ({name}): {e}")
+
+# Periodic timers
+CLOCK_INTERVAL_MS = 1000
+FLASH_INTERVAL_MS = 1000
+STALL_HEARTBEAT_MS = CLOCK_INTERVAL_MS  # saatle aynı uyanışta verilir, ek uyanış getirmez
+AUTO_REFRESH_INTERVAL_MS = 60 * 1000
+NOTIFY_INTERVAL_MS = 30 * 1000
+# Yanıp sönme yalnızca "flash" özelliğini değiştirir; stil sayfası bir kez verilir, alt satırlar yeniden stillenmez
+DUE_GROUP_STYLE = """
+    QGroupBox {
+        background: #333333;
+        color: white;
+        border: 4px solid #E74C3C;
+        border-radius: 8px;
+        padding: 10px;
+        font-family: Helvetica;
+        font-size: 16px;
+        font-weight: bold;
+    }
+    QGroupBox[flash="true"] {
+        border-color: #F1C40F;
+    }
+    QGroupBox::title {
+        color: white;
+        subcontrol-origin: margin;
+        subcontrol-position: top left;
+        padding: 0 3px;
+    }
+"""
+
+@dataclass
+class TimerJob:
+    period_ms: int
+    callback: object
+    active: bool = True
+    next_due: float = 0.0
+
+class TimerScheduler(QtCore.QObject):
+    """Runs periodic jobs from one timer. Jobs fire on wall-clock multiples of their period, so jobs that fall
+    in the same instant share a single wakeup; inactive jobs cause no wakeups at all."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = {}
+        self.wakeups = 0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.PreciseTimer)  # erken uyanıp saniye sınırının önüne düşmesin
+        self.timer.timeout.connect(self.run_due)
+
+    @staticmethod
+    def now_ms():
+        return datetime.now().timestamp() * 1000
+
+    def next_boundary(self, period_ms):
+        return (self.now_ms() // period_ms + 1) * period_ms
+
+    def add(self, name, period_ms, callback, active=True):
+        self.jobs[name] = TimerJob(period_ms, callback, active, self.next_boundary(period_ms))
+        self.reschedule()
+
+    def is_active(self, name):
+        return self.jobs[name].active
+
+    def set_active(self, name, active):
+        job = self.jobs[name]
+        if job.active != active:
+            job.active = active
+            job.next_due = self.next_boundary(job.period_ms)
+            self.reschedule()
+
+    def reschedule(self):
+        now = self.now_ms()
+        due = []
+        for job in self.jobs.values():
+            if not job.active:
+                continue
+            if job.next_due - now > job.period_ms:  # sistem saati geri alındı
+                job.next_due = self.next_boundary(job.period_ms)
+            due.append(job.next_due)
+        if due:
+            self.timer.start(max(0, int(min(due) - now) + 1))
+        else:
+            self.timer.stop()
+
+    def run_due(self):
+        self.wakeups += 1
+        now = self.now_ms()
+        due = [(name, job) for name, job in self.jobs.items() if job.active and job.next_due <= now]
+        for name, job in due:
+            job.next_due = self.next_boundary(job.period_ms)
+        # Sonraki uyanış işler çalışmadan kurulur: bildirim penceresinin iç döngüsünde de saat işlemeye devam eder
+        self.reschedule()
+        for name, job in due:
+            try:
+                job.callback()
+            except Exception as e:
+                print(f"Timer error ({name}): {e}")
 
 # Splash Screen
 class SplashScreen(QWidget):
@@ -360,11 +1518,248 @@ class NotificationDialog(QDialog):
         self.move((screen.width() - size.width()) // 2, (screen.height() - size.height()) // 2)
         super().showEvent(event)
 
-    def accept(self):
-        self.timer.stop()
-        super().accept()
+    def accept(self):
+        self.timer.stop()
+        super().accept()
+
+# Dialogs
+# Validation and CSV import
+TIME_TYPES = ["Saat Belirt", "Gün İçinde", "Akşam"]
+REPEAT_TYPES = ["Yok", "Her Gün", "Tek Günler", "Çift Günler", "Haftanın Günleri", "Kaç Günde Bir"]
+WEEKDAY_NAMES = ["Pzt", "Sal", "Çar", "Per", "Cum", "Cmt", "Paz"]
+PATIENT_IMPORT_COLUMNS = ["room_number", "name", "surname", "tc_no", "birth_date", "phone", "notes"]
+TASK_IMPORT_COLUMNS = ["room_number", "task", "time", "time_type", "repeat_type", "date", "end_date", "repeat_days", "repeat_interval"]
+
+def validate_patient_fields(room, name, surname, tc):
+    if not room or not name or not surname:
+        return "Oda, ad ve soyad zorunlu."
+    if tc and (not tc.isdigit() or len(tc) != 11):
+        return "T.C. 11 rakam olmalı."
+    return None
+
+def parse_import_date(value):
+    # Hem veritabanı biçimi (yyyy-MM-dd) hem ekrandaki biçim (dd/MM/yyyy) kabul edilir
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            pass
+    raise ValueError(f"Geçersiz tarih: {value}")
+
+def parse_import_weekdays(value):
+    days = set()
+    for part in re.split(r"[,;\s]+", value):
+        if not part:
+            continue
+        if part.isdigit() and 0 <= int(part) <= 6:
+            days.add(int(part))
+        elif part.capitalize() in WEEKDAY_NAMES:
+            days.add(WEEKDAY_NAMES.index(part.capitalize()))
+        else:
+            raise ValueError(f"Geçersiz hafta günü: {part}")
+    return ",".join(str(d) for d in sorted(days))
+
+def read_import_csv(path, columns):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(f, dialect=dialect)
+        missing = [c for c in columns if c not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError("Eksik sütunlar: " + ", ".join(missing))
+        for r in reader:
+            yield reader.line_num, {c: (r.get(c) or "").strip() for c in columns}
+
+def prepare_patient_rows(path, existing_rooms):
+    rows, errors, seen = [], [], set()
+    for line, r in read_import_csv(path, PATIENT_IMPORT_COLUMNS):
+        try:
+            err = validate_patient_fields(r["room_number"], r["name"], r["surname"], r["tc_no"])
+            if err:
+                raise ValueError(err)
+            if r["room_number"] in existing_rooms or r["room_number"] in seen:
+                raise ValueError("Aynı oda numarası var.")
+            birth = parse_import_date(r["birth_date"]) if r["birth_date"] else ""
+        except ValueError as e:
+            errors.append((line, str(e)))
+            continue
+        seen.add(r["room_number"])
+        rows.append((r["room_number"], r["name"], r["surname"], r["notes"], None, r["tc_no"], birth, r["phone"]))
+    return rows, errors
+
+def normalize_schedule_fields(r):
+    """Return (time, time_type, repeat_type, repeat_days, repeat_interval) as TaskEditDialog would store them."""
+    time_type = r["time_type"] or ("Saat Belirt" if r["time"] else "Gün İçinde")
+    if time_type not in TIME_TYPES:
+        raise ValueError(f"Geçersiz zaman tipi: {time_type}")
+    time_str = ""
+    if time_type == "Saat Belirt":
+        try:
+            time_str = datetime.strptime(r["time"], "%H:%M").strftime("%H:%M")
+        except ValueError:
+            raise ValueError(f"Geçersiz saat: {r['time']}" if r["time"] else "Saat zorunlu.")
+    repeat_type = r["repeat_type"] or "Yok"
+    if repeat_type not in REPEAT_TYPES:
+        raise ValueError(f"Geçersiz tekrar türü: {repeat_type}")
+    repeat_days = ""
+    repeat_interval = None
+    if repeat_type == "Haftanın Günleri":
+        repeat_days = parse_import_weekdays(r["repeat_days"])
+        if not repeat_days:
+            raise ValueError("En az bir hafta günü seçin.")
+    elif repeat_type == "Kaç Günde Bir":
+        repeat_interval = int(r["repeat_interval"] or 1) if (r["repeat_interval"] or "1").isdigit() else 0
+        if not 1 <= repeat_interval <= 365:
+            raise ValueError("Tekrar aralığı 1-365 olmalı.")
+    return time_str, time_type, repeat_type, repeat_days, repeat_interval
+
+def prepare_task_rows(path, existing_rooms):
+    rows, errors = [], []
+    today = date.today().isoformat()
+    for line, r in read_import_csv(path, TASK_IMPORT_COLUMNS):
+        try:
+            if not r["room_number"] or not r["task"]:
+                raise ValueError("Hasta ve görev zorunlu.")
+            if r["room_number"] not in existing_rooms:
+                raise ValueError(f"Hasta bulunamadı: {r['room_number']}")
+            time_str, time_type, repeat_type, repeat_days, repeat_interval = normalize_schedule_fields(r)
+            date_str = parse_import_date(r["date"]) if r["date"] else today
+            end_date_str = parse_import_date(r["end_date"]) if r["end_date"] else ""
+        except ValueError as e:
+            errors.append((line, str(e)))
+            continue
+        rows.append((r["room_number"], r["task"], time_str, repeat_type, time_type, date_str, end_date_str, repeat_days, repeat_interval))
+    return rows, errors
+
+def import_csv(path, kind):
+    """Validate every row of a patients/tasks CSV and insert all of them in one transaction, or none if any row fails."""
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT room_number FROM patients")
+        existing_rooms = {r[0] for r in cur.fetchall()}
+        if kind == "patients":
+            rows, errors = prepare_patient_rows(path, existing_rooms)
+            sql = """INSERT INTO patients (room_number, name, surname, notes, photo, tc_no, birth_date, phone) VALUES (?,?,?,?,?,?,?,?)"""
+        else:
+            rows, errors = prepare_task_rows(path, existing_rooms)
+            sql = """INSERT INTO tasks (room_number, task, time, done, repeat_type, time_type, date, end_date, cancelled, repeat_days, repeat_interval, notified, completed_time)
+                VALUES (?,?,?,0,?,?,?,?,0,?,?,0,NULL)"""
+        if errors:
+            return 0, errors
+        with conn:
+            cur.executemany(sql, rows)
+        return len(rows), []
+    finally:
+        conn.close()
+
+# Care-plan templates
+CARE_PLAN_ITEM_FIELDS = ["task", "time", "time_type", "repeat_type", "repeat_days", "repeat_interval"]
+
+def load_care_plans():
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT id, name FROM care_plans ORDER BY name")
+    rows = cur.fetchall()
+    conn.close()
+    return rows
+
+def load_care_plan_items(plan_id):
+    conn = get_conn()
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM care_plan_items WHERE plan_id=? ORDER BY id", (plan_id,))
+    rows = [dict(r) for r in cur.fetchall()]
+    conn.close()
+    return rows
+
+def linked_task_ids(cur, plan_id):
+    cur.execute("""SELECT t.id FROM tasks t JOIN care_plan_items i ON i.id = t.template_item_id WHERE i.plan_id=?""", (plan_id,))
+    return [r[0] for r in cur.fetchall()]
+
+def save_care_plan(plan_id, name, items, propagate=False):
+    """Store a template and its items; with propagate, linked tasks are rewritten by one UPDATE. Returns (plan_id, changed task ids)."""
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        if plan_id is None:
+            cur.execute("INSERT INTO care_plans (name) VALUES (?)", (name,))
+            plan_id = cur.lastrowid
+        else:
+            cur.execute("UPDATE care_plans SET name=? WHERE id=?", (name, plan_id))
+        keep = [i["id"] for i in items if i.get("id")]
+        cur.execute(f"""SELECT id FROM care_plan_items WHERE plan_id=? AND id NOT IN ({",".join("?" * len(keep))})""", (plan_id, *keep))
+        removed = [(r[0],) for r in cur.fetchall()]
+        # Şablondan çıkarılan kalemlere bağlı görevler silinmez, yalnızca bağlantıları kopar
+        cur.executemany("UPDATE tasks SET template_item_id=NULL WHERE template_item_id=?", removed)
+        cur.executemany("DELETE FROM care_plan_items WHERE id=?", removed)
+        cur.executemany(
+            """UPDATE care_plan_items SET task=?, time=?, time_type=?, repeat_type=?, repeat_days=?, repeat_interval=? WHERE id=? AND plan_id=?""",
+            [tuple(i[f] for f in CARE_PLAN_ITEM_FIELDS) + (i["id"], plan_id) for i in items if i.get("id")]
+        )
+        cur.executemany(
+            """INSERT INTO care_plan_items (plan_id, task, time, time_type, repeat_type, repeat_days, repeat_interval) VALUES (?,?,?,?,?,?,?)""",
+            [(plan_id,) + tuple(i[f] for f in CARE_PLAN_ITEM_FIELDS) for i in items if not i.get("id")]
+        )
+        changed = []
+        if propagate:
+            cur.execute("""
+                UPDATE tasks SET task=i.task, time=i.time, time_type=i.time_type, repeat_type=i.repeat_type,
+                    repeat_days=i.repeat_days, repeat_interval=i.repeat_interval, notified=0
+                FROM care_plan_items i
+                WHERE tasks.template_item_id = i.id AND i.plan_id = ?
+            """, (plan_id,))
+            changed = linked_task_ids(cur, plan_id)
+        conn.commit()
+        return plan_id, changed
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def delete_care_plan(plan_id):
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        cur.execute("""UPDATE tasks SET template_item_id=NULL WHERE template_item_id IN (SELECT id FROM care_plan_items WHERE plan_id=?)""", (plan_id,))
+        cur.execute("DELETE FROM care_plan_items WHERE plan_id=?", (plan_id,))
+        cur.execute("DELETE FROM care_plans WHERE id=?", (plan_id,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def apply_care_plan(plan_id, rooms, start_date):
+    """Create the template's tasks for every room in one transaction, skipping items a room already has. Returns new task ids."""
+    conn = get_conn()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM tasks")
+        last_id = cur.fetchone()[0]
+        cur.executemany("""
+            INSERT INTO tasks (room_number, task, time, done, repeat_type, time_type, date, end_date, cancelled,
+                repeat_days, repeat_interval, notified, completed_time, template_item_id)
+            SELECT ?, i.task, i.time, 0, i.repeat_type, i.time_type, ?, '', 0, i.repeat_days, i.repeat_interval, 0, NULL, i.id
+            FROM care_plan_items i
+            WHERE i.plan_id = ? AND NOT EXISTS (SELECT 1 FROM tasks t WHERE t.room_number = ? AND t.template_item_id = i.id)
+            ORDER BY i.id
+        """, [(room, start_date, plan_id, room) for room in rooms])
+        cur.execute("SELECT id FROM tasks WHERE id > ? ORDER BY id", (last_id,))
+        new_ids = [r[0] for r in cur.fetchall()]
+        conn.commit()
+        return new_ids
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
-# Dialogs
 class PatientEditDialog(QDialog):
     def __init__(self, parent=None, patient=None):
         super().__init__(parent)
@@ -440,12 +1835,10 @@ class PatientEditDialog(QDialog):
         room = self.room.text().strip()
         name = self.name.text().strip()
         surname = self.surname.text().strip()
-        if not room or not name or not surname:
-            QMessageBox.warning(self, "Hata", "Oda, ad ve soyad zorunlu.")
-            return
         tc = self.tc.text().strip()
-        if tc and (not tc.isdigit() or len(tc) != 11):
-            QMessageBox.warning(self, "Hata", "T.C. 11 rakam olmalı.")
+        err = validate_patient_fields(room, name, surname, tc)
+        if err:
+            QMessageBox.warning(self, "Hata", err)
             return
         birth = self.birth.date().toString("yyyy-MM-dd")
         conn = get_conn()
@@ -464,6 +1857,7 @@ class PatientEditDialog(QDialog):
                            (room, name, surname, self.notes.toPlainText(), self.photo_data, tc, birth, self.phone.text().strip()))
             conn.commit()
             conn.close()
+            event_bus.publish(PatientChanged(room))
             self.accept()
         except Exception as e:
             conn.rollback()
@@ -500,7 +1894,7 @@ class TaskEditDialog(QDialog):
         self.patient_combo = QComboBox()
         conn = get_conn()
         cur = conn.cursor()
-        cur.execute("SELECT room_number, name, surname FROM patients ORDER BY room_number")
+        cur.execute(QUERIES["patient_names"].sql)
         patients = cur.fetchall()
         conn.close()
         for r in patients:
@@ -556,7 +1950,7 @@ class TaskEditDialog(QDialog):
         form.addRow("Saat", self.time_edit)
 
         self.time_type = QComboBox()
-        self.time_type.addItems(["Saat Belirt", "Gün İçinde", "Akşam"])
+        self.time_type.addItems(TIME_TYPES)
         self.time_type.setStyleSheet(f"""
             QComboBox {{
                 border: 4px solid #C0392B;
@@ -574,7 +1968,7 @@ class TaskEditDialog(QDialog):
         self.time_type.currentIndexChanged.connect(self.toggle_time_edit)
 
         self.repeat = QComboBox()
-        self.repeat.addItems(["Yok", "Her Gün", "Tek Günler", "Çift Günler", "Haftanın Günleri", "Kaç Günde Bir"])
+        self.repeat.addItems(REPEAT_TYPES)
         self.repeat.setStyleSheet(f"""
             QComboBox {{
                 border: 4px solid #C0392B;
@@ -592,8 +1986,7 @@ class TaskEditDialog(QDialog):
         self.weekdays_box = QWidget()
         wd_layout = QHBoxLayout(self.weekdays_box)
         self.week_checks = []
-        days = ["Pzt", "Sal", "Çar", "Per", "Cum", "Cmt", "Paz"]
-        for i, d in enumerate(days):
+        for i, d in enumerate(WEEKDAY_NAMES):
             cb = QCheckBox(d)
             cb.setStyleSheet(f"color: white; font-family: Helvetica; font-size: {font_size}px;")
             self.week_checks.append(cb)
@@ -788,20 +2181,216 @@ class TaskEditDialog(QDialog):
                     """UPDATE tasks SET room_number=?, task=?, time=?, time_type=?, repeat_type=?, date=?, end_date=?, repeat_days=?, repeat_interval=?, notified=0 WHERE id=?""",
                     (room, tasktxt, time_str, time_type, repeat_type, date_str, end_date_str, repeat_days, repeat_interval, self.task["id"])
                 )
+                task_id = self.task["id"]
             else:
                 cur.execute(
                     """INSERT INTO tasks (room_number, task, time, done, repeat_type, time_type, date, end_date, cancelled, repeat_days, repeat_interval, notified, completed_time)
                     VALUES (?,?,?,?,?,?,?,?,0,?,?,0,NULL)""",
                     (room, tasktxt, time_str, 0, repeat_type, time_type, date_str, end_date_str, repeat_days, repeat_interval)
                 )
+                task_id = cur.lastrowid
             conn.commit()
             conn.close()
+            event_bus.publish(TaskChanged(task_id))
             self.accept()
         except Exception as e:
             conn.rollback()
             conn.close()
             QMessageBox.critical(self, "DB Hata", str(e))
 
+class CarePlanDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        font_size = parent.settings.get("font_size", 14) if parent else 14
+        self.setWindowTitle("Bakım Planları")
+        self.resize(900, 600)
+        self.setStyleSheet(f"""
+            QDialog {{
+                background: #333333;
+                color: white;
+                font-family: Helvetica;
+                font-size: {font_size}px;
+            }}
+        """)
+        self.plan_id = None
+        layout = QVBoxLayout(self)
+        top = QHBoxLayout()
+        self.plan_combo = QComboBox()
+        self.plan_combo.currentIndexChanged.connect(self.load_plan)
+        new_btn = QPushButton("Yeni Plan")
+        new_btn.clicked.connect(self.new_plan)
+        del_btn = QPushButton("Planı Sil")
+        del_btn.clicked.connect(self.delete_plan)
+        top.addWidget(QLabel("Plan:"))
+        top.addWidget(self.plan_combo, 1)
+        top.addWidget(new_btn)
+        top.addWidget(del_btn)
+        layout.addLayout(top)
+        form = QFormLayout()
+        self.name_edit = QLineEdit()
+        form.addRow("Plan Adı", self.name_edit)
+        layout.addLayout(form)
+        self.items_table = QTableWidget(0, 6)
+        self.items_table.setHorizontalHeaderLabels(["Görev", "Saat (SS:DD)", "Zaman Türü", "Tekrar", "Hafta Günleri", "Kaç Günde Bir"])
+        self.items_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.items_table)
+        row_bar = QHBoxLayout()
+        add_row_btn = QPushButton("Satır Ekle")
+        add_row_btn.clicked.connect(lambda: self.add_item_row())
+        del_row_btn = QPushButton("Satır Sil")
+        del_row_btn.clicked.connect(self.remove_item_rows)
+        self.propagate_check = QCheckBox("Bağlı görevleri de güncelle")
+        save_btn = QPushButton("Kaydet")
+        save_btn.clicked.connect(self.save)
+        row_bar.addWidget(add_row_btn)
+        row_bar.addWidget(del_row_btn)
+        row_bar.addStretch()
+        row_bar.addWidget(self.propagate_check)
+        row_bar.addWidget(save_btn)
+        layout.addLayout(row_bar)
+        apply_box = QGroupBox("Odalara Uygula")
+        apply_l = QHBoxLayout(apply_box)
+        self.room_list = QtWidgets.QListWidget()
+        conn = get_conn()
+        cur = conn.cursor()
+        cur.execute(QUERIES["patient_names"].sql)
+        for r in cur.fetchall():
+            it = QtWidgets.QListWidgetItem(f"{r['room_number']} - {r['name']} {r['surname']}")
+            it.setData(Qt.UserRole, r["room_number"])
+            it.setCheckState(Qt.Unchecked)
+            self.room_list.addItem(it)
+        conn.close()
+        apply_l.addWidget(self.room_list, 1)
+        apply_side = QVBoxLayout()
+        self.start_date = QDateEdit()
+        self.start_date.setCalendarPopup(True)
+        self.start_date.setDisplayFormat("dd/MM/yyyy")
+        self.start_date.setDate(QtCore.QDate.currentDate())
+        apply_btn = QPushButton("Seçili Odalara Uygula")
+        apply_btn.clicked.connect(self.apply_plan)
+        apply_side.addWidget(QLabel("Başlangıç:"))
+        apply_side.addWidget(self.start_date)
+        apply_side.addWidget(apply_btn)
+        apply_side.addStretch()
+        apply_l.addLayout(apply_side)
+        layout.addWidget(apply_box)
+        self.reload_plans()
+
+    def reload_plans(self, select_id=None):
+        self.plan_combo.blockSignals(True)
+        self.plan_combo.clear()
+        for r in load_care_plans():
+            self.plan_combo.addItem(r["name"], r["id"])
+        idx = self.plan_combo.findData(select_id)
+        self.plan_combo.setCurrentIndex(idx if idx >= 0 else 0)
+        self.plan_combo.blockSignals(False)
+        self.load_plan()
+
+    def load_plan(self):
+        self.plan_id = self.plan_combo.currentData()
+        self.name_edit.setText(self.plan_combo.currentText() if self.plan_id else "")
+        self.items_table.setRowCount(0)
+        for item in load_care_plan_items(self.plan_id) if self.plan_id else []:
+            self.add_item_row(item)
+
+    def new_plan(self):
+        self.plan_combo.blockSignals(True)
+        self.plan_combo.setCurrentIndex(-1)
+        self.plan_combo.blockSignals(False)
+        self.plan_id = None
+        self.name_edit.clear()
+        self.items_table.setRowCount(0)
+        self.add_item_row()
+
+    def add_item_row(self, item=None):
+        item = item or {}
+        row = self.items_table.rowCount()
+        self.items_table.insertRow(row)
+        task_item = QTableWidgetItem(item.get("task", ""))
+        task_item.setData(Qt.UserRole, item.get("id"))
+        self.items_table.setItem(row, 0, task_item)
+        self.items_table.setItem(row, 1, QTableWidgetItem(item.get("time") or ""))
+        time_type = QComboBox()
+        time_type.addItems(TIME_TYPES)
+        time_type.setCurrentText(item.get("time_type") or TIME_TYPES[0])
+        self.items_table.setCellWidget(row, 2, time_type)
+        repeat = QComboBox()
+        repeat.addItems(REPEAT_TYPES)
+        repeat.setCurrentText(item.get("repeat_type") or "Her Gün")
+        self.items_table.setCellWidget(row, 3, repeat)
+        days = [int(x) for x in (item.get("repeat_days") or "").split(",") if x.strip().isdigit()]
+        self.items_table.setItem(row, 4, QTableWidgetItem(",".join(WEEKDAY_NAMES[d] for d in days if d < 7)))
+        self.items_table.setItem(row, 5, QTableWidgetItem(str(item.get("repeat_interval") or "")))
+
+    def remove_item_rows(self):
+        for row in sorted({idx.row() for idx in self.items_table.selectedIndexes()}, reverse=True):
+            self.items_table.removeRow(row)
+
+    def collect_items(self):
+        items = []
+        for row in range(self.items_table.rowCount()):
+            text = lambda col: (self.items_table.item(row, col).text().strip() if self.items_table.item(row, col) else "")
+            if not text(0):
+                raise ValueError(f"Satır {row + 1}: Görev zorunlu.")
+            fields = {"time": text(1), "time_type": self.items_table.cellWidget(row, 2).currentText(),
+                      "repeat_type": self.items_table.cellWidget(row, 3).currentText(),
+                      "repeat_days": text(4), "repeat_interval": text(5)}
+            try:
+                time_str, time_type, repeat_type, repeat_days, repeat_interval = normalize_schedule_fields(fields)
+            except ValueError as e:
+                raise ValueError(f"Satır {row + 1}: {e}")
+            items.append({"id": self.items_table.item(row, 0).data(Qt.UserRole), "task": text(0), "time": time_str,
+                          "time_type": time_type, "repeat_type": repeat_type, "repeat_days": repeat_days,
+                          "repeat_interval": repeat_interval})
+        return items
+
+    def save(self):
+        name = self.name_edit.text().strip()
+        if not name:
+            QMessageBox.warning(self, "Hata", "Plan adı zorunlu.")
+            return
+        try:
+            items = self.collect_items()
+        except ValueError as e:
+            QMessageBox.warning(self, "Hata", str(e))
+            return
+        try:
+            plan_id, changed = save_care_plan(self.plan_id, name, items, self.propagate_check.isChecked())
+        except Exception as e:
+            QMessageBox.critical(self, "DB Hata", str(e))
+            return
+        event_bus.publish(*[TaskChanged(task_id) for task_id in changed])
+        self.reload_plans(plan_id)
+
+    def delete_plan(self):
+        if not self.plan_id:
+            return
+        if QMessageBox.question(self, "Onay", "Plan silinsin mi? (Oluşturulmuş görevler silinmez)") != QMessageBox.Yes:
+            return
+        try:
+            delete_care_plan(self.plan_id)
+        except Exception as e:
+            QMessageBox.critical(self, "DB Hata", str(e))
+            return
+        self.reload_plans()
+
+    def apply_plan(self):
+        if not self.plan_id:
+            QMessageBox.warning(self, "Hata", "Önce planı kaydedin.")
+            return
+        rooms = [self.room_list.item(i).data(Qt.UserRole) for i in range(self.room_list.count())
+                 if self.room_list.item(i).checkState() == Qt.Checked]
+        if not rooms:
+            QMessageBox.warning(self, "Hata", "En az bir oda seçin.")
+            return
+        try:
+            new_ids = apply_care_plan(self.plan_id, rooms, self.start_date.date().toString("yyyy-MM-dd"))
+        except Exception as e:
+            QMessageBox.critical(self, "DB Hata", str(e))
+            return
+        event_bus.publish(*[TaskChanged(task_id) for task_id in new_ids])
+        QMessageBox.information(self, "Bakım Planı", f"{len(rooms)} odaya {len(new_ids)} görev eklendi.")
+
 class TaskListDialog(QDialog):
     def __init__(self, parent=None, tasks=None, title="Görevler"):
         super().__init__(parent)
@@ -833,7 +2422,18 @@ class TaskListDialog(QDialog):
 class PatientTaskApp(QMainWindow):
     def __init__(self):
         super().__init__()
-        self.settings = load_settings()
+        self.settings = SettingsStore(self)
+        self.refresh_scheduler = RefreshScheduler([
+            ("font", lambda: self.apply_font_size(self.settings.get("font_size", 14))),
+            ("patients", self.reload_patients),
+            ("tasks", self.reload_tasks),
+            ("archive", self.reload_archive),
+            ("archive_rows", self.apply_archived_rows),
+            ("calendar", self.reload_calendar_tasks),
+            ("sections", self.update_task_sections),
+            ("selected_patient", self.update_selected_patient),
+        ], self)
+        self.timers = TimerScheduler(self)
         self.setWindowTitle("Galatasaraylılar Yurdu Huzur Evi - Hasta Görev Yönetim Sistemi")
         self.showMaximized()
 
@@ -873,6 +2473,7 @@ class PatientTaskApp(QMainWindow):
         self.build_task_mgmt_tab()
         self.build_calendar_tab()
         self.build_archive_tab()
+        self.build_reports_tab()
         self.build_yurt_info_tab()
         self.build_developer_tab()
         self.build_settings_tab()
@@ -882,31 +2483,360 @@ class PatientTaskApp(QMainWindow):
 
         self.tasks_cache = []
         self.last_cache_date = None
-
-        self.clock_timer = QTimer(self)
-        self.clock_timer.timeout.connect(self.update_clock)
-        self.clock_timer.start(1000)
-        self.flash_timer = QTimer(self)
-        self.flash_timer.timeout.connect(self.update_flashing)
-        self.flash_timer.start(1000)
-        self.refresh_timer = QTimer(self)
-        self.refresh_timer.timeout.connect(self.refresh_all)
-        self.refresh_timer.start(60*1000)
-        self.notify_timer = QTimer(self)
-        self.notify_timer.timeout.connect(self.check_notifications)
-        self.notify_timer.start(30*1000)
+        self.tasks_by_id = {}
+        self.archived_pending = {"patient": set(), "task": set()}
+        self.calendar_cache = {}
+        self.calendar_cache_generation = 0
+        self.calendar_workers = []
+
+        # Veri değişikliklerinde yalnızca etkilenen satırlar güncellenir (abonelik sırası önemli:
+        # görev önbelleği ilk olarak güncellenir)
+        self.event_subscriptions = [
+            (TaskChanged, self.on_task_changed_tasks_view),
+            (TaskChanged, self.on_task_changed_patient_view),
+            (TaskChanged, self.on_task_changed_sections),
+            (TaskChanged, self.on_task_changed_calendar),
+            (CompletionRecorded, self.on_completion_recorded_sections),
+            (CompletionRecorded, self.on_completion_recorded_calendar),
+            (PatientChanged, self.on_patient_changed_tasks_view),
+            (PatientChanged, self.on_patient_changed_patient_view),
+            (PatientChanged, self.on_patient_changed_sections),
+            (PatientChanged, self.on_patient_changed_calendar),
+            (Archived, self.on_archived_archive_view),
+        ]
+        for event_type, handler in self.event_subscriptions:
+            event_bus.subscribe(event_type, handler)
+
+        # Periyodik işlerin hepsi tek zamanlayıcıdan, duvar saatine hizalı çalışır; gizli pencerede saat,
+        # yanıp sönme ve tablo yenilemesi durur, vakti gelen görev yoksa yanıp sönme de durur
         self.flash_state = False
-
+        self.clock_text = None
+        self.refresh_missed = False
+        self.timers.add("clock", CLOCK_INTERVAL_MS, self.update_clock, active=False)
+        self.timers.add("flash", FLASH_INTERVAL_MS, self.update_flashing, active=False)
+        self.timers.add("refresh", AUTO_REFRESH_INTERVAL_MS, self.periodic_refresh)
+        self.timers.add("notify", NOTIFY_INTERVAL_MS, self.check_notifications)
+        self.history_worker = None
+        self.timers.add("history", HISTORY_MOVE_INTERVAL_MS, self.move_completion_history)
+        QTimer.singleShot(30 * 1000, self.move_completion_history)
+        self.expired_worker = None
+        self.timers.add("expired", EXPIRED_ARCHIVE_INTERVAL_MS, self.archive_expired)
+        QTimer.singleShot(45 * 1000, self.archive_expired)
+        self.backup_worker = None
+        self.timers.add("backup", BACKUP_CHECK_INTERVAL_MS, self.backup_if_due)
+        QTimer.singleShot(60 * 1000, self.backup_if_due)
+        self.idle_tracker = IdleTracker(self)
+        self.idle_tracker.resumed.connect(self.stop_maintenance)
+        self.maintenance_worker = None
+        self.timers.add("maintenance", MAINTENANCE_CHECK_INTERVAL_MS, self.maintenance_if_idle)
+        QApplication.instance().aboutToQuit.connect(lambda: self.stop_maintenance(wait=True))
+        self.watch_settings()
+        self.exclusive_pending = None  # (ad, başlatıcı): diğer işler bitince çalışacak bakım ya da geri yükleme
+        self.exclusive_active = None
+        self.sync_worker = None
+        self.sync_restart_pending = False
+        self.restart_sync()
+        QApplication.instance().aboutToQuit.connect(lambda: self.stop_sync(wait=True))
+        self.api_worker = None
+        self.restart_api()
+        QApplication.instance().aboutToQuit.connect(self.stop_api)
+        self.timers.add("perf", PERF_PANEL_INTERVAL_MS, self.update_perf_panel, active=False)
+        self.on_perf_toggled(self.settings.get("perf_enabled", False))
+        # Olay döngüsü her saat tıkında bir nabız verir; nabız eşikten fazla gecikirse izleyici ana yığını kaydeder.
+        # Tık anını eşikten uzun geciktirmeyen kısa takılmalar kaçabilir; karşılığında pencere açıkken ek uyanış yoktur
+        self.stall_watchdog = StallWatchdog(self.settings.get("stall_threshold_ms", 500), STALL_HEARTBEAT_MS)
+        self.timers.add("heartbeat", STALL_HEARTBEAT_MS, self.stall_watchdog.beat, active=False)
+        self.on_stall_threshold_changed(self.settings.get("stall_threshold_ms", 500))
+        self.stall_watchdog.start()
+        QApplication.instance().aboutToQuit.connect(self.stall_watchdog.stop)
+
+        self.update_timer_activity()
         self.refresh_all()
 
     def parse_time(self, time_str):
-        if not time_str:
-            return time(8, 0)
-        try:
-            hh, mm = map(int, time_str.split(":"))
-            return time(hh, mm)
-        except:
-            return time(8, 0)
+        return parse_time(time_str)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_timer_activity()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_timer_activity()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QtCore.QEvent.WindowStateChange:
+            self.update_timer_activity()
+
+    def is_shown(self):
+        return self.isVisible() and not self.isMinimized()
+
+    def update_timer_activity(self):
+        if not hasattr(self, "stall_watchdog"):
+            return  # showMaximized pencere kurulurken de olay üretir
+        shown = self.is_shown()
+        if shown and not self.timers.is_active("clock"):
+            self.update_clock()
+        self.timers.set_active("clock", shown)
+        self.timers.set_active("flash", shown and any(section == "due" for _, section in self.section_groups))
+        # Gizli pencerede takılma izlemesi de durur; nabız saatle birlikte uyanır ve saat de durur
+        if self.stall_watchdog.paused == shown:
+            self.stall_watchdog.set_paused(not shown)
+        self.update_heartbeat()
+        if shown and self.refresh_missed:
+            self.refresh_missed = False
+            self.refresh_all()
+
+    def periodic_refresh(self):
+        if self.is_shown():
+            self.refresh_all()
+        else:
+            self.refresh_missed = True  # pencere yeniden göründüğünde bir kez yenilenir
+
+    # Exclusive database access
+    # Bakım ve geri yükleme dosyaları uzun süre kilitler: önce eşitleme ve API durdurulur, süren arka plan işleri
+    # bitene kadar beklenir, iş sürerken zamanlanmış işler başlamaz; bitince eşitleme ve API yeniden başlatılır.
+    def background_workers(self):
+        return [w for w in (self.sync_worker, self.history_worker, self.expired_worker, self.backup_worker, self.maintenance_worker)
+                if w is not None]
+
+    def background_paused(self):
+        return self.exclusive_pending is not None or self.exclusive_active is not None
+
+    def run_exclusive(self, name, start):
+        """Call start() once every other background writer has stopped; False if another exclusive job is queued or running."""
+        if self.background_paused():
+            return False
+        self.exclusive_pending = (name, start)
+        self.stop_sync()
+        self.stop_api()
+        self.check_exclusive()
+        return True
+
+    def check_exclusive(self):
+        if self.exclusive_pending is None or self.background_workers():
+            return
+        (name, start), self.exclusive_pending = self.exclusive_pending, None
+        self.exclusive_active = name
+        start()
+
+    def cancel_exclusive(self, name):
+        if self.exclusive_pending is not None and self.exclusive_pending[0] == name:
+            self.exclusive_pending = None
+            self.resume_background()
+
+    def resume_background(self):
+        self.exclusive_active = None
+        self.restart_sync()
+        self.restart_api()
+
+    def move_completion_history(self):
+        if self.history_worker is not None or self.background_paused():
+            return
+        self.history_worker = CompletionHistoryWorker(self.settings.get("completion_history_days", 180), self)
+        self.history_worker.finished.connect(self.on_completion_history_finished)
+        self.history_worker.start()
+
+    def on_completion_history_finished(self):
+        self.history_worker.deleteLater()
+        self.history_worker = None
+        self.check_exclusive()
+
+    def archive_expired(self):
+        days = self.settings.get("task_retention_days", 30)
+        if not days or self.expired_worker is not None or self.background_paused():
+            return
+        self.expired_worker = ExpiredTaskWorker(days, self)
+        self.expired_worker.archived.connect(self.on_expired_archived)
+        self.expired_worker.finished.connect(self.on_expired_worker_finished)
+        self.expired_worker.start()
+
+    def on_expired_archived(self, n):
+        if n:
+            self.invalidate_calendar_cache()
+            self.refresh_all()
+
+    def on_expired_worker_finished(self):
+        self.expired_worker.deleteLater()
+        self.expired_worker = None
+        self.check_exclusive()
+
+    def maintenance_if_idle(self):
+        minutes = self.settings.get("maintenance_idle_minutes", 30)
+        if not minutes or self.idle_tracker.idle_seconds() < minutes * 60:
+            return
+        now = datetime.now()
+        if parse_time(self.settings.get("day_start", "08:00")) <= now.time() < parse_time(self.settings.get("day_end", "20:00")):
+            return
+        if any(section == "due" for _, (_, section) in self.section_rows.values()):
+            return
+        last = last_maintenance()
+        if last and now - last[0]["started"] < timedelta(hours=MAINTENANCE_INTERVAL_HOURS):
+            return
+        self.start_maintenance()
+
+    def start_maintenance(self):
+        # VACUUM yazma kilidini diğer işlerin 5 sn'lik bekleme süresinden uzun tutabilir; bakım tek başına çalışır
+        if self.run_exclusive("maintenance", self.launch_maintenance):
+            self.maintenance_btn.setEnabled(False)
+            self.maintenance_status.setText("Arka plan işlerinin bitmesi bekleniyor...")
+
+    def launch_maintenance(self):
+        self.maintenance_worker = MaintenanceWorker(self)
+        self.maintenance_worker.done.connect(self.on_maintenance_done)
+        self.maintenance_worker.finished.connect(self.on_maintenance_worker_finished)
+        self.maintenance_status.setText("Bakım yapılıyor...")
+        self.maintenance_worker.start()
+
+    def stop_maintenance(self, wait=False):
+        if self.exclusive_pending is not None and self.exclusive_pending[0] == "maintenance":
+            self.cancel_exclusive("maintenance")
+            self.maintenance_btn.setEnabled(True)
+            self.maintenance_status.setText(format_maintenance(last_maintenance()))
+        if self.maintenance_worker is not None:
+            self.maintenance_worker.stop()
+            if wait:
+                self.maintenance_worker.wait()
+
+    def on_maintenance_done(self, reports):
+        text = format_maintenance(reports) if reports else "Bakım yarıda kesildi."
+        self.maintenance_status.setText(text)
+
+    def on_maintenance_worker_finished(self):
+        self.maintenance_worker.deleteLater()
+        self.maintenance_worker = None
+        self.maintenance_btn.setEnabled(True)
+        self.resume_background()
+
+    def restart_sync(self):
+        if self.background_paused():
+            return  # resume_background() yeniden başlatır
+        if self.sync_worker is not None:
+            # Eski işçi arka planda kapanır; bitince ayarların o anki hâliyle yeniden başlatılır (aynı port)
+            self.sync_restart_pending = True
+            self.sync_worker.stop()
+            return
+        peers = [u.strip() for u in self.settings.get("sync_peers", "").split(",") if u.strip()]
+        if not self.settings.get("sync_enabled", False):
+            conn = get_conn()
+            try:
+                gs_sync.enable_change_log(conn, False)  # kapalıyken değişiklikler günlüğe yazılmaz
+            finally:
+                conn.close()
+            return
+        self.sync_worker = SyncWorker(self.settings.get("sync_port", 8765), peers, self.settings.get("sync_bind", "127.0.0.1"),
+                                      self.settings.get("sync_token", ""), self)
+        self.sync_worker.applied.connect(self.on_sync_applied)
+        self.sync_worker.finished.connect(self.on_sync_worker_finished)
+        self.sync_worker.start()
+
+    def stop_sync(self, wait=False):
+        self.sync_restart_pending = False
+        if self.sync_worker is not None:
+            self.sync_worker.stop()
+            if wait:
+                self.sync_worker.wait()
+
+    def on_sync_worker_finished(self):
+        self.sync_worker.deleteLater()
+        self.sync_worker = None
+        if self.sync_restart_pending:
+            self.sync_restart_pending = False
+            self.restart_sync()
+        self.check_exclusive()
+
+    def restart_api(self):
+        self.stop_api()
+        if self.background_paused():
+            return
+        if not self.settings.get("api_enabled", False):
+            return
+        self.api_worker = ApiWorker(self.settings.get("api_port", gs_api.API_PORT), self.settings.get("api_bind", "127.0.0.1"),
+                                    self.settings.get("api_token", ""), self)
+        self.api_worker.start()
+
+    def stop_api(self):
+        if self.api_worker is not None:
+            self.api_worker.stop()
+            self.api_worker.deleteLater()
+            self.api_worker = None
+
+    def on_sync_applied(self, n):
+        # Başka istasyondan gelen değişiklikler tüm görünümlere bir kez yansıtılır
+        self.invalidate_calendar_cache()
+        self.refresh_all()
+
+    def backup_if_due(self):
+        snapshots = list_snapshots()
+        if snapshots:
+            try:
+                last = datetime.strptime(snapshots[0][:15], "%Y%m%d_%H%M%S")
+            except ValueError:
+                last = datetime.min
+            if datetime.now() - last < timedelta(hours=self.settings.get("backup_interval_hours", 24)):
+                return
+        self.start_backup()
+
+    def start_backup(self, restore_name=None):
+        if restore_name:
+            # Geri yükleme canlı dosyaların üzerine yazar; senkron, API ve diğer işler durduktan sonra başlar
+            if self.run_exclusive("restore", partial(self.launch_backup, restore_name)):
+                self.backup_now_btn.setEnabled(False)
+                self.restore_btn.setEnabled(False)
+                if self.exclusive_active != "restore":
+                    self.backup_status.setText("Arka plan işlerinin bitmesi bekleniyor...")
+            return
+        if self.backup_worker is not None or self.background_paused():
+            return
+        self.launch_backup()
+
+    def launch_backup(self, restore_name=None):
+        self.backup_worker = BackupWorker(self.settings.get("backup_keep", 7), restore_name, self)
+        self.backup_worker.progress.connect(self.on_backup_progress)
+        self.backup_worker.done.connect(self.on_backup_done)
+        self.backup_worker.finished.connect(self.on_backup_worker_finished)
+        self.backup_now_btn.setEnabled(False)
+        self.restore_btn.setEnabled(False)
+        self.backup_worker.start()
+
+    def restore_selected_backup(self):
+        name = self.backup_combo.currentText()
+        if not name:
+            return
+        if QMessageBox.question(self, "Onay", f"{name} yedeği geri yüklensin mi? Mevcut veriler bu yedekle değiştirilecek.") != QMessageBox.Yes:
+            return
+        self.start_backup(restore_name=name)
+
+    def on_backup_progress(self, n, total):
+        self.backup_progress.setMaximum(max(total, 1))
+        self.backup_progress.setValue(n)
+
+    def on_backup_done(self, ok, message):
+        self.backup_status.setText(message)
+        if not ok:
+            QMessageBox.warning(self, "Yedekleme Hatası", message)
+        elif self.backup_worker.restore_name:
+            self.invalidate_calendar_cache()
+            self.refresh_all()
+
+    def on_backup_worker_finished(self):
+        restored = self.backup_worker.restore_name
+        self.backup_worker.deleteLater()
+        self.backup_worker = None
+        self.fill_backup_list()
+        if restored:
+            self.resume_background()
+        elif self.exclusive_pending is not None and self.exclusive_pending[0] == "restore":
+            self.check_exclusive()  # bekleyen geri yükleme başlar, düğmeler kapalı kalır
+            return
+        self.backup_now_btn.setEnabled(True)
+        self.restore_btn.setEnabled(True)
+        self.check_exclusive()
+
+    def fill_backup_list(self):
+        self.backup_combo.clear()
+        self.backup_combo.addItems(list_snapshots())
 
     def build_tasks_tab(self):
         w = QWidget()
@@ -932,6 +2862,26 @@ class PatientTaskApp(QMainWindow):
         stats.addStretch()
         layout.addLayout(stats)
 
+        # Toplu işlemler: bölümlerde işaretlenen görevler tek seferde güncellenir
+        bulk = QHBoxLayout()
+        bulk.addWidget(QLabel("Seçilenler:"))
+        bulk_done = QPushButton("✅ Yapıldı")
+        bulk_done.clicked.connect(lambda: self.mark_done_tasks(self.selected_section_task_ids()))
+        bulk.addWidget(bulk_done)
+        bulk_notdone = QPushButton("❌ Yapılmadı")
+        bulk_notdone.clicked.connect(lambda: self.mark_notdone_tasks(self.selected_section_task_ids()))
+        bulk.addWidget(bulk_notdone)
+        bulk_cancel = QPushButton("🚫 İptal")
+        bulk_cancel.clicked.connect(lambda: self.mark_cancelled_tasks(self.selected_section_task_ids()))
+        bulk.addWidget(bulk_cancel)
+        bulk.addStretch()
+        layout.addLayout(bulk)
+        self.section_checks = {}
+        self.section_rows = {}
+        self.section_groups = {}
+        self.section_completed = set()
+        self.section_date = date.today()
+
         self.tasks_subtab = QTabWidget()
         # Daytime tab
         self.day_widget = QWidget()
@@ -943,7 +2893,7 @@ class PatientTaskApp(QMainWindow):
         self.day_v.setAlignment(Qt.AlignCenter)
         self.day_scroll.setWidget(self.day_container)
         day_layout.addWidget(self.day_scroll)
-        self.tasks_subtab.addTab(self.day_widget, "Gündüz Vardiyası (08:00-20:00)")
+        self.tasks_subtab.addTab(self.day_widget, "")
 
         # Night tab
         self.night_widget = QWidget()
@@ -955,7 +2905,8 @@ class PatientTaskApp(QMainWindow):
         self.night_v.setAlignment(Qt.AlignCenter)
         self.night_scroll.setWidget(self.night_container)
         night_layout.addWidget(self.night_scroll)
-        self.tasks_subtab.addTab(self.night_widget, "Akşam Gece Vardiyası (20:00-08:00)")
+        self.tasks_subtab.addTab(self.night_widget, "")
+        self.update_shift_titles()
 
         layout.addWidget(self.tasks_subtab)
         self.tabs.addTab(w, "Görevler")
@@ -965,7 +2916,7 @@ class PatientTaskApp(QMainWindow):
         l = QVBoxLayout(w)
         top = QHBoxLayout()
         self.patient_selector = QComboBox()
-        self.patient_selector.currentIndexChanged.connect(self.update_selected_patient)
+        self.patient_selector.currentIndexChanged.connect(lambda _: self.update_selected_patient())
         top.addWidget(QLabel("Hasta Seç:"))
         top.addWidget(self.patient_selector)
         add_patient_btn = QPushButton("Yeni Hasta Ekle")
@@ -977,6 +2928,12 @@ class PatientTaskApp(QMainWindow):
         delete_patient_btn = QPushButton("Hastayı Sil")
         delete_patient_btn.clicked.connect(self.delete_selected_patient)
         top.addWidget(delete_patient_btn)
+        import_btn = QPushButton("CSV İçe Aktar")
+        import_menu = QtWidgets.QMenu(import_btn)
+        import_menu.addAction("Hastalar", partial(self.import_from_csv, "patients"))
+        import_menu.addAction("Görevler", partial(self.import_from_csv, "tasks"))
+        import_btn.setMenu(import_menu)
+        top.addWidget(import_btn)
         top.addStretch()
         l.addLayout(top)
         body = QHBoxLayout()
@@ -1006,8 +2963,13 @@ class PatientTaskApp(QMainWindow):
         self.patient_task_table = QTableWidget(0, 8)
         self.patient_task_table.setHorizontalHeaderLabels(["Görev", "Saat", "Durum", "Tekrar", "Zaman Türü", "Düzenle", "Arşivle", "Sil"])
         self.patient_task_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.patient_task_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.patient_task_table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.patient_task_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        body.addWidget(self.patient_task_table)
+        table_box = QVBoxLayout()
+        table_box.addWidget(self.patient_task_table)
+        table_box.addLayout(self.build_bulk_bar(self.patient_task_table))
+        body.addLayout(table_box)
         l.addLayout(body)
         self.tabs.addTab(w, "Hastalar")
 
@@ -1017,10 +2979,40 @@ class PatientTaskApp(QMainWindow):
         self.tasks_table = QTableWidget(0, 9)
         self.tasks_table.setHorizontalHeaderLabels(["Hasta", "Görev", "Saat", "Durum", "Tekrar", "Zaman Türü", "Düzenle", "Sil", "Arşivle"])
         self.tasks_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.tasks_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.tasks_table.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.tasks_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         l.addWidget(self.tasks_table)
+        bulk_bar = self.build_bulk_bar(self.tasks_table)
+        care_plan_btn = QPushButton("Bakım Planları")
+        care_plan_btn.clicked.connect(lambda: CarePlanDialog(self).exec_())
+        bulk_bar.addWidget(care_plan_btn)
+        l.addLayout(bulk_bar)
         self.tabs.addTab(w, "Görev Yönetimi")
 
+    def build_bulk_bar(self, table):
+        bar = QHBoxLayout()
+        bar.addWidget(QLabel("Seçili satırlar:"))
+        for text, action in (("✅ Yapıldı", self.mark_done_tasks), ("🚫 İptal", self.mark_cancelled_tasks),
+                             ("Arşivle", self.archive_tasks_bulk), ("Sil", self.delete_tasks)):
+            btn = QPushButton(text)
+            btn.clicked.connect(lambda _=False, a=action: a(self.selected_table_task_ids(table)))
+            bar.addWidget(btn)
+        bar.addStretch()
+        return bar
+
+    def selected_table_task_ids(self, table):
+        rows = sorted({idx.row() for idx in table.selectionModel().selectedRows()})
+        ids = []
+        for row in rows:
+            it = table.item(row, 0)
+            if it and it.data(Qt.UserRole) is not None:
+                ids.append(it.data(Qt.UserRole))
+        return ids
+
+    def selected_section_task_ids(self):
+        return [tid for tid, cb in self.section_checks.items() if cb.isChecked()]
+
     def build_calendar_tab(self):
         w = QWidget()
         l = QVBoxLayout(w)
@@ -1053,6 +3045,151 @@ class PatientTaskApp(QMainWindow):
         l.addWidget(self.archive_tasks)
         self.tabs.addTab(w, "Arşiv")
 
+    def build_reports_tab(self):
+        w = QWidget()
+        l = QVBoxLayout(w)
+        form = QHBoxLayout()
+        self.report_start = QDateEdit()
+        self.report_start.setCalendarPopup(True)
+        self.report_start.setDisplayFormat("dd/MM/yyyy")
+        self.report_start.setDate(QtCore.QDate.currentDate().addDays(-30))
+        self.report_end = QDateEdit()
+        self.report_end.setCalendarPopup(True)
+        self.report_end.setDisplayFormat("dd/MM/yyyy")
+        self.report_end.setDate(QtCore.QDate.currentDate())
+        self.report_group = QComboBox()
+        self.report_group.addItem("Hasta", "patient")
+        self.report_group.addItem("Görev", "task")
+        self.report_group.addItem("Vardiya", "shift")
+        self.report_room = QComboBox()
+        self.report_room.addItem("Tümü", None)
+        run_btn = QPushButton("Hesapla")
+        run_btn.clicked.connect(self.run_compliance_report)
+        form.addWidget(QLabel("Başlangıç:"))
+        form.addWidget(self.report_start)
+        form.addWidget(QLabel("Bitiş:"))
+        form.addWidget(self.report_end)
+        form.addWidget(QLabel("Gruplama:"))
+        form.addWidget(self.report_group)
+        form.addWidget(QLabel("Hasta:"))
+        form.addWidget(self.report_room)
+        form.addWidget(run_btn)
+        form.addStretch()
+        l.addLayout(form)
+        self.report_table = QTableWidget(0, 0)
+        self.report_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.report_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        l.addWidget(self.report_table)
+        self.report_status = QLabel("")
+        l.addWidget(self.report_status)
+        export_box = QGroupBox("Dışa Aktar")
+        export_l = QHBoxLayout(export_box)
+        self.export_source = QComboBox()
+        for key, (title, _, _) in EXPORT_SOURCES.items():
+            self.export_source.addItem(title, key)
+        self.export_format = QComboBox()
+        for key, label in EXPORT_FORMATS:
+            self.export_format.addItem(label, key)
+        self.export_btn = QPushButton("Dışa Aktar")
+        self.export_btn.clicked.connect(self.start_export)
+        self.export_progress = QProgressBar()
+        self.export_progress.setValue(0)
+        self.export_cancel_btn = QPushButton("İptal")
+        self.export_cancel_btn.setEnabled(False)
+        self.export_cancel_btn.clicked.connect(self.cancel_export)
+        export_l.addWidget(self.export_source)
+        export_l.addWidget(self.export_format)
+        export_l.addWidget(self.export_btn)
+        export_l.addWidget(self.export_progress, 1)
+        export_l.addWidget(self.export_cancel_btn)
+        l.addWidget(export_box)
+        self.export_worker = None
+        self.tabs.addTab(w, "Raporlar")
+
+    def fill_report_rooms(self):
+        current = self.report_room.currentData()
+        conn = get_conn()
+        cur = conn.cursor()
+        cur.execute(QUERIES["patient_names"].sql)
+        rows = cur.fetchall()
+        conn.close()
+        self.report_room.blockSignals(True)
+        self.report_room.clear()
+        self.report_room.addItem("Tümü", None)
+        for r in rows:
+            self.report_room.addItem(f"{r['room_number']} - {r['name']} {r['surname']}", r["room_number"])
+        idx = self.report_room.findData(current)
+        self.report_room.setCurrentIndex(idx if idx >= 0 else 0)
+        self.report_room.blockSignals(False)
+
+    def run_compliance_report(self):
+        group_by = self.report_group.currentData()
+        started = datetime.now()
+        rows = compliance_report(
+            self.report_start.date().toPyDate(), self.report_end.date().toPyDate(),
+            group_by, self.report_room.currentData(), self.settings
+        )
+        elapsed = (datetime.now() - started).total_seconds()
+        shift_names = {"day": "Gündüz", "night": "Akşam/Gece"}
+        if group_by == "patient":
+            headers = ["Hasta"]
+            keys = lambda r: [f"{r['room_number']} - {r['name'] or ''} {r['surname'] or ''}"]
+        elif group_by == "task":
+            headers = ["Hasta", "Görev", "Vardiya"]
+            keys = lambda r: [f"{r['room_number']} - {r['name'] or ''} {r['surname'] or ''}", r["task"], shift_names.get(r["shift"], r["shift"])]
+        else:
+            headers = ["Vardiya"]
+            keys = lambda r: [shift_names.get(r["shift"], r["shift"])]
+        headers += ["Beklenen", "Yapılan", "Kaçırılan", "Oran (%)"]
+        self.report_table.setColumnCount(len(headers))
+        self.report_table.setHorizontalHeaderLabels(headers)
+        self.report_table.setRowCount(len(rows))
+        for row, r in enumerate(rows):
+            values = keys(r) + [str(r["expected"]), str(r["completed"]), str(r["missed"]), f"{r['rate'] * 100:.1f}"]
+            for col, v in enumerate(values):
+                self.report_table.setItem(row, col, QTableWidgetItem(v))
+        self.report_status.setText(f"{len(rows)} satır, {elapsed:.2f} sn")
+
+    def start_export(self):
+        if self.export_worker is not None:
+            return
+        source = self.export_source.currentData()
+        fmt = self.export_format.currentData()
+        default_name = f"{source}_{date.today().isoformat()}.{fmt}"
+        path, _ = QFileDialog.getSaveFileName(self, "Dışa Aktar", default_name, self.export_format.currentText())
+        if not path:
+            return
+        if not path.lower().endswith("." + fmt):
+            path += "." + fmt
+        self.export_worker = ExportWorker(source, fmt, path, self)
+        self.export_worker.progress.connect(self.on_export_progress)
+        self.export_worker.done.connect(self.on_export_done)
+        self.export_worker.finished.connect(self.on_export_worker_finished)
+        self.export_btn.setEnabled(False)
+        self.export_cancel_btn.setEnabled(True)
+        self.export_progress.setValue(0)
+        self.export_worker.start()
+
+    def cancel_export(self):
+        if self.export_worker is not None:
+            self.export_worker.requestInterruption()
+            self.export_cancel_btn.setEnabled(False)
+
+    def on_export_progress(self, n, total):
+        self.export_progress.setMaximum(max(total, 1))
+        self.export_progress.setValue(n)
+
+    def on_export_done(self, ok, message):
+        self.report_status.setText(message)
+        if not ok and "iptal" not in message:
+            QMessageBox.warning(self, "Hata", message)
+
+    def on_export_worker_finished(self):
+        self.export_worker.deleteLater()
+        self.export_worker = None
+        self.export_btn.setEnabled(True)
+        self.export_cancel_btn.setEnabled(False)
+
     def build_yurt_info_tab(self):
         w = QWidget()
         l = QVBoxLayout(w)
@@ -1231,8 +3368,110 @@ class PatientTaskApp(QMainWindow):
 
         l.addStretch()
         l.addWidget(card)
+        l.addWidget(self.build_perf_panel())
+        l.addWidget(self.build_stall_panel())
         l.addStretch()
         self.tabs.addTab(w, "Geliştirici")
+        self.developer_tab = w
+        self.tabs.currentChanged.connect(lambda i: self.tabs.widget(i) is self.developer_tab and self.update_stall_panel())
+
+    def build_perf_panel(self):
+        gb = QGroupBox("Performans Ölçümü")
+        v = QVBoxLayout(gb)
+        row = QHBoxLayout()
+        self.perf_check = QCheckBox("Ölçümü Aç")
+        self.perf_check.setChecked(self.settings.get("perf_enabled", False))
+        self.perf_check.stateChanged.connect(lambda state: self.settings.set("perf_enabled", bool(state)))
+        reset_btn = QPushButton("Sıfırla")
+        reset_btn.clicked.connect(lambda: (perf.reset(), self.update_perf_panel()))
+        export_btn = QPushButton("JSON Dışa Aktar")
+        export_btn.clicked.connect(self.export_perf_stats)
+        row.addWidget(self.perf_check)
+        row.addStretch()
+        row.addWidget(reset_btn)
+        row.addWidget(export_btn)
+        v.addLayout(row)
+        self.perf_table = QTableWidget(0, 6)
+        self.perf_table.setHorizontalHeaderLabels(["Ölçüm", "Sayı", "p50 ms", "p95 ms", "p99 ms", "En Yüksek ms"])
+        self.perf_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.perf_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.perf_table.setMinimumHeight(220)
+        v.addWidget(self.perf_table)
+        return gb
+
+    def build_stall_panel(self):
+        gb = QGroupBox("Olay Döngüsü Takılmaları")
+        v = QVBoxLayout(gb)
+        row = QHBoxLayout()
+        row.addWidget(QLabel("Eşik (ms, 0 = kapalı):"))
+        self.stall_threshold_spin = QSpinBox()
+        self.stall_threshold_spin.setRange(0, 10000)
+        self.stall_threshold_spin.setSingleStep(100)
+        self.stall_threshold_spin.setValue(self.settings.get("stall_threshold_ms", 500))
+        self.stall_threshold_spin.editingFinished.connect(lambda: self.settings.set("stall_threshold_ms", self.stall_threshold_spin.value()))
+        refresh_btn = QPushButton("Yenile")
+        refresh_btn.clicked.connect(self.update_stall_panel)
+        row.addWidget(self.stall_threshold_spin)
+        row.addStretch()
+        row.addWidget(refresh_btn)
+        v.addLayout(row)
+        self.stall_table = QTableWidget(0, 4)
+        self.stall_table.setHorizontalHeaderLabels(["Çağrı Yeri", "Sayı", "Toplam ms", "En Uzun ms"])
+        self.stall_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.stall_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.stall_table.setMinimumHeight(160)
+        v.addWidget(self.stall_table)
+        v.addWidget(QLabel(f"Yığın kayıtları: {STALL_LOG_PATH}"))
+        return gb
+
+    def on_stall_threshold_changed(self, ms):
+        self.stall_watchdog.threshold = ms / 1000
+        self.stall_watchdog.beat()
+        self.update_heartbeat()
+
+    def update_heartbeat(self):
+        self.timers.set_active("heartbeat", self.stall_watchdog.threshold > 0 and self.is_shown())
+
+    def update_stall_panel(self):
+        rows = self.stall_watchdog.summary()
+        self.stall_table.setRowCount(len(rows))
+        for i, r in enumerate(rows):
+            self.stall_table.setItem(i, 0, QTableWidgetItem(r["site"]))
+            for col, key in enumerate(("count", "total_ms", "max_ms"), 1):
+                item = QTableWidgetItem(str(r[key]))
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.stall_table.setItem(i, col, item)
+
+    def on_perf_toggled(self, enabled):
+        # Kapalıyken ölçüm sarmalayıcıları yalnızca bir bayrak okur, SQL bağlantıları standart sınıftadır
+        perf.enabled = enabled
+        self.timers.set_active("perf", enabled)
+
+    def update_perf_panel(self):
+        if not self.perf_table.isVisible():
+            return
+        rows = perf.summary()
+        self.perf_table.setUpdatesEnabled(False)
+        self.perf_table.setRowCount(len(rows))
+        for i, r in enumerate(rows):
+            self.perf_table.setItem(i, 0, QTableWidgetItem(r["name"]))
+            for col, key in enumerate(("count", "p50", "p95", "p99", "max"), 1):
+                item = QTableWidgetItem(str(r[key]))
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.perf_table.setItem(i, col, item)
+        self.perf_table.setUpdatesEnabled(True)
+
+    def export_perf_stats(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Ölçümleri Kaydet", f"perf_{datetime.now():%Y%m%d_%H%M%S}.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"created": datetime.now().isoformat(timespec="seconds"), "window": perf.window, "stats": perf.summary(),
+                           "stalls": self.stall_watchdog.summary()},
+                          f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            QMessageBox.warning(self, "Hata", f"Dosya yazılamadı: {e}")
 
     def build_settings_tab(self):
         w = QWidget()
@@ -1278,6 +3517,122 @@ class PatientTaskApp(QMainWindow):
         self.notification_duration_spin.valueChanged.connect(self.on_notification_duration_changed)
         l.addRow("Bildirim Süresi (saniye)", self.notification_duration_spin)
 
+        self.history_days_spin = QSpinBox()
+        self.history_days_spin.setRange(7, 3650)
+        self.history_days_spin.setValue(self.settings.get("completion_history_days", 180))
+        self.history_days_spin.valueChanged.connect(self.on_history_days_changed)
+        l.addRow("Tamamlanma Kayıtları Geçmişe Taşıma (gün)", self.history_days_spin)
+
+        self.retention_days_spin = QSpinBox()
+        self.retention_days_spin.setRange(0, 3650)
+        self.retention_days_spin.setValue(self.settings.get("task_retention_days", 30))
+        self.retention_days_spin.valueChanged.connect(self.on_retention_days_changed)
+        l.addRow("Süresi Dolan Görevleri Arşivleme (gün, 0 = kapalı)", self.retention_days_spin)
+
+        self.backup_interval_spin = QSpinBox()
+        self.backup_interval_spin.setRange(1, 168)
+        self.backup_interval_spin.setValue(self.settings.get("backup_interval_hours", 24))
+        self.backup_interval_spin.valueChanged.connect(self.on_backup_interval_changed)
+        l.addRow("Yedekleme Aralığı (saat)", self.backup_interval_spin)
+
+        self.backup_keep_spin = QSpinBox()
+        self.backup_keep_spin.setRange(1, 60)
+        self.backup_keep_spin.setValue(self.settings.get("backup_keep", 7))
+        self.backup_keep_spin.valueChanged.connect(self.on_backup_keep_changed)
+        l.addRow("Saklanacak Yedek Sayısı", self.backup_keep_spin)
+
+        sync_row = QHBoxLayout()
+        self.sync_check = QCheckBox("Etkin")
+        self.sync_check.setChecked(self.settings.get("sync_enabled", False))
+        self.sync_check.stateChanged.connect(lambda state: self.settings.set("sync_enabled", bool(state)))
+        self.sync_port_spin = QSpinBox()
+        self.sync_port_spin.setRange(1024, 65535)
+        self.sync_port_spin.setValue(self.settings.get("sync_port", 8765))
+        self.sync_port_spin.editingFinished.connect(lambda: self.settings.set("sync_port", self.sync_port_spin.value()))
+        self.sync_peers_edit = QLineEdit(self.settings.get("sync_peers", ""))
+        self.sync_peers_edit.setPlaceholderText("http://192.168.1.20:8765, ...")
+        self.sync_peers_edit.editingFinished.connect(lambda: self.settings.set("sync_peers", self.sync_peers_edit.text().strip()))
+        sync_row.addWidget(self.sync_check)
+        sync_row.addWidget(QLabel("Port:"))
+        sync_row.addWidget(self.sync_port_spin)
+        sync_row.addWidget(QLabel("Diğer istasyonlar:"))
+        sync_row.addWidget(self.sync_peers_edit, 1)
+        l.addRow("İstasyonlar Arası Eşitleme", sync_row)
+
+        sync_auth_row = QHBoxLayout()
+        self.sync_bind_edit = QLineEdit(self.settings.get("sync_bind", "127.0.0.1"))
+        self.sync_bind_edit.setPlaceholderText("192.168.1.10")
+        self.sync_bind_edit.editingFinished.connect(lambda: self.settings.set("sync_bind", self.sync_bind_edit.text().strip()))
+        self.sync_token_edit = QLineEdit(self.settings.get("sync_token", ""))
+        self.sync_token_edit.setEchoMode(QLineEdit.Password)
+        self.sync_token_edit.setPlaceholderText("tüm istasyonlarda aynı")
+        self.sync_token_edit.editingFinished.connect(lambda: self.settings.set("sync_token", self.sync_token_edit.text().strip()))
+        sync_auth_row.addWidget(QLabel("Dinleme adresi:"))
+        sync_auth_row.addWidget(self.sync_bind_edit)
+        sync_auth_row.addWidget(QLabel("Ortak anahtar:"))
+        sync_auth_row.addWidget(self.sync_token_edit, 1)
+        l.addRow("Eşitleme Erişimi", sync_auth_row)
+
+        api_row = QHBoxLayout()
+        self.api_check = QCheckBox("Etkin")
+        self.api_check.setChecked(self.settings.get("api_enabled", False))
+        self.api_check.stateChanged.connect(lambda state: self.settings.set("api_enabled", bool(state)))
+        self.api_port_spin = QSpinBox()
+        self.api_port_spin.setRange(1024, 65535)
+        self.api_port_spin.setValue(self.settings.get("api_port", gs_api.API_PORT))
+        self.api_port_spin.editingFinished.connect(lambda: self.settings.set("api_port", self.api_port_spin.value()))
+        api_row.addWidget(self.api_check)
+        api_row.addWidget(QLabel("Port:"))
+        api_row.addWidget(self.api_port_spin)
+        api_row.addWidget(QLabel("/patients, /tasks/due?shift=day, /calendar/YYYY-AA-GG"), 1)
+        l.addRow("Tablet API (salt okunur)", api_row)
+
+        api_auth_row = QHBoxLayout()
+        self.api_bind_edit = QLineEdit(self.settings.get("api_bind", "127.0.0.1"))
+        self.api_bind_edit.setPlaceholderText("192.168.1.10")
+        self.api_bind_edit.editingFinished.connect(lambda: self.settings.set("api_bind", self.api_bind_edit.text().strip()))
+        self.api_token_edit = QLineEdit(self.settings.get("api_token", ""))
+        self.api_token_edit.setEchoMode(QLineEdit.Password)
+        self.api_token_edit.setPlaceholderText("tabletlerde aynı")
+        self.api_token_edit.editingFinished.connect(lambda: self.settings.set("api_token", self.api_token_edit.text().strip()))
+        api_auth_row.addWidget(QLabel("Dinleme adresi:"))
+        api_auth_row.addWidget(self.api_bind_edit)
+        api_auth_row.addWidget(QLabel("Ortak anahtar:"))
+        api_auth_row.addWidget(self.api_token_edit, 1)
+        l.addRow("Tablet API Erişimi", api_auth_row)
+
+        backup_row = QHBoxLayout()
+        self.backup_combo = QComboBox()
+        self.backup_now_btn = QPushButton("Şimdi Yedekle")
+        self.backup_now_btn.clicked.connect(lambda: self.start_backup())
+        self.restore_btn = QPushButton("Geri Yükle")
+        self.restore_btn.clicked.connect(self.restore_selected_backup)
+        self.backup_progress = QProgressBar()
+        self.backup_progress.setValue(0)
+        backup_row.addWidget(self.backup_combo, 1)
+        backup_row.addWidget(self.backup_now_btn)
+        backup_row.addWidget(self.restore_btn)
+        backup_row.addWidget(self.backup_progress, 1)
+        l.addRow("Yedekler", backup_row)
+        self.backup_status = QLabel("")
+        l.addRow(self.backup_status)
+        self.fill_backup_list()
+
+        maintenance_row = QHBoxLayout()
+        self.maintenance_idle_spin = QSpinBox()
+        self.maintenance_idle_spin.setRange(0, 240)
+        self.maintenance_idle_spin.setValue(self.settings.get("maintenance_idle_minutes", 30))
+        self.maintenance_idle_spin.valueChanged.connect(lambda val: self.settings.set("maintenance_idle_minutes", val))
+        self.maintenance_btn = QPushButton("Şimdi Bakım Yap")
+        self.maintenance_btn.clicked.connect(self.start_maintenance)
+        maintenance_row.addWidget(QLabel("Boşta bekleme (dk, 0 = kapalı):"))
+        maintenance_row.addWidget(self.maintenance_idle_spin)
+        maintenance_row.addWidget(self.maintenance_btn)
+        maintenance_row.addStretch()
+        l.addRow("Veritabanı Bakımı", maintenance_row)
+        self.maintenance_status = QLabel(format_maintenance(last_maintenance()))
+        l.addRow(self.maintenance_status)
+
         # Vardiya saatleri
         self.day_start_edit = QTimeEdit()
         self.day_start_edit.setDisplayFormat("HH:mm")
@@ -1309,17 +3664,17 @@ class PatientTaskApp(QMainWindow):
         self.update_theme_preview()
         self.tabs.addTab(w, "Ayarlar")
 
+    def invalidate(self, *views):
+        self.refresh_scheduler.invalidate(*views)
+
     def refresh_all(self):
-        self.reload_patients()
-        self.reload_tasks()
-        self.reload_archive()
-        self.reload_calendar_tasks()
-        self.update_task_sections()
+        self.invalidate("patients", "tasks", "archive", "calendar", "sections")
 
+    @timed()
     def reload_patients(self):
         conn = get_conn()
         cur = conn.cursor()
-        cur.execute("SELECT * FROM patients ORDER BY room_number")
+        cur.execute(QUERIES["patients"].sql)
         rows = cur.fetchall()
         conn.close()
         self.patient_selector.blockSignals(True)
@@ -1330,12 +3685,31 @@ class PatientTaskApp(QMainWindow):
         if rows:
             self.patient_selector.setCurrentIndex(1)
         self.patient_selector.blockSignals(False)
-        self.update_selected_patient()
+        self.fill_report_rooms()
+        self.invalidate("selected_patient")
 
     def add_patient(self):
-        dlg = PatientEditDialog(self)
-        if dlg.exec_() == QDialog.Accepted:
-            self.reload_patients()
+        PatientEditDialog(self).exec_()
+
+    def import_from_csv(self, kind):
+        columns = PATIENT_IMPORT_COLUMNS if kind == "patients" else TASK_IMPORT_COLUMNS
+        path, _ = QFileDialog.getOpenFileName(self, "CSV Seç", "", "CSV (*.csv)")
+        if not path:
+            return
+        try:
+            count, errors = import_csv(path, kind)
+        except Exception as e:
+            QMessageBox.critical(self, "İçe Aktarma Hatası", f"{e}\n\nBeklenen sütunlar: {', '.join(columns)}")
+            return
+        if errors:
+            lines = [f"Satır {line}: {msg}" for line, msg in errors[:20]]
+            if len(errors) > 20:
+                lines.append(f"... ve {len(errors) - 20} hata daha")
+            QMessageBox.warning(self, "İçe Aktarma Hatası", f"{len(errors)} satırda hata var, hiçbir kayıt eklenmedi.\n\n" + "\n".join(lines))
+            return
+        # Binlerce satır için tek tek olay yayınlamak yerine tüm görünümler bir kez yenilenir
+        self.refresh_all()
+        QMessageBox.information(self, "İçe Aktarma", f"{count} kayıt eklendi.")
 
     def edit_selected_patient(self):
         room = self.patient_selector.currentData()
@@ -1344,13 +3718,11 @@ class PatientTaskApp(QMainWindow):
             return
         conn = get_conn()
         cur = conn.cursor()
-        cur.execute("SELECT * FROM patients WHERE room_number=?", (room,))
+        cur.execute(QUERIES["patient"].sql, (room,))
         r = cur.fetchone()
         conn.close()
         if r:
-            dlg = PatientEditDialog(self, r)
-            if dlg.exec_() == QDialog.Accepted:
-                self.reload_patients()
+            PatientEditDialog(self, r).exec_()
 
     def delete_selected_patient(self):
         room = self.patient_selector.currentData()
@@ -1362,205 +3734,315 @@ class PatientTaskApp(QMainWindow):
         self.delete_patient(room)
 
     def delete_patient(self, room):
-        conn = get_conn()
+        conn = get_archive_conn(history=True)
         cur = conn.cursor()
-        cur.execute("SELECT * FROM patients WHERE room_number=?", (room,))
-        p = cur.fetchone()
-        if p:
-            cur.execute(
-                "INSERT OR REPLACE INTO archive_patients (room_number,name,surname,notes,photo,tc_no,birth_date,phone) VALUES (?,?,?,?,?,?,?,?)",
-                (p["room_number"], p["name"], p["surname"], p["notes"], p["photo"], p["tc_no"], p["birth_date"], p["phone"])
-            )
-        cur.execute("DELETE FROM patients WHERE room_number=?", (room,))
-        cur.execute("SELECT * FROM tasks WHERE room_number=?", (room,))
-        for t in cur.fetchall():
-            cur.execute(
-                "INSERT INTO archive (room_number,task,time,date,end_date,time_type) VALUES (?,?,?,?,?,?)",
-                (t["room_number"], t["task"], t["time"], t["date"], t["end_date"], t["time_type"])
-            )
-        cur.execute("DELETE FROM tasks WHERE room_number=?", (room,))
+        cur.execute(
+            """INSERT OR REPLACE INTO arc.archive_patients (room_number,name,surname,notes,photo,tc_no,birth_date,phone)
+            SELECT room_number,name,surname,notes,photo,tc_no,birth_date,phone FROM main.patients WHERE room_number=?""",
+            (room,)
+        )
+        cur.execute("DELETE FROM main.patients WHERE room_number=?", (room,))
+        cur.execute("SELECT id FROM main.tasks WHERE room_number=? ORDER BY id", (room,))
+        task_ids = [r["id"] for r in cur.fetchall()]
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM arc.archive")
+        last_archive_id = cur.fetchone()[0]
+        cur.execute(f"{ARCHIVE_INSERT_SQL} WHERE room_number=? ORDER BY id", (room,))
+        copy_completions_to_history(cur, "task_id IN (SELECT id FROM main.tasks WHERE room_number=?)", (room,))
+        cur.execute("DELETE FROM main.tasks WHERE room_number=?", (room,))
+        cur.execute("SELECT id FROM arc.archive WHERE id>?", (last_archive_id,))
+        archive_ids = [r["id"] for r in cur.fetchall()]
         conn.commit()
         conn.close()
-        self.refresh_all()
+        event_bus.publish(PatientChanged(room), Archived("patient", room),
+                          *[TaskChanged(tid) for tid in task_ids], *[Archived("task", aid) for aid in archive_ids])
 
+    @timed()
     def reload_tasks(self):
         conn = get_conn()
         cur = conn.cursor()
-        cur.execute("SELECT t.*, p.name, p.surname, p.photo FROM tasks t LEFT JOIN patients p ON p.room_number=t.room_number ORDER BY date, time")
+        cur.execute(QUERIES["tasks_with_patients"].sql)
         rows = cur.fetchall()
         conn.close()
         self.tasks_cache = [dict(r) for r in rows]
+        self.tasks_by_id = {r["id"]: r for r in self.tasks_cache}
 
         self.tasks_table.setRowCount(0)
-        for r in self.tasks_cache:
-            row = self.tasks_table.rowCount()
-            self.tasks_table.insertRow(row)
-            name = f"{r['room_number']} - {r['name'] or ''} {r['surname'] or ''}"
-            self.tasks_table.setItem(row, 0, QTableWidgetItem(name))
-            self.tasks_table.setItem(row, 1, QTableWidgetItem(r["task"]))
-            self.tasks_table.setItem(row, 2, QTableWidgetItem(r["time"] or ""))
-            self.tasks_table.setItem(row, 3, QTableWidgetItem("Tamamlandı" if r["done"] else ("İptal" if r["cancelled"] else "Aktif")))
-            self.tasks_table.setItem(row, 4, QTableWidgetItem(r["repeat_type"] or ""))
-            self.tasks_table.setItem(row, 5, QTableWidgetItem(r["time_type"] or ""))
-            edit = QPushButton("Düzenle")
-            edit.clicked.connect(partial(self.edit_task, r["id"]))
-            self.tasks_table.setCellWidget(row, 6, edit)
-            delete = QPushButton("Sil")
-            delete.clicked.connect(partial(self.delete_task, r["id"]))
-            self.tasks_table.setCellWidget(row, 7, delete)
-            archive = QPushButton("Arşivle")
-            archive.clicked.connect(partial(self.archive_task, r["id"]))
-            self.tasks_table.setCellWidget(row, 8, archive)
+        self.tasks_table.setRowCount(len(self.tasks_cache))
+        for row, r in enumerate(self.tasks_cache):
+            self.fill_tasks_table_row(row, r)
+
+    def fill_tasks_table_row(self, row, r, with_buttons=True):
+        name = f"{r['room_number']} - {r['name'] or ''} {r['surname'] or ''}"
+        name_item = QTableWidgetItem(name)
+        name_item.setData(Qt.UserRole, r["id"])
+        self.tasks_table.setItem(row, 0, name_item)
+        self.tasks_table.setItem(row, 1, QTableWidgetItem(r["task"]))
+        self.tasks_table.setItem(row, 2, QTableWidgetItem(r["time"] or ""))
+        self.tasks_table.setItem(row, 3, QTableWidgetItem("Tamamlandı" if r["done"] else ("İptal" if r["cancelled"] else "Aktif")))
+        self.tasks_table.setItem(row, 4, QTableWidgetItem(r["repeat_type"] or ""))
+        self.tasks_table.setItem(row, 5, QTableWidgetItem(r["time_type"] or ""))
+        if not with_buttons:
+            return
+        edit = QPushButton("Düzenle")
+        edit.clicked.connect(partial(self.edit_task, r["id"]))
+        self.tasks_table.setCellWidget(row, 6, edit)
+        delete = QPushButton("Sil")
+        delete.clicked.connect(partial(self.delete_task, r["id"]))
+        self.tasks_table.setCellWidget(row, 7, delete)
+        archive = QPushButton("Arşivle")
+        archive.clicked.connect(partial(self.archive_task, r["id"]))
+        self.tasks_table.setCellWidget(row, 8, archive)
+
+    def task_cache_index(self, task_id):
+        for i, r in enumerate(self.tasks_cache):
+            if r["id"] == task_id:
+                return i
+        return None
+
+    def on_task_changed_tasks_view(self, event):
+        # Görev önbelleğini ve Görev Yönetimi tablosunu yalnızca bu görev için güncelle
+        new = fetch_task_row(event.task_id)
+        index = self.task_cache_index(event.task_id)
+        if index is not None and new and task_sort_key(self.tasks_cache[index]) == task_sort_key(new):
+            self.tasks_cache[index] = new
+            self.tasks_by_id[new["id"]] = new
+            self.fill_tasks_table_row(index, new, with_buttons=False)
+            return
+        if index is not None:
+            del self.tasks_cache[index]
+            self.tasks_by_id.pop(event.task_id, None)
+            self.tasks_table.removeRow(index)
+        if new:
+            keys = [task_sort_key(r) for r in self.tasks_cache]
+            index = bisect.bisect_right(keys, task_sort_key(new))
+            self.tasks_cache.insert(index, new)
+            self.tasks_by_id[new["id"]] = new
+            self.tasks_table.insertRow(index)
+            self.fill_tasks_table_row(index, new)
+
+    def on_patient_changed_tasks_view(self, event):
+        conn = get_conn()
+        cur = conn.cursor()
+        cur.execute(QUERIES["patient_name"].sql, (event.room,))
+        p = cur.fetchone()
+        conn.close()
+        for row, r in enumerate(self.tasks_cache):
+            if r["room_number"] == event.room:
+                r["name"] = p["name"] if p else None
+                r["surname"] = p["surname"] if p else None
+                self.tasks_table.item(row, 0).setText(f"{r['room_number']} - {r['name'] or ''} {r['surname'] or ''}")
 
     def add_task(self):
-        dlg = TaskEditDialog(self)
-        if dlg.exec_() == QDialog.Accepted:
-            self.reload_tasks()
-            self.update_task_sections()
+        TaskEditDialog(self).exec_()
 
     def edit_task(self, task_id):
         conn = get_conn()
         cur = conn.cursor()
-        cur.execute("SELECT * FROM tasks WHERE id=?", (task_id,))
+        cur.execute(QUERIES["task"].sql, (task_id,))
         r = cur.fetchone()
         conn.close()
         if r:
-            dlg = TaskEditDialog(self, r)
-            if dlg.exec_() == QDialog.Accepted:
-                self.reload_tasks()
-                self.update_task_sections()
-                if self.tabs.currentIndex() == 1 and self.settings.get("auto_refresh", True):
-                    self.update_selected_patient()
+            TaskEditDialog(self, r).exec_()
 
     def delete_task(self, task_id):
-        if QMessageBox.question(self, "Onay", "Görevi kalıcı olarak silmek istiyor musunuz?") != QMessageBox.Yes:
+        self.delete_tasks([task_id])
+
+    def delete_tasks(self, task_ids):
+        if not self.confirm_bulk(task_ids, "Görevi kalıcı olarak silmek istiyor musunuz?",
+                                 "{n} görevi kalıcı olarak silmek istiyor musunuz?"):
             return
         conn = get_conn()
         cur = conn.cursor()
-        cur.execute("DELETE FROM tasks WHERE id=?", (task_id,))
+        cur.execute(f"DELETE FROM tasks WHERE id IN ({','.join('?' * len(task_ids))})", task_ids)
         conn.commit()
         conn.close()
-        self.reload_tasks()
-        self.update_task_sections()
-        if self.tabs.currentIndex() == 1 and self.settings.get("auto_refresh", True):
-            self.update_selected_patient()
+        self.clear_section_checks(task_ids)
+        event_bus.publish(*[TaskChanged(tid) for tid in task_ids])
 
     def archive_task(self, task_id):
-        if QMessageBox.question(self, "Onay", "Görevi arşivlemek istiyor musunuz?") != QMessageBox.Yes:
+        self.archive_tasks_bulk([task_id])
+
+    def archive_tasks_bulk(self, task_ids):
+        if not self.confirm_bulk(task_ids, "Görevi arşivlemek istiyor musunuz?",
+                                 "{n} görevi arşivlemek istiyor musunuz?"):
             return
-        conn = get_conn()
+        conn = get_archive_conn(history=True)
         cur = conn.cursor()
-        cur.execute("SELECT * FROM tasks WHERE id=?", (task_id,))
-        t = cur.fetchone()
-        if t:
-            cur.execute(
-                "INSERT INTO archive (room_number,task,time,date,end_date,time_type) VALUES (?,?,?,?,?,?)",
-                (t["room_number"], t["task"], t["time"], t["date"], t["end_date"], t["time_type"])
-            )
-            cur.execute("DELETE FROM tasks WHERE id=?", (task_id,))
-            conn.commit()
+        marks = ",".join("?" * len(task_ids))
+        cur.execute("SELECT COALESCE(MAX(id), 0) FROM arc.archive")
+        last_archive_id = cur.fetchone()[0]
+        # Tek INSERT ... SELECT ve tek DELETE; tamamlanma kayıtları geçmişe kopyalanır, ardından ON DELETE CASCADE ile silinir
+        cur.execute(f"{ARCHIVE_INSERT_SQL} WHERE id IN ({marks}) ORDER BY id", task_ids)
+        copy_completions_to_history(cur, f"task_id IN ({marks})", task_ids)
+        cur.execute(f"DELETE FROM main.tasks WHERE id IN ({marks})", task_ids)
+        cur.execute("SELECT id FROM arc.archive WHERE id>?", (last_archive_id,))
+        archive_ids = [r["id"] for r in cur.fetchall()]
+        conn.commit()
         conn.close()
-        self.reload_tasks()
-        self.reload_archive()
-        self.update_task_sections()
-        if self.tabs.currentIndex() == 1 and self.settings.get("auto_refresh", True):
-            self.update_selected_patient()
+        self.clear_section_checks(task_ids)
+        event_bus.publish(*[TaskChanged(tid) for tid in task_ids], *[Archived("task", aid) for aid in archive_ids])
 
     def delete_archived_patient(self, room):
         if QMessageBox.question(self, "Onay", f"{room} numaralı arşivlenmiş hasta kalıcı olarak silinsin mi?") != QMessageBox.Yes:
             return
-        conn = get_conn()
+        conn = get_archive_conn()
         cur = conn.cursor()
-        cur.execute("DELETE FROM archive_patients WHERE room_number=?", (room,))
+        cur.execute("DELETE FROM arc.archive_patients WHERE room_number=?", (room,))
         conn.commit()
         conn.close()
-        self.reload_archive()
+        event_bus.publish(Archived("patient", room))
 
     def delete_archived_task(self, task_id):
         if QMessageBox.question(self, "Onay", "Arşivlenmiş görev kalıcı olarak silinsin mi?") != QMessageBox.Yes:
             return
-        conn = get_conn()
+        conn = get_archive_conn()
         cur = conn.cursor()
-        cur.execute("DELETE FROM archive WHERE id=?", (task_id,))
+        cur.execute("DELETE FROM arc.archive WHERE id=?", (task_id,))
         conn.commit()
         conn.close()
-        self.reload_archive()
+        event_bus.publish(Archived("task", task_id))
 
+    @timed()
     def reload_archive(self):
-        conn = get_conn()
+        self.archived_pending = {"patient": set(), "task": set()}
+        conn = get_archive_conn()
         cur = conn.cursor()
-        cur.execute("SELECT * FROM archive_patients ORDER BY room_number")
+        cur.execute(QUERIES["archive_patients"].sql)
         pats = cur.fetchall()
         self.archive_patients.setRowCount(0)
-        for p in pats:
-            row = self.archive_patients.rowCount()
-            self.archive_patients.insertRow(row)
-            self.archive_patients.setItem(row, 0, QTableWidgetItem(p["room_number"]))
-            self.archive_patients.setItem(row, 1, QTableWidgetItem(p["name"]))
-            self.archive_patients.setItem(row, 2, QTableWidgetItem(p["surname"]))
-            self.archive_patients.setItem(row, 3, QTableWidgetItem(p["tc_no"] or ""))
-            btn_restore = QPushButton("Geri Yükle")
-            btn_restore.clicked.connect(partial(self.restore_patient, p["room_number"]))
-            self.archive_patients.setCellWidget(row, 4, btn_restore)
-            btn_delete = QPushButton("Sil")
-            btn_delete.clicked.connect(partial(self.delete_archived_patient, p["room_number"]))
-            self.archive_patients.setCellWidget(row, 5, btn_delete)
-        cur.execute("SELECT a.*, p.name, p.surname FROM archive a LEFT JOIN patients p ON p.room_number=a.room_number ORDER BY a.date DESC")
+        self.archive_patients.setRowCount(len(pats))
+        for row, p in enumerate(pats):
+            self.fill_archive_patient_row(row, p)
+        cur.execute(QUERIES["archive_tasks"].sql)
         at = cur.fetchall()
         self.archive_tasks.setRowCount(0)
-        for a in at:
-            row = self.archive_tasks.rowCount()
-            self.archive_tasks.insertRow(row)
-            name = f"{a['room_number']} - {a['name'] or ''} {a['surname'] or ''}"
-            self.archive_tasks.setItem(row, 0, QTableWidgetItem(name))
-            self.archive_tasks.setItem(row, 1, QTableWidgetItem(a["task"]))
-            self.archive_tasks.setItem(row, 2, QTableWidgetItem(a["time"]))
-            self.archive_tasks.setItem(row, 3, QTableWidgetItem(a["date"]))
-            self.archive_tasks.setItem(row, 4, QTableWidgetItem(a["time_type"]))
-            btn_restore = QPushButton("Geri Yükle")
-            btn_restore.clicked.connect(partial(self.restore_task, a["id"]))
-            self.archive_tasks.setCellWidget(row, 5, btn_restore)
-            btn_delete = QPushButton("Sil")
-            btn_delete.clicked.connect(partial(self.delete_archived_task, a["id"]))
-            self.archive_tasks.setCellWidget(row, 6, btn_delete)
+        self.archive_tasks.setRowCount(len(at))
+        for row, a in enumerate(at):
+            self.fill_archive_task_row(row, a)
+        conn.close()
+
+    def fill_archive_patient_row(self, row, p):
+        room_item = QTableWidgetItem(p["room_number"])
+        room_item.setData(Qt.UserRole, p["room_number"])
+        self.archive_patients.setItem(row, 0, room_item)
+        self.archive_patients.setItem(row, 1, QTableWidgetItem(p["name"]))
+        self.archive_patients.setItem(row, 2, QTableWidgetItem(p["surname"]))
+        self.archive_patients.setItem(row, 3, QTableWidgetItem(p["tc_no"] or ""))
+        btn_restore = QPushButton("Geri Yükle")
+        btn_restore.clicked.connect(partial(self.restore_patient, p["room_number"]))
+        self.archive_patients.setCellWidget(row, 4, btn_restore)
+        btn_delete = QPushButton("Sil")
+        btn_delete.clicked.connect(partial(self.delete_archived_patient, p["room_number"]))
+        self.archive_patients.setCellWidget(row, 5, btn_delete)
+
+    def fill_archive_task_row(self, row, a):
+        name = f"{a['room_number']} - {a['name'] or ''} {a['surname'] or ''}"
+        name_item = QTableWidgetItem(name)
+        name_item.setData(Qt.UserRole, a["id"])
+        self.archive_tasks.setItem(row, 0, name_item)
+        self.archive_tasks.setItem(row, 1, QTableWidgetItem(a["task"]))
+        self.archive_tasks.setItem(row, 2, QTableWidgetItem(a["time"]))
+        self.archive_tasks.setItem(row, 3, QTableWidgetItem(a["date"]))
+        self.archive_tasks.setItem(row, 4, QTableWidgetItem(a["time_type"]))
+        btn_restore = QPushButton("Geri Yükle")
+        btn_restore.clicked.connect(partial(self.restore_task, a["id"]))
+        self.archive_tasks.setCellWidget(row, 5, btn_restore)
+        btn_delete = QPushButton("Sil")
+        btn_delete.clicked.connect(partial(self.delete_archived_task, a["id"]))
+        self.archive_tasks.setCellWidget(row, 6, btn_delete)
+
+    def on_archived_archive_view(self, event):
+        # Anahtarlar toplanır; aynı yayındaki bütün arşiv olayları bir sonraki döngü turunda birlikte uygulanır
+        self.archived_pending[event.kind].add(event.key)
+        self.invalidate("archive_rows")
+
+    @timed()
+    def apply_archived_rows(self):
+        # Arşiv tablolarında yalnızca ilgili satırları ekle/çıkar: tek sorgu, satır konumları için tek dizin
+        pending = self.archived_pending
+        self.archived_pending = {"patient": set(), "task": set()}
+        if sum(len(keys) for keys in pending.values()) > ARCHIVE_PATCH_LIMIT:
+            self.reload_archive()
+            return
+        conn = get_archive_conn()
+        cur = conn.cursor()
+        for kind, keys in pending.items():
+            if not keys:
+                continue
+            if kind == "patient":
+                # Oda numarasına göre artan sıra
+                table, query, fill = self.archive_patients, QUERIES["archive_patients_in"].sql, self.fill_archive_patient_row
+                sort_value, descending = (lambda r: r["room_number"]), False
+                row_value = lambda row: table.item(row, 0).data(Qt.UserRole)
+            else:
+                # Başlangıç tarihine göre azalan sıra
+                table, query, fill = self.archive_tasks, QUERIES["archive_tasks_in"].sql, self.fill_archive_task_row
+                sort_value, descending = (lambda r: r["date"] or ""), True
+                row_value = lambda row: table.item(row, 3).text() or ""
+            # Satır ekleme/silme her seferinde hücre düğmelerini kaydırır; bitişik satırlar tek çağrıyla işlenir
+            rows_by_key = {}
+            for row in range(table.rowCount()):
+                it = table.item(row, 0)
+                if it:
+                    rows_by_key[it.data(Qt.UserRole)] = row
+            for start, count in reversed(row_runs(sorted(rows_by_key[k] for k in keys if k in rows_by_key))):
+                table.model().removeRows(start, count)
+            cur.execute(query, (json.dumps(sorted(keys)),))
+            new_rows = sorted(cur.fetchall(), key=sort_value, reverse=descending)
+            if not new_rows:
+                continue
+            # Yeni satırın mevcut satırlar arasındaki yeri; azalan tabloda artan kopyada sondan sayılır
+            values = [row_value(row) for row in range(table.rowCount())]
+            if descending:
+                values.reverse()
+                positions = [len(values) - bisect.bisect_left(values, sort_value(new)) for new in new_rows]
+            else:
+                positions = [bisect.bisect_right(values, sort_value(new)) for new in new_rows]
+            groups = {}
+            for position, new in zip(positions, new_rows):
+                groups.setdefault(position, []).append(new)
+            for position in sorted(groups, reverse=True):
+                table.model().insertRows(position, len(groups[position]))
+                for offset, new in enumerate(groups[position]):
+                    fill(position + offset, new)
         conn.close()
 
     def restore_patient(self, room):
         if QMessageBox.question(self, "Onay", f"{room} numaralı hasta geri yüklensin mi?") != QMessageBox.Yes:
             return
-        conn = get_conn()
+        conn = get_archive_conn()
         cur = conn.cursor()
-        cur.execute("SELECT * FROM archive_patients WHERE room_number=?", (room,))
-        p = cur.fetchone()
-        if p:
-            cur.execute(
-                "INSERT OR REPLACE INTO patients (room_number,name,surname,notes,photo,tc_no,birth_date,phone) VALUES (?,?,?,?,?,?,?,?)",
-                (p["room_number"], p["name"], p["surname"], p["notes"], p["photo"], p["tc_no"], p["birth_date"], p["phone"])
-            )
-            cur.execute("DELETE FROM archive_patients WHERE room_number=?", (room,))
-            conn.commit()
+        cur.execute(
+            """INSERT OR REPLACE INTO main.patients (room_number,name,surname,notes,photo,tc_no,birth_date,phone)
+            SELECT room_number,name,surname,notes,photo,tc_no,birth_date,phone FROM arc.archive_patients WHERE room_number=?""",
+            (room,)
+        )
+        cur.execute("DELETE FROM arc.archive_patients WHERE room_number=?", (room,))
+        conn.commit()
         conn.close()
-        self.reload_patients()
-        self.reload_archive()
+        event_bus.publish(PatientChanged(room), Archived("patient", room))
 
     def restore_task(self, aid):
         if QMessageBox.question(self, "Onay", "Arşivlenmiş görev geri yüklensin mi?") != QMessageBox.Yes:
             return
-        conn = get_conn()
+        conn = get_archive_conn()
         cur = conn.cursor()
-        cur.execute("SELECT * FROM archive WHERE id=?", (aid,))
-        a = cur.fetchone()
-        if a:
-            cur.execute(
-                "INSERT INTO tasks (room_number,task,time,date,end_date,time_type,done,cancelled,notified,completed_time) VALUES (?,?,?,?,?,?,0,0,0,NULL)",
-                (a["room_number"], a["task"], a["time"], a["date"], a["end_date"], a["time_type"])
-            )
-            cur.execute("DELETE FROM archive WHERE id=?", (aid,))
-            conn.commit()
+        # Eski kimlik boştaysa geri verilir; geçmişteki tamamlanma kayıtları göreve yeniden bağlanır
+        cur.execute(
+            f"""INSERT INTO main.tasks (id,{ARCHIVE_TASK_COLUMNS},done,cancelled,notified,completed_time)
+            SELECT CASE WHEN source_task_id IN (SELECT id FROM main.tasks) THEN NULL ELSE source_task_id END,
+                {ARCHIVE_TASK_COLUMNS},0,0,0,NULL FROM arc.archive WHERE id=?""",
+            (aid,)
+        )
+        events = []
+        if cur.rowcount:
+            events = [TaskChanged(cur.lastrowid), Archived("task", aid)]
+            cur.execute("DELETE FROM arc.archive WHERE id=?", (aid,))
+        conn.commit()
         conn.close()
-        self.reload_tasks()
-        self.reload_archive()
+        event_bus.publish(*events)
 
+    @timed()
     def update_selected_patient(self):
         room = self.patient_selector.currentData()
         self.photo.clear()
@@ -1571,7 +4053,7 @@ class PatientTaskApp(QMainWindow):
             return
         conn = get_conn()
         cur = conn.cursor()
-        cur.execute("SELECT * FROM patients WHERE room_number=?", (room,))
+        cur.execute(QUERIES["patient"].sql, (room,))
         p = cur.fetchone()
         if p:
             if p["photo"]:
@@ -1598,12 +4080,23 @@ class PatientTaskApp(QMainWindow):
                 </div>
             """
             self.patient_details.setHtml(details)
-        cur.execute("SELECT * FROM tasks WHERE room_number=? ORDER BY date, time", (room,))
+        conn.close()
+        self.reload_patient_tasks(room)
+
+    @timed()
+    def reload_patient_tasks(self, room):
+        conn = get_conn()
+        cur = conn.cursor()
+        cur.execute(QUERIES["patient_tasks"].sql, (room,))
         tasks = cur.fetchall()
+        conn.close()
+        self.patient_task_table.setRowCount(0)
         for t in tasks:
             row = self.patient_task_table.rowCount()
             self.patient_task_table.insertRow(row)
-            self.patient_task_table.setItem(row, 0, QTableWidgetItem(t["task"]))
+            task_item = QTableWidgetItem(t["task"])
+            task_item.setData(Qt.UserRole, t["id"])
+            self.patient_task_table.setItem(row, 0, task_item)
             self.patient_task_table.setItem(row, 1, QTableWidgetItem(t["time"] or ""))
             self.patient_task_table.setItem(row, 2, QTableWidgetItem("Tamamlandı" if t["done"] else ("İptal" if t["cancelled"] else "Aktif")))
             self.patient_task_table.setItem(row, 3, QTableWidgetItem(t["repeat_type"] or ""))
@@ -1617,422 +4110,364 @@ class PatientTaskApp(QMainWindow):
             d = QPushButton("Sil")
             d.clicked.connect(partial(self.delete_task, t["id"]))
             self.patient_task_table.setCellWidget(row, 7, d)
+
+    def on_task_changed_patient_view(self, event):
+        # Yalnızca seçili hastanın görev listesi etkileniyorsa yeniden doldur
+        room = self.patient_selector.currentData()
+        if not room or not self.settings.get("auto_refresh", True):
+            return
+        t = self.tasks_by_id.get(event.task_id)
+        shown = any(
+            self.patient_task_table.item(row, 0) and self.patient_task_table.item(row, 0).data(Qt.UserRole) == event.task_id
+            for row in range(self.patient_task_table.rowCount())
+        )
+        if shown or (t and t["room_number"] == room):
+            self.reload_patient_tasks(room)
+
+    def on_patient_changed_patient_view(self, event):
+        conn = get_conn()
+        cur = conn.cursor()
+        cur.execute(QUERIES["patient_name"].sql, (event.room,))
+        p = cur.fetchone()
         conn.close()
+        idx = self.patient_selector.findData(event.room)
+        if p:
+            text = f"{p['room_number']} - {p['name']} {p['surname']}"
+            if idx >= 0:
+                self.patient_selector.setItemText(idx, text)
+            else:
+                index = self.patient_selector.count()
+                for i in range(1, self.patient_selector.count()):
+                    if self.patient_selector.itemData(i) > event.room:
+                        index = i
+                        break
+                self.patient_selector.insertItem(index, text, event.room)
+                if not self.patient_selector.currentData():
+                    self.patient_selector.setCurrentIndex(index)
+        elif idx >= 0:
+            self.patient_selector.removeItem(idx)
+        self.fill_report_rooms()
+        if self.patient_selector.currentData() == event.room:
+            self.update_selected_patient()
 
     def add_task_for_selected_patient(self):
         room = self.patient_selector.currentData()
         if not room:
             QMessageBox.warning(self, "Hata", "Lütfen bir hasta seçin.")
             return
-        dlg = TaskEditDialog(self, default_room=room)
-        if dlg.exec_() == QDialog.Accepted:
-            self.reload_tasks()
-            self.update_task_sections()
-            self.update_selected_patient()
+        TaskEditDialog(self, default_room=room).exec_()
 
     def is_daytime_task(self, t):
-        day_start = self.parse_time(self.settings.get("day_start", "08:00"))
-        day_end = self.parse_time(self.settings.get("day_end", "20:00"))
-        if t["time_type"] == "Gün İçinde":
-            return True
-        if t["time_type"] == "Akşam":
-            return False
-        if t["time"]:
-            try:
-                hh, mm = map(int, t["time"].split(":"))
-                t_time = time(hh, mm)
-                return day_start <= t_time < day_end
-            except:
-                pass
-        return False
+        return is_daytime_task(t, self.settings)
 
+    @timed()
     def update_task_sections(self):
+        # Yenileme sırasında işaretli görevleri koru
+        checked_ids = set(self.selected_section_task_ids())
+        self.section_checks = {}
+        self.section_rows = {}
+        self.section_groups = {}
         # Clear both containers
-        while self.day_v.count():
-            it = self.day_v.takeAt(0)
-            w = it.widget()
-            if w:
-                w.deleteLater()
-        while self.night_v.count():
-            it = self.night_v.takeAt(0)
-            w = it.widget()
-            if w:
-                w.deleteLater()
-
-        now = datetime.now()
-        today = date.today()
-        tomorrow = today + timedelta(days=1)
-        due_day = []
-        completed_day = []
-        upcoming_day = []
-        cancelled_day = []
-        due_night = []
-        completed_night = []
-        upcoming_night = []
-        cancelled_night = []
-        day_start = self.parse_time(self.settings.get("day_start", "08:00"))
-        day_end = self.parse_time(self.settings.get("day_end", "20:00"))
-        timeout_hours = self.settings.get("completed_task_timeout", 4)
-        overdue_threshold = timedelta(hours=24)
+        for container in (self.day_v, self.night_v):
+            while container.count():
+                it = container.takeAt(0)
+                w = it.widget()
+                if w:
+                    w.deleteLater()
 
         # Bugün tamamlanan görevleri yükle
+        today = date.today()
         conn = get_conn()
-        cur = conn.cursor()
-        cur.execute("SELECT task_id FROM task_completions WHERE completion_date=?", (today.isoformat(),))
-        completed_tasks = {row["task_id"] for row in cur.fetchall()}
+        self.section_completed = completed_task_ids(conn, today)
+        self.section_date = today
         conn.close()
 
+        now = datetime.now()
         for t in self.tasks_cache:
-            try:
-                t_date = datetime.strptime(t["date"], "%Y-%m-%d").date() if t["date"] else today
-                t_end_date = datetime.strptime(t["end_date"], "%Y-%m-%d").date() if t["end_date"] else None
-                if t_end_date and t_date > t_end_date:
-                    continue
-            except:
-                t_date = today
-            try:
-                if t["time"] and t["time_type"] == "Saat Belirt":
-                    hh, mm = map(int, t["time"].split(":"))
-                    t_time = time(hh, mm)
-                    t_dt = datetime.combine(t_date, t_time)
-                else:
-                    t_time = time(12, 0)
-                    t_dt = datetime.combine(t_date, t_time)
-            except:
-                t_time = time(12, 0)
-                t_dt = datetime.combine(t_date, t_time)
+            placement = classify_task(t, self.section_completed, now, self.settings)
+            if placement:
+                self.place_section_row(t, placement, t["id"] in checked_ids)
+        self.update_section_stats()
+
+    def section_group(self, key):
+        """Return the (group box, layout) for a (is_daytime, section) key, creating it in order."""
+        if key in self.section_groups:
+            return self.section_groups[key]
+        is_daytime, section = key
+        container = self.day_v if is_daytime else self.night_v
+        title = dict(SECTION_TITLES)[section]
+        gb = QGroupBox(title)
+        gb.setProperty("section", section)
+        if section == "due":
+            gb.setStyleSheet(DUE_GROUP_STYLE)
+        vb = QVBoxLayout(gb)
+        select_all = QCheckBox("Tümünü Seç")
+        select_all.toggled.connect(partial(self.on_section_select_all, key))
+        vb.addWidget(select_all)
+        order = [name for name, _ in SECTION_TITLES]
+        index = 0
+        for i in range(container.count()):
+            w = container.itemAt(i).widget()
+            if w and order.index(w.property("section")) < order.index(section):
+                index = i + 1
+        container.insertWidget(index, gb)
+        self.section_groups[key] = (gb, vb)
+        return gb, vb
+
+    def on_section_select_all(self, key, on):
+        for task_id, (roww, row_key) in self.section_rows.items():
+            if row_key == key:
+                self.section_checks[task_id].setChecked(on)
+
+    def place_section_row(self, t, placement, checked=False):
+        is_daytime, section, t_dt = placement
+        key = (is_daytime, section)
+        gb, vb = self.section_group(key)
+        is_due_section = section == "due"
+        completed = t["id"] in self.section_completed
+        roww = QWidget()
+        hl = QHBoxLayout(roww)
+        check = QCheckBox()
+        check.setChecked(checked)
+        hl.addWidget(check)
+        self.section_checks[t["id"]] = check
+        status = "(Yapıldı)" if completed else ("(İptal/Stop)" if t["cancelled"] else "(Yapılmadı/Bekliyor)")
+        patient_name = f"{t['room_number']} - {t['name'] or ''} {t['surname'] or ''}"
+        lbl = QLabel(f"{patient_name} - {t['task']} ({t['time'] or t['time_type'] or ''}) {status}")
+        hl.addWidget(lbl)
+        hl.addStretch()
+        done_btn = QPushButton("✅ Yapıldı")
+        notdone_btn = QPushButton("❌ Yapılmadı")
+        cancel_btn = QPushButton("🚫 İptal")
+        done_btn.setFixedWidth(100)
+        notdone_btn.setFixedWidth(100)
+        cancel_btn.setFixedWidth(100)
+        hl.addWidget(done_btn)
+        hl.addWidget(notdone_btn)
+        hl.addWidget(cancel_btn)
+
+        roww.setProperty("task_id", t["id"])
+        roww.setProperty("is_due", is_due_section)
+        roww.setProperty("done", completed)
+        roww.setProperty("cancelled", bool(t["cancelled"]))
+        roww.setProperty("is_due_section", is_due_section)
+        roww.setProperty("sort_key", task_sort_key(t))
+
+        if t["cancelled"]:
+            color = "#555555"
+        elif completed:
+            color = "#2ecc71"
+        else:
+            color = "#7f8c8d" if not is_due_section else "#e74c3c"
+        roww.setStyleSheet(f"background:{color}; border-radius:8px; padding:6px; color:white;")
+
+        # Görev sırası (tarih, saat) korunarak ilgili gruba yerleştir
+        sort_key = task_sort_key(t)
+        index = vb.count()
+        last = vb.itemAt(index - 1).widget()
+        if last.property("sort_key") is not None and tuple(last.property("sort_key")) > sort_key:
+            for i in range(1, vb.count()):
+                other = vb.itemAt(i).widget()
+                if other and tuple(other.property("sort_key")) > sort_key:
+                    index = i
+                    break
+        vb.insertWidget(index, roww)
+        self.section_rows[t["id"]] = (roww, key)
+        gb.setTitle(f"{dict(SECTION_TITLES)[section]} ({vb.count() - 1})")
+
+        done_btn.clicked.connect(partial(self.mark_done, t["id"]))
+        notdone_btn.clicked.connect(partial(self.mark_notdone, t["id"]))
+        cancel_btn.clicked.connect(partial(self.mark_cancelled, t["id"]))
+
+    def remove_section_row(self, task_id):
+        entry = self.section_rows.pop(task_id, None)
+        self.section_checks.pop(task_id, None)
+        if not entry:
+            return
+        roww, key = entry
+        gb, vb = self.section_groups[key]
+        vb.removeWidget(roww)
+        roww.deleteLater()
+        if vb.count() <= 1:
+            (self.day_v if key[0] else self.night_v).removeWidget(gb)
+            gb.deleteLater()
+            del self.section_groups[key]
+        else:
+            gb.setTitle(f"{dict(SECTION_TITLES)[key[1]]} ({vb.count() - 1})")
 
-            # Skip if more than 24 hours overdue
-            if t_dt < now - overdue_threshold:
-                continue
+    def update_section_stats(self):
+        counts = {name: 0 for name, _ in SECTION_TITLES}
+        for (is_daytime, section), (gb, vb) in self.section_groups.items():
+            counts[section] += vb.count() - 1
+        # Update stats (overall)
+        self.total_btn.setText(f"Toplam: {counts['completed'] + counts['due'] + counts['cancelled']}")
+        self.done_btn.setText(f"Tamamlanmış: {counts['completed']}")
+        self.wait_btn.setText(f"Vakti Gelen: {counts['due']}")
+        self.upcoming_btn.setText(f"Gelecek: ({counts['upcoming']})")
+        self.cancel_btn.setText(f"İptal: {counts['cancelled']}")
+        self.update_timer_activity()
+
+    def patch_section_row(self, task_id, refresh_completion=False):
+        if self.section_date != date.today():
+            # Gün değiştiyse tüm sınıflandırma yeniden yapılmalı
+            self.invalidate("sections")
+            return
+        if refresh_completion:
+            conn = get_conn()
+            cur = conn.cursor()
+            cur.execute(QUERIES["completion_exists"].sql, (task_id, self.section_date.isoformat()))
+            if cur.fetchone():
+                self.section_completed.add(task_id)
+            else:
+                self.section_completed.discard(task_id)
+            conn.close()
+        check = self.section_checks.get(task_id)
+        checked = bool(check and check.isChecked())
+        self.remove_section_row(task_id)
+        t = self.tasks_by_id.get(task_id)
+        if t:
+            placement = classify_task(t, self.section_completed, datetime.now(), self.settings)
+            if placement:
+                self.place_section_row(t, placement, checked)
+        self.update_section_stats()
 
-            is_daytime = self.is_daytime_task(t)
-            is_due = (t_dt <= now and (is_daytime or t["time_type"] == "Akşam") and not t["cancelled"]) or (t["notified"] == 1 and not t["cancelled"])
-
-            is_today = t_date == today
-            is_next_24h = t_dt <= now + timedelta(hours=24)
-
-            include = False
-            if t["repeat_type"] == "Her Gün":
-                include = True
-            elif t["repeat_type"] == "Tek Günler" and t_date.day % 2 == 1:
-                include = True
-            elif t["repeat_type"] == "Çift Günler" and t_date.day % 2 == 0:
-                include = True
-            elif t["repeat_type"] == "Haftanın Günleri" and t["repeat_days"]:
-                days = [int(x) for x in t["repeat_days"].split(",") if x.strip().isdigit()]
-                if t_date.weekday() in days:
-                    include = True
-            elif t["repeat_type"] == "Kaç Günde Bir" and t["repeat_interval"]:
-                start_date = datetime.strptime(t["date"], "%Y-%m-%d").date() if t["date"] else today
-                delta = (today - start_date).days
-                if delta >= 0 and delta % t["repeat_interval"] == 0:
-                    include = True
-            elif t_date == today:
-                include = True
-
-            if not include:
-                continue
+    def on_task_changed_sections(self, event):
+        self.patch_section_row(event.task_id, refresh_completion=True)
 
-            if t["id"] in completed_tasks:
-                try:
-                    completed_dt = now  # task_completions tablosunda tarih var, zamanı şimdilik now kullanıyoruz
-                    if (now - completed_dt).total_seconds() / 3600 > timeout_hours:
-                        continue
-                except:
-                    pass
+    def on_completion_recorded_sections(self, event):
+        if event.date == self.section_date.isoformat():
+            self.section_completed.add(event.task_id)
+        self.patch_section_row(event.task_id)
 
-            if t["cancelled"] and is_today:
-                if is_daytime:
-                    cancelled_day.append((t, t_dt))
-                else:
-                    cancelled_night.append((t, t_dt))
-            elif t["id"] in completed_tasks and is_today:
-                if is_daytime:
-                    completed_day.append((t, t_dt))
-                else:
-                    completed_night.append((t, t_dt))
-            elif is_due and t["id"] not in completed_tasks:
-                if is_daytime:
-                    due_day.append((t, t_dt))
-                else:
-                    due_night.append((t, t_dt))
-            elif is_next_24h and t["id"] not in completed_tasks:
-                if is_daytime:
-                    upcoming_day.append((t, t_dt))
-                else:
-                    upcoming_night.append((t, t_dt))
+    def on_patient_changed_sections(self, event):
+        for task_id in [tid for tid in self.section_rows if self.tasks_by_id.get(tid, {}).get("room_number") == event.room]:
+            self.patch_section_row(task_id)
 
-        # Update stats (overall)
-        total_day = len(completed_day) + len(due_day) + len(cancelled_day)
-        total_night = len(completed_night) + len(due_night) + len(cancelled_night)
-        self.total_btn.setText(f"Toplam: {total_day + total_night}")
-        self.done_btn.setText(f"Tamamlanmış: {len(completed_day) + len(completed_night)}")
-        self.wait_btn.setText(f"Vakti Gelen: {len(due_day) + len(due_night)}")
-        self.upcoming_btn.setText(f"Gelecek: ({len(upcoming_day) + len(upcoming_night)})")
-        self.cancel_btn.setText(f"İptal: {len(cancelled_day) + len(cancelled_night)}")
-
-        def make_section(title, items, is_due_section=False, container=None):
-            if not items:
-                return
-            gb = QGroupBox(f"{title} ({len(items)})")
-            vb = QVBoxLayout(gb)
-            for t, t_dt in items:
-                roww = QWidget()
-                hl = QHBoxLayout(roww)
-                status = "(Yapıldı)" if t["id"] in completed_tasks else ("(İptal/Stop)" if t["cancelled"] else "(Yapılmadı/Bekliyor)")
-                patient_name = f"{t['room_number']} - {t['name'] or ''} {t['surname'] or ''}"
-                lbl = QLabel(f"{patient_name} - {t['task']} ({t['time'] or t['time_type'] or ''}) {status}")
-                hl.addWidget(lbl)
-                hl.addStretch()
-                done_btn = QPushButton("✅ Yapıldı")
-                notdone_btn = QPushButton("❌ Yapılmadı")
-                cancel_btn = QPushButton("🚫 İptal")
-                done_btn.setFixedWidth(100)
-                notdone_btn.setFixedWidth(100)
-                cancel_btn.setFixedWidth(100)
-                hl.addWidget(done_btn)
-                hl.addWidget(notdone_btn)
-                hl.addWidget(cancel_btn)
-
-                roww.setProperty("task_id", t["id"])
-                roww.setProperty("is_due", is_due_section)
-                roww.setProperty("done", t["id"] in completed_tasks)
-                roww.setProperty("cancelled", bool(t["cancelled"]))
-                roww.setProperty("is_due_section", is_due_section)
-
-                if t["cancelled"]:
-                    color = "#555555"
-                elif t["id"] in completed_tasks:
-                    color = "#2ecc71"
-                else:
-                    color = "#7f8c8d" if not is_due_section else "#e74c3c"
-                roww.setStyleSheet(f"background:{color}; border-radius:8px; padding:6px; color:white;")
-                vb.addWidget(roww)
-
-                done_btn.clicked.connect(partial(self.mark_done, t["id"]))
-                notdone_btn.clicked.connect(partial(self.mark_notdone, t["id"]))
-                cancel_btn.clicked.connect(partial(self.mark_cancelled, t["id"]))
-            container.addWidget(gb)
-
-        # Daytime sections
-        make_section("Vakti Gelenler", due_day, True, self.day_v)
-        make_section("Tamamlanmış Görevler", completed_day, False, self.day_v)
-        make_section("Bir Sonraki Görevler", upcoming_day, False, self.day_v)
-        make_section("İptal Edilen Görevler", cancelled_day, False, self.day_v)
-
-        # Night sections
-        make_section("Vakti Gelenler", due_night, True, self.night_v)
-        make_section("Tamamlanmış Görevler", completed_night, False, self.night_v)
-        make_section("Bir Sonraki Görevler", upcoming_night, False, self.night_v)
-        make_section("İptal Edilen Görevler", cancelled_night, False, self.night_v)
+    def clear_section_checks(self, task_ids):
+        for task_id in task_ids:
+            if task_id in self.section_checks:
+                self.section_checks[task_id].setChecked(False)
 
     def mark_done(self, task_id):
-        if QMessageBox.question(self, "Onay", "Görevi tamamlandı olarak işaretlemek istiyor musunuz?") != QMessageBox.Yes:
+        self.mark_done_tasks([task_id])
+
+    def mark_notdone(self, task_id):
+        self.mark_notdone_tasks([task_id])
+
+    def mark_cancelled(self, task_id):
+        self.mark_cancelled_tasks([task_id])
+
+    def confirm_bulk(self, task_ids, single_msg, bulk_msg):
+        if not task_ids:
+            QMessageBox.warning(self, "Hata", "Lütfen en az bir görev seçin.")
+            return False
+        msg = single_msg if len(task_ids) == 1 else bulk_msg.format(n=len(task_ids))
+        return QMessageBox.question(self, "Onay", msg) == QMessageBox.Yes
+
+    def mark_done_tasks(self, task_ids):
+        if not self.confirm_bulk(task_ids, "Görevi tamamlandı olarak işaretlemek istiyor musunuz?",
+                                 "{n} görevi tamamlandı olarak işaretlemek istiyor musunuz?"):
             return
         conn = get_conn()
         cur = conn.cursor()
         today = date.today().isoformat()
-        # Görevi tamamlandı olarak işaretle ve o günü kaydet
-        cur.execute("INSERT INTO task_completions (task_id, completion_date) VALUES (?, ?)", (task_id, today))
+        # Görevleri tamamlandı olarak işaretle ve o günü kaydet (aynı gün ikinci kez eklenmez)
+        cur.executemany(
+            "INSERT INTO task_completions (task_id, completion_date) SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM task_completions WHERE task_id=? AND completion_date=?)",
+            [(tid, today, tid, today) for tid in task_ids]
+        )
         # Tekrar eden görevler için done bayrağını sıfırla
-        cur.execute("UPDATE tasks SET done=0, completed_time=NULL WHERE id=?", (task_id,))
+        cur.executemany("UPDATE tasks SET done=0, completed_time=NULL WHERE id=?", [(tid,) for tid in task_ids])
         conn.commit()
         conn.close()
-        self.reload_tasks()
-        self.update_task_sections()
-        if self.tabs.currentIndex() == 1 and self.settings.get("auto_refresh", True):
-            self.update_selected_patient()
+        self.clear_section_checks(task_ids)
+        event_bus.publish(*[CompletionRecorded(tid, today) for tid in task_ids])
 
-    def mark_notdone(self, task_id):
-        if QMessageBox.question(self, "Onay", "Görevi yapılmadı olarak işaretlemek istiyor musunuz?") != QMessageBox.Yes:
+    def mark_notdone_tasks(self, task_ids):
+        if not self.confirm_bulk(task_ids, "Görevi yapılmadı olarak işaretlemek istiyor musunuz?",
+                                 "{n} görevi yapılmadı olarak işaretlemek istiyor musunuz?"):
             return
         conn = get_conn()
         cur = conn.cursor()
         today = date.today().isoformat()
-        cur.execute("DELETE FROM task_completions WHERE task_id=? AND completion_date=?", (task_id, today))
-        cur.execute("UPDATE tasks SET done=0, cancelled=0, completed_time=NULL WHERE id=?", (task_id,))
+        cur.executemany("DELETE FROM task_completions WHERE task_id=? AND completion_date=?", [(tid, today) for tid in task_ids])
+        cur.executemany("UPDATE tasks SET done=0, cancelled=0, completed_time=NULL WHERE id=?", [(tid,) for tid in task_ids])
         conn.commit()
         conn.close()
-        self.reload_tasks()
-        self.update_task_sections()
-        if self.tabs.currentIndex() == 1 and self.settings.get("auto_refresh", True):
-            self.update_selected_patient()
+        self.clear_section_checks(task_ids)
+        event_bus.publish(*[TaskChanged(tid) for tid in task_ids])
 
-    def mark_cancelled(self, task_id):
-        if QMessageBox.question(self, "Onay", "Görevi iptal etmek istiyor musunuz?") != QMessageBox.Yes:
+    def mark_cancelled_tasks(self, task_ids):
+        if not self.confirm_bulk(task_ids, "Görevi iptal etmek istiyor musunuz?",
+                                 "{n} görevi iptal etmek istiyor musunuz?"):
             return
         conn = get_conn()
         cur = conn.cursor()
         today = date.today().isoformat()
-        cur.execute("DELETE FROM task_completions WHERE task_id=? AND completion_date=?", (task_id, today))
-        cur.execute("UPDATE tasks SET cancelled=1, done=0, completed_time=NULL WHERE id=?", (task_id,))
+        cur.executemany("DELETE FROM task_completions WHERE task_id=? AND completion_date=?", [(tid, today) for tid in task_ids])
+        cur.executemany("UPDATE tasks SET cancelled=1, done=0, completed_time=NULL WHERE id=?", [(tid,) for tid in task_ids])
         conn.commit()
         conn.close()
-        self.reload_tasks()
-        self.update_task_sections()
-        if self.tabs.currentIndex() == 1 and self.settings.get("auto_refresh", True):
-            self.update_selected_patient()
+        self.clear_section_checks(task_ids)
+        event_bus.publish(*[TaskChanged(tid) for tid in task_ids])
 
+    @timed()
     def update_flashing(self):
+        # Yalnızca "Vakti Gelenler" kutularının çerçevesi yanıp söner; satır renkleri yerleştirilirken verilir
         self.flash_state = not self.flash_state
-        # Update flashing for both subtabs
-        for container, subtab in [(self.day_v, self.day_scroll), (self.night_v, self.night_scroll)]:
-            for i in range(container.count()):
-                item = container.itemAt(i)
-                if not item:
-                    continue
-                w = item.widget()
-                if not w:
-                    continue
-                # "Vakti Gelenler" başlığına sahip QGroupBox için her zaman yanıp sönme
-                if isinstance(w, QGroupBox) and w.title().startswith("Vakti Gelenler"):
-                    color = "#F1C40F" if self.flash_state else "#E74C3C"
-                    w.setStyleSheet(f"""
-                        QGroupBox {{
-                            background: #333333;
-                            color: white;
-                            border: 4px solid {color};
-                            border-radius: 8px;
-                            padding: 10px;
-                            font-family: Helvetica;
-                            font-size: 16px;
-                            font-weight: bold;
-                        }}
-                        QGroupBox::title {{
-                            color: white;
-                            subcontrol-origin: margin;
-                            subcontrol-position: top left;
-                            padding: 0 3px;
-                        }}
-                    """)
-                    continue  # Vakti Gelenler için işlemi bitir, altındaki roww'ları kontrol etmeye gerek yok
-
-                # Diğer görev satırları için mevcut mantık
-                for j in range(w.layout().count()):
-                    roww = w.layout().itemAt(j).widget()
-                    if not roww:
-                        continue
-                    is_due = roww.property("is_due")
-                    done = roww.property("done")
-                    cancelled = roww.property("cancelled")
-                    is_due_section = roww.property("is_due_section")
-                    if is_due_section and is_due and not done and not cancelled:
-                        color = "#F1C40F" if self.flash_state else "#E74C3C"
-                        roww.setStyleSheet(f"background:{color}; border-radius:8px; padding:6px; color:white;")
-                    else:
-                        if done:
-                            roww.setStyleSheet("background:#2ecc71; border-radius:8px; padding:6px; color:white;")
-                        elif cancelled:
-                            roww.setStyleSheet("background:#555555; border-radius:8px; padding:6px; color:white;")
-                        else:
-                            roww.setStyleSheet("background:#7f8c8d; border-radius:8px; padding:6px; color:white;")
+        for (is_daytime, section), (gb, vb) in self.section_groups.items():
+            if section == "due":
+                gb.setProperty("flash", self.flash_state)
+                gb.style().unpolish(gb)
+                gb.style().polish(gb)
+                gb.update()
 
     def check_notifications(self):
         if not self.settings.get("notifications_enabled", True):
             return
         now = datetime.now()
-        day_start = self.parse_time(self.settings.get("day_start", "08:00"))
-        night_start = self.parse_time(self.settings.get("night_start", "20:00"))
         conn = get_conn()
         cur = conn.cursor()
-        cur.execute("SELECT t.*, p.name, p.surname, p.photo FROM tasks t LEFT JOIN patients p ON p.room_number=t.room_number WHERE done=0 AND cancelled=0 AND (notified=0 OR notified IS NULL)")
+        cur.execute(QUERIES["pending_notifications"].sql)
         rows = cur.fetchall()
         for r in rows:
             try:
-                tdt = None
-                if r["time"] and r["time_type"] == "Saat Belirt":
-                    hh, mm = map(int, r["time"].split(":"))
-                    tdt = datetime.combine(datetime.strptime(r["date"], "%Y-%m-%d").date() if r["date"] else date.today(), time(hh, mm))
-                elif r["time_type"] == "Gün İçinde":
-                    tdt = datetime.combine(datetime.strptime(r["date"], "%Y-%m-%d").date() if r["date"] else date.today(), day_start)
-                elif r["time_type"] == "Akşam":
-                    tdt = datetime.combine(datetime.strptime(r["date"], "%Y-%m-%d").date() if r["date"] else date.today(), night_start)
-                
-                if tdt:
-                    diff = (tdt - now).total_seconds()
-                    if -300 <= diff <= 300:  # Within 5 minutes before or after the task time
-                        patient_name = f"{r['room_number']} - {r['name'] or ''} {r['surname'] or ''}"
-                        time_info = r["time"] if r["time_type"] == "Saat Belirt" else r["time_type"]
-                        message = f"Görev Hatırlatması\nHasta: {patient_name}\nGörev: {r['task']}\nZaman: {time_info}"
-                        dlg = NotificationDialog(self, message, r["id"], r["photo"])
-                        dlg.exec_()
-                        cur.execute("UPDATE tasks SET notified=1 WHERE id=?", (r["id"],))
-                        conn.commit()
-                        break  # Show one notification at a time to avoid overwhelming the user
+                if notification_due(r, now, self.settings):
+                    patient_name = f"{r['room_number']} - {r['name'] or ''} {r['surname'] or ''}"
+                    time_info = r["time"] if r["time_type"] == "Saat Belirt" else r["time_type"]
+                    message = f"Görev Hatırlatması\nHasta: {patient_name}\nGörev: {r['task']}\nZaman: {time_info}"
+                    dlg = NotificationDialog(self, message, r["id"], r["photo"])
+                    dlg.exec_()
+                    cur.execute("UPDATE tasks SET notified=1 WHERE id=?", (r["id"],))
+                    conn.commit()
+                    event_bus.publish(TaskChanged(r["id"]))
+                    break  # Show one notification at a time to avoid overwhelming the user
             except Exception as e:
                 print(f"Notification error: {e}")
         conn.close()
 
+    @timed()
     def reload_calendar_tasks(self):
         sel = self.calendar.selectedDate().toPyDate()
-        weekday = sel.weekday()
-        conn = get_conn()
-        cur = conn.cursor()
-        # Görevleri yükle
-        cur.execute("SELECT t.*, p.name, p.surname FROM tasks t LEFT JOIN patients p ON p.room_number=t.room_number")
-        rows = cur.fetchall()
-        # Seçilen gün için tamamlanmış görevleri yükle
-        cur.execute("SELECT task_id FROM task_completions WHERE completion_date=?", (sel.isoformat(),))
-        completed_tasks = {row["task_id"] for row in cur.fetchall()}
-        conn.close()
-        
-        display = []
-        timeout_hours = self.settings.get("completed_task_timeout", 4)
+        entries = self.calendar_cache.get(sel)
+        if entries is None:
+            entries = load_calendar_days([sel])[sel]
+            self.calendar_cache[sel] = entries
+        self.prefetch_calendar_days(sel)
+
         now = datetime.now()
-        today = date.today()
-        overdue_threshold = timedelta(hours=24)
-        
-        for r in rows:
-            include = False
-            try:
-                t_date = datetime.strptime(r["date"], "%Y-%m-%d").date() if r["date"] else today
-                t_end_date = datetime.strptime(r["end_date"], "%Y-%m-%d").date() if r["end_date"] else None
-                if t_end_date and sel > t_end_date:
-                    continue
-                rt = r["repeat_type"] or ""
-                if r["date"] and t_date == sel:
-                    include = True
-                elif rt == "Her Gün":
-                    include = True
-                elif rt == "Tek Günler" and sel.day % 2 == 1:
-                    include = True
-                elif rt == "Çift Günler" and sel.day % 2 == 0:
-                    include = True
-                elif rt == "Haftanın Günleri" and r["repeat_days"]:
-                    days = [int(x) for x in r["repeat_days"].split(",") if x.strip().isdigit()]
-                    if weekday in days:
-                        include = True
-                elif rt == "Kaç Günde Bir" and r["repeat_interval"]:
-                    start_date = datetime.strptime(r["date"], "%Y-%m-%d").date() if r["date"] else today
-                    delta = (sel - start_date).days
-                    if delta >= 0 and delta % r["repeat_interval"] == 0:
-                        include = True
-            except Exception:
-                pass
-            if include:
-                # Skip overdue
-                try:
-                    if r["time"] and r["time_type"] == "Saat Belirt":
-                        hh, mm = map(int, r["time"].split(":"))
-                        tdt = datetime.combine(sel, time(hh, mm))
-                    else:
-                        tdt = datetime.combine(sel, time(12, 0))
-                    if tdt < now - overdue_threshold:
-                        continue
-                except:
-                    pass
-                display.append((r, r["id"] in completed_tasks))
-        
+        display = visible_calendar_entries(entries, sel, now)
+
+        self.calendar_table.setUpdatesEnabled(False)
         self.calendar_table.setRowCount(0)
-        for r, is_completed in display:
-            row = self.calendar_table.rowCount()
-            self.calendar_table.insertRow(row)
+        self.calendar_table.setRowCount(len(display))
+        for row, (r, is_completed) in enumerate(display):
             name = f"{r['room_number']} - {r['name'] or ''} {r['surname'] or ''}"
             self.calendar_table.setItem(row, 0, QTableWidgetItem(name))
             self.calendar_table.setItem(row, 1, QTableWidgetItem(r["task"]))
             self.calendar_table.setItem(row, 2, QTableWidgetItem(r["time"] or ""))
-            status = "Tamamlandı" if is_completed else ("İptal" if r["cancelled"] else ("Bekleniyor" if (r["time"] and datetime.combine(sel, time(int(r["time"].split(':')[0]), int(r["time"].split(':')[1]))) <= now) else "Gelecek"))
+            clock = task_clock(r)
+            status = "Tamamlandı" if is_completed else ("İptal" if r["cancelled"] else ("Bekleniyor" if (clock and datetime.combine(sel, clock) <= now) else "Gelecek"))
             self.calendar_table.setItem(row, 3, QTableWidgetItem(status))
             self.calendar_table.setItem(row, 4, QTableWidgetItem(r["repeat_type"] or ""))
             self.calendar_table.setItem(row, 5, QTableWidgetItem(r["time_type"] or ""))
@@ -2040,24 +4475,78 @@ class PatientTaskApp(QMainWindow):
                 color = QtGui.QColor("#555555")
             elif is_completed:
                 color = QtGui.QColor("#2ecc71")
+            elif clock and datetime.combine(sel, clock) <= now:
+                color = QtGui.QColor("#e74c3c")
             else:
-                if r["time"]:
-                    try:
-                        hh, mm = map(int, r["time"].split(":"))
-                        tdt = datetime.combine(sel, time(hh, mm))
-                        if tdt <= now:
-                            color = QtGui.QColor("#e74c3c")
-                        else:
-                            color = QtGui.QColor("#7f8c8d")
-                    except:
-                        color = QtGui.QColor("#7f8c8d")
-                else:
-                    color = QtGui.QColor("#7f8c8d")
+                color = QtGui.QColor("#7f8c8d")
             for c in range(self.calendar_table.columnCount()):
                 it = self.calendar_table.item(row, c)
                 if it:
                     it.setBackground(color)
                     it.setForeground(QtGui.QBrush(Qt.white))
+        self.calendar_table.setUpdatesEnabled(True)
+
+    def prefetch_calendar_days(self, sel):
+        days = [sel + timedelta(days=i) for i in range(-CALENDAR_PREFETCH_DAYS, CALENDAR_PREFETCH_DAYS + 1)]
+        days = [d for d in days if d not in self.calendar_cache]
+        if not days or self.calendar_workers:
+            return
+        worker = CalendarPrefetchWorker(self.calendar_cache_generation, days, self)
+        worker.days_ready.connect(self.on_calendar_days_ready)
+        worker.finished.connect(partial(self.on_calendar_worker_finished, worker))
+        self.calendar_workers.append(worker)
+        worker.start()
+
+    def on_calendar_days_ready(self, generation, result):
+        # Önbellek bu arada geçersiz kılındıysa eski sonuçları at
+        if generation != self.calendar_cache_generation:
+            return
+        for d, entries in result.items():
+            self.calendar_cache.setdefault(d, entries)
+
+    def on_calendar_worker_finished(self, worker):
+        if worker in self.calendar_workers:
+            self.calendar_workers.remove(worker)
+        worker.deleteLater()
+        # Çalışan meşgulken seçim değiştiyse ya da önbellek temizlendiyse komşuları yeniden getir
+        if not worker.failed:
+            self.prefetch_calendar_days(self.calendar.selectedDate().toPyDate())
+
+    def invalidate_calendar_cache(self):
+        self.calendar_cache.clear()
+        self.calendar_cache_generation += 1
+
+    def patch_calendar_cache(self, task_id):
+        # Önbellekteki günlerde yalnızca bu görevi yeniden değerlendir
+        self.calendar_cache_generation += 1  # süren ön yüklemenin eski sonuçları atılır
+        if not self.calendar_cache:
+            return
+        t = self.tasks_by_id.get(task_id)
+        completion_dates = set()
+        if t:
+            first, last = min(self.calendar_cache), max(self.calendar_cache)
+            conn = get_completions_conn(first, last)
+            cur = conn.cursor()
+            cur.execute(QUERIES["task_completion_dates"].sql, (task_id, first.isoformat(), last.isoformat()))
+            completion_dates = {r["completion_date"] for r in cur.fetchall()}
+            conn.close()
+        for d, entries in self.calendar_cache.items():
+            entries[:] = [e for e in entries if e[0]["id"] != task_id]
+            if t:
+                entries.extend(calendar_day_entries([t], d, {task_id} if d.isoformat() in completion_dates else set()))
+        if self.calendar.selectedDate().toPyDate() in self.calendar_cache:
+            self.invalidate("calendar")
+
+    def on_task_changed_calendar(self, event):
+        self.patch_calendar_cache(event.task_id)
+
+    def on_completion_recorded_calendar(self, event):
+        self.patch_calendar_cache(event.task_id)
+
+    def on_patient_changed_calendar(self, event):
+        # Hasta değişiklikleri seyrek; önbelleği bırakıp görünen günü yeniden hesapla
+        self.invalidate_calendar_cache()
+        self.invalidate("calendar")
 
     def show_task_list(self, kind):
         conn = get_conn()
@@ -2065,32 +4554,22 @@ class PatientTaskApp(QMainWindow):
         timeout_hours = self.settings.get("completed_task_timeout", 4)
         now = datetime.now()
         today = date.today()
-        overdue_threshold = timedelta(hours=24)
         if kind == "all":
-            cur.execute("SELECT t.*, p.name, p.surname FROM tasks t LEFT JOIN patients p ON p.room_number=t.room_number WHERE t.date=?", (today.isoformat(),))
+            cur.execute(QUERIES["task_list_all"].sql, (today.toordinal(),))
         elif kind == "done":
-            cur.execute("SELECT t.*, p.name, p.surname FROM tasks t LEFT JOIN patients p ON p.room_number=t.room_number WHERE done=1 AND t.date=?", (today.isoformat(),))
+            cur.execute(QUERIES["task_list_done"].sql, (today.toordinal(),))
         elif kind == "waiting":
-            cur.execute("SELECT t.*, p.name, p.surname FROM tasks t LEFT JOIN patients p ON p.room_number=t.room_number WHERE done=0 AND cancelled=0 AND t.date=?", (today.isoformat(),))
+            cur.execute(QUERIES["task_list_waiting"].sql, (today.toordinal(),))
         elif kind == "upcoming":
-            cur.execute("SELECT t.*, p.name, p.surname FROM tasks t LEFT JOIN patients p ON p.room_number=t.room_number WHERE t.date > ? AND t.date <= ?", (today.isoformat(), (today + timedelta(days=1)).isoformat()))
+            cur.execute(QUERIES["task_list_upcoming"].sql, (today.toordinal(), today.toordinal() + 1))
         elif kind == "cancelled":
-            cur.execute("SELECT t.*, p.name, p.surname FROM tasks t LEFT JOIN patients p ON p.room_number=t.room_number WHERE cancelled=1 AND t.date=?", (today.isoformat(),))
+            cur.execute(QUERIES["task_list_cancelled"].sql, (today.toordinal(),))
         rows = cur.fetchall()
         conn.close()
         tasks = []
         for r in rows:
-            # Skip overdue
-            try:
-                if r["time"] and r["time_type"] == "Saat Belirt":
-                    hh, mm = map(int, r["time"].split(":"))
-                    tdt = datetime.combine(today, time(hh, mm))
-                else:
-                    tdt = datetime.combine(today, time(12, 0))
-                if tdt < now - overdue_threshold:
-                    continue
-            except:
-                pass
+            if is_overdue(r, today, now):
+                continue
             if r["done"] and r["completed_time"]:
                 try:
                     completed_dt = datetime.strptime(r["completed_time"], "%Y-%m-%d %H:%M:%S")
@@ -2115,8 +4594,12 @@ class PatientTaskApp(QMainWindow):
             time_str = now.strftime("%I:%M:%S %p")
         else:
             time_str = now.strftime("%H:%M:%S")
-        self.center_clock.setText(f"<div style='font-size: 48px;'>{time_str}</div><div style='font-size: 18px;'>{now.strftime(f'%d {month_name} %Y')}</div>")
+        text = f"<div style='font-size: 48px;'>{time_str}</div><div style='font-size: 18px;'>{now.strftime(f'%d {month_name} %Y')}</div>"
+        if text != self.clock_text:
+            self.clock_text = text
+            self.center_clock.setText(text)
 
+    @timed()
     def apply_theme(self, name):
         t = THEMES.get(name, THEMES["Galatasaray"])
         font_size = self.settings.get("font_size", 14)
@@ -2156,6 +4639,7 @@ class PatientTaskApp(QMainWindow):
         """)
         self.update_theme_preview()
 
+    @timed()
     def apply_font_size(self, sz):
         f = QFont("Helvetica", sz)
         self.setFont(f)
@@ -2168,60 +4652,70 @@ class PatientTaskApp(QMainWindow):
         # Stil sayfalarını güncelle
         self.apply_theme(self.settings.get("theme", "Galatasaray"))
 
+    def watch_settings(self):
+        # Her ayar yalnızca kendisinden etkilenen görünümü günceller; diske yazma SettingsStore'da ertelenir
+        self.settings.observe("theme", self.apply_theme)
+        self.settings.observe("font_size", lambda _: self.refresh_scheduler.invalidate_later(
+            "font", "patients", "tasks", "archive", "calendar", "sections"))
+        self.settings.observe("completed_task_timeout", lambda _: self.invalidate("sections"))
+        self.settings.observe("clock_format", lambda _: self.update_clock())
+        self.settings.observe(SHIFT_TIME_KEYS, lambda _: self.refresh_scheduler.invalidate_later("sections"))
+        self.settings.observe(SHIFT_TIME_KEYS, lambda _: self.update_shift_titles())
+        self.settings.observe(("sync_enabled", "sync_port", "sync_peers", "sync_bind", "sync_token"), lambda _: self.restart_sync())
+        self.settings.observe(("api_enabled", "api_port", "api_bind", "api_token"), lambda _: self.restart_api())
+        self.settings.observe("perf_enabled", self.on_perf_toggled)
+        self.settings.observe("stall_threshold_ms", self.on_stall_threshold_changed)
+
+    def update_shift_titles(self):
+        s = self.settings
+        self.tasks_subtab.setTabText(0, f"Gündüz Vardiyası ({s.get('day_start')}-{s.get('day_end')})")
+        self.tasks_subtab.setTabText(1, f"Akşam Gece Vardiyası ({s.get('night_start')}-{s.get('night_end')})")
+
     def on_theme_changed(self, i):
-        name = self.theme_combo.currentText()
-        self.settings["theme"] = name
-        save_settings(self.settings)
-        self.apply_theme(name)
+        self.settings["theme"] = self.theme_combo.currentText()
 
     def on_font_changed(self, val):
+        # Kaydırıcı sürüklenirken her adımda değil, durduktan sonra bir kez uygula ve yenile
         self.settings["font_size"] = val
-        save_settings(self.settings)
-        self.apply_font_size(val)
-        self.apply_theme(self.settings.get("theme", "Galatasaray"))  # Tema ve yazı boyutunu yeniden uygula
-        self.refresh_all()  # Tüm bölümleri yenile
 
     def on_notify_changed(self, state):
         self.settings["notifications_enabled"] = bool(state)
-        save_settings(self.settings)
 
     def on_timeout_changed(self, i):
         self.settings["completed_task_timeout"] = int(self.timeout_combo.currentText())
-        save_settings(self.settings)
-        self.refresh_all()
 
     def on_clock_format_changed(self, i):
         self.settings["clock_format"] = self.clock_format.currentText()
-        save_settings(self.settings)
-        self.update_clock()
 
     def on_auto_refresh_changed(self, state):
         self.settings["auto_refresh"] = bool(state)
-        save_settings(self.settings)
 
     def on_notification_duration_changed(self, val):
         self.settings["notification_duration"] = val
-        save_settings(self.settings)
+
+    def on_history_days_changed(self, val):
+        self.settings["completion_history_days"] = val
+
+    def on_retention_days_changed(self, val):
+        self.settings["task_retention_days"] = val
+
+    def on_backup_interval_changed(self, val):
+        self.settings["backup_interval_hours"] = val
+
+    def on_backup_keep_changed(self, val):
+        self.settings["backup_keep"] = val
 
     def on_day_start_changed(self, time_val):
         self.settings["day_start"] = time_val.toString("HH:mm")
-        save_settings(self.settings)
-        self.refresh_all()
 
     def on_day_end_changed(self, time_val):
         self.settings["day_end"] = time_val.toString("HH:mm")
-        save_settings(self.settings)
-        self.refresh_all()
 
     def on_night_start_changed(self, time_val):
         self.settings["night_start"] = time_val.toString("HH:mm")
-        save_settings(self.settings)
-        self.refresh_all()
 
     def on_night_end_changed(self, time_val):
         self.settings["night_end"] = time_val.toString("HH:mm")
-        save_settings(self.settings)
-        self.refresh_all()
 
     def update_theme_preview(self):
         t = THEMES.get(self.theme_combo.currentText(), THEMES["Galatasaray"])
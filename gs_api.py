@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+İstasyon tabletleri için salt okunur JSON API (Qt kullanmaz)
+ - GET /patients, /tasks[?shift=day&section=upcoming], /tasks/due[?shift=night], /calendar/YYYY-AA-GG
+ - Görevler masaüstü panolarıyla aynı sınıflandırmadan (gs_core.classify_snapshot) gelir
+ - ETag: süreç belirteci + veritabanı değişiklik sürümü (PRAGMA data_version) + dakika + ayar dosyası;
+   If-None-Match eşleşirse veri okunmadan 304 döner, değişmeyen yanıtlar önbellekten gönderilir
+ - Her istek ortak anahtarı (Authorization: Bearer) taşımak zorundadır, yoksa 401 döner; sunucu varsayılan
+   olarak yalnızca 127.0.0.1 adresini dinler (api_bind, api_token ayarları)
+ - Tek iş parçacığında asyncio sunucusu; uygulamada ayarlardan açılır ya da tek başına çalışır:
+   python gs_api.py [port] (adres ve anahtar ayarlardan) | python gs_api.py bench [saniye] [istemci sayısı]
+"""
+
+import os, sys, json, sqlite3, asyncio, threading, time, uuid, hmac
+from datetime import datetime, date
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+from urllib.request import urlopen, Request
+
+from gs_core import (
+    DB_PATH, HISTORY_DB_PATH, SETTINGS_PATH, SECTION_TITLES, SHIFTS, QUERIES, ChangeWatcher, load_snapshot,
+    classify_snapshot, task_json, task_clock, calendar_day_entries, visible_calendar_entries, completed_task_ids,
+    completion_partition, load_settings,
+)
+
+API_PORT = 8766
+API_KEEPALIVE_SEC = 30  # boşta bekleyen tablet bağlantıları bu süreden sonra kapatılır
+API_CACHE_SIZE = 64  # önbellekteki en fazla yanıt; takvim günleri de ayrı yanıt sayılır
+API_MAX_HEADERS = 100
+SECTIONS = [section for section, _ in SECTION_TITLES]
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def matches(if_none_match, etag):
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+def error_body(message):
+    return json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+def response(status, etag, body, head=False, keep_alive=True):
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", "Cache-Control: no-cache"]
+    if etag:
+        lines.append(f"ETag: {etag}")
+    if status != 304:
+        lines += ["Content-Type: application/json; charset=utf-8", f"Content-Length: {len(body)}"]
+    if status == 405:
+        lines.append("Allow: GET, HEAD")
+    if status == 401:
+        lines.append("WWW-Authenticate: Bearer")
+    if not keep_alive:
+        lines.append("Connection: close")
+    head_bytes = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+    return head_bytes if head or status == 304 else head_bytes + body
+
+class TaskApi:
+    """Routes, ETags and the response cache; lives on the event loop thread that owns the read-only connection."""
+
+    def __init__(self, token):
+        self.watcher = ChangeWatcher()
+        self.auth = f"Bearer {token}".encode("utf-8")
+        self.instance = uuid.uuid4().hex[:8]  # yeniden başlatılan sunucu eski ETag'lerle eşleşmez
+        self.cache = {}  # (kaynak, parametreler) -> (etag, gövde)
+        self.placed = (None, [])  # (etag, [task_json]): tüm /tasks istekleri tek sınıflandırmayı paylaşır
+        self.history = False
+        self.writers = set()
+
+    def close(self):
+        for writer in list(self.writers):
+            writer.close()
+        self.watcher.close()
+
+    def etag(self, now=None):
+        """Changes whenever the response may: a commit from any connection and, for time-dependent
+        resources, the minute (tasks move between sections) and the settings file (shift hours)."""
+        self.watcher.poll()
+        parts = [self.instance, str(self.watcher.version)]
+        if now is not None:
+            try:
+                settings = os.stat(SETTINGS_PATH).st_mtime_ns
+            except OSError:
+                settings = 0
+            parts += [now.strftime("%Y%m%d%H%M"), str(settings)]
+        return '"' + "-".join(parts) + '"'
+
+    def respond(self, method, target, headers):
+        """Return (status, etag, body) for one request."""
+        if not hmac.compare_digest(headers.get("authorization", "").encode("utf-8"), self.auth):
+            raise ApiError(401, "geçersiz ya da eksik anahtar")
+        if method not in ("GET", "HEAD"):
+            raise ApiError(405, "yalnızca GET desteklenir")
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        path = url.path.rstrip("/")
+        # Dakikaya yuvarlanır: aynı ETag her zaman aynı gövdeyi üretir
+        now = datetime.now().replace(second=0, microsecond=0)
+        if path == "/patients":
+            key, etag, build = ("patients",), self.etag(), self.patients
+        elif path in ("/tasks", "/tasks/due"):
+            shift = query.get("shift")
+            section = "due" if path == "/tasks/due" else query.get("section")
+            if shift is not None and shift not in SHIFTS:
+                raise ApiError(400, f"shift: {', '.join(SHIFTS)}")
+            if section is not None and section not in SECTIONS:
+                raise ApiError(400, f"section: {', '.join(SECTIONS)}")
+            key, etag = ("tasks", shift, section), self.etag(now)
+            build = lambda: self.tasks(now, etag, shift, section)
+        elif path.startswith("/calendar/"):
+            try:
+                day = date.fromisoformat(path[len("/calendar/"):])
+            except ValueError:
+                raise ApiError(400, "tarih YYYY-AA-GG biçiminde olmalı")
+            key, etag = ("calendar", day), self.etag(now)
+            build = lambda: self.calendar(day, now)
+        else:
+            raise ApiError(404, "bilinmeyen adres")
+        if matches(headers.get("if-none-match", ""), etag):
+            return 304, etag, b""
+        cached = self.cache.get(key)
+        if cached and cached[0] == etag:
+            return 200, etag, cached[1]
+        body = json.dumps(build(), ensure_ascii=False).encode("utf-8")
+        if len(self.cache) >= API_CACHE_SIZE:
+            self.cache.clear()
+        self.cache[key] = (etag, body)
+        return 200, etag, body
+
+    def patients(self):
+        cur = self.watcher.conn.execute(QUERIES["patient_names"].sql)
+        return [{"room_number": r["room_number"], "name": r["name"], "surname": r["surname"]} for r in cur.fetchall()]
+
+    def tasks(self, now, etag, shift, section):
+        if self.placed[0] != etag:
+            snap = load_snapshot(now, conn=self.watcher.conn)
+            self.placed = (etag, [task_json(*p) for p in classify_snapshot(snap)])
+        return [r for r in self.placed[1] if (shift is None or r["shift"] == shift) and (section is None or r["section"] == section)]
+
+    def completed_on(self, day):
+        conn = self.watcher.conn
+        completed = completed_task_ids(conn, day)
+        if not os.path.exists(HISTORY_DB_PATH):
+            return completed
+        if not self.history:
+            conn.execute("ATTACH DATABASE ? AS hist", (f"file:{HISTORY_DB_PATH}?mode=ro",))
+            self.history = True
+        table = completion_partition(day.strftime("%Y-%m"))
+        if conn.execute("SELECT 1 FROM hist.sqlite_master WHERE type='table' AND name=?", (table,)).fetchone():
+            cur = conn.execute(f"SELECT task_id FROM hist.{table} WHERE completion_date=?", (day.isoformat(),))
+            completed |= {r[0] for r in cur.fetchall()}
+        return completed
+
+    def calendar(self, day, now):
+        """The calendar tab's list for one day, with the same overdue filtering and statuses."""
+        rows = self.watcher.conn.execute(QUERIES["calendar_tasks"].sql).fetchall()
+        entries = visible_calendar_entries(calendar_day_entries(rows, day, self.completed_on(day)), day, now)
+        result = []
+        for r, is_completed in entries:
+            clock = task_clock(r)
+            if is_completed:
+                status = "completed"
+            elif r["cancelled"]:
+                status = "cancelled"
+            elif clock and datetime.combine(day, clock) <= now:
+                status = "waiting"
+            else:
+                status = "upcoming"
+            result.append({
+                "id": r["id"], "room_number": r["room_number"],
+                "patient": f"{r['name'] or ''} {r['surname'] or ''}".strip(),
+                "task": r["task"], "time": r["time"], "time_type": r["time_type"], "repeat_type": r["repeat_type"],
+                "status": status,
+            })
+        return result
+
+    def dispatch(self, method, target, headers):
+        try:
+            return self.respond(method, target, headers)
+        except ApiError as e:
+            status, message = e.status, str(e)
+        except sqlite3.Error as e:
+            status, message = 503, f"veritabanı okunamadı: {e}"
+        except Exception as e:
+            print(f"API error ({target}): {e}")
+            status, message = 500, "iç hata"
+        return status, None, error_body(message)
+
+    async def handle(self, reader, writer):
+        """One client connection: HTTP/1.1 with keep-alive, GET and HEAD only."""
+        self.writers.add(writer)
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), API_KEEPALIVE_SEC)
+                except asyncio.TimeoutError:
+                    break
+                if not line:
+                    break
+                headers = {}
+                for _ in range(API_MAX_HEADERS):
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = h.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                else:
+                    break
+                parts = line.decode("latin-1").split()
+                if len(parts) != 3:
+                    writer.write(response(400, None, error_body("hatalı istek"), keep_alive=False))
+                    break
+                method, target, version = parts
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                status, etag, body = self.dispatch(method, target, headers)
+                keep_alive = keep_alive and status != 405  # gövdeli istekler okunmaz; bağlantı kapatılır
+                writer.write(response(status, etag, body, method == "HEAD", keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass  # kopan bağlantı ya da sınırı aşan satır
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+async def serve(port, host, token, stop, ready=None):
+    api = TaskApi(token)
+    try:
+        server = await asyncio.start_server(api.handle, host, port, reuse_address=True)
+        if ready:
+            ready.set()
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        finally:
+            server.close()
+            await server.wait_closed()
+    finally:
+        stop.set()  # hata ile çıkılırsa bekleyen iş parçacığı da bırakılır
+        api.close()
+
+def run_server(port=API_PORT, host="127.0.0.1", token="", stop=None, ready=None):
+    """Serve the API on the calling thread until stop is set."""
+    if not token:
+        raise ValueError("Tablet API için ortak anahtar gerekli")
+    asyncio.run(serve(port, host, token, stop or threading.Event(), ready))
+
+# Load test
+async def bench_client(port, path, token, conditional, deadline, counts):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    etag = None
+    try:
+        while time.perf_counter() < deadline:
+            extra = f"If-None-Match: {etag}\r\n" if conditional and etag else ""
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\nAuthorization: Bearer {token}\r\n{extra}\r\n".encode("latin-1"))
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (h := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = h.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+                elif name.lower() == "etag":
+                    etag = value.strip()
+            await reader.readexactly(length)
+            counts[status] = counts.get(status, 0) + 1
+    finally:
+        writer.close()
+
+def bench(seconds=5, clients=8, port=18766, path="/tasks/due?shift=day"):
+    stop, ready = threading.Event(), threading.Event()
+    token = uuid.uuid4().hex
+    thread = threading.Thread(target=run_server, args=(port, "127.0.0.1", token, stop, ready), daemon=True)
+    thread.start()
+    if not ready.wait(10):
+        raise TimeoutError("API sunucusu başlamadı")
+    result = {"path": path, "clients": clients, "seconds": seconds}
+    try:
+        t0 = time.perf_counter()
+        # İlk istek sınıflandırmayı yapar
+        urlopen(Request(f"http://127.0.0.1:{port}{path}", headers={"Authorization": f"Bearer {token}"}), timeout=30).read()
+        result["first_request_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        for phase, conditional in (("cached_200", False), ("conditional_304", True)):
+            counts = {}
+            deadline = time.perf_counter() + seconds
+
+            async def run_clients():
+                await asyncio.gather(*(bench_client(port, path, token, conditional, deadline, counts) for _ in range(clients)))
+            asyncio.run(run_clients())
+            result[phase] = {"requests_per_sec": round(sum(counts.values()) / seconds, 1), "statuses": counts}
+    finally:
+        stop.set()
+        thread.join()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return result
+
+if __name__ == "__main__":
+    if not os.path.exists(DB_PATH):
+        print(f"Veritabanı bulunamadı: {DB_PATH}", file=sys.stderr)
+        sys.exit(1)
+    if len(sys.argv) > 1 and sys.argv[1] == "bench":
+        bench(*(int(a) for a in sys.argv[2:4]))
+    elif len(sys.argv) <= 2 and all(a.isdigit() for a in sys.argv[1:]):
+        settings = load_settings()
+        try:
+            run_server(int(sys.argv[1]) if len(sys.argv) > 1 else settings.get("api_port", API_PORT),
+                       settings.get("api_bind", "127.0.0.1"), settings.get("api_token", ""))
+        except KeyboardInterrupt:
+            pass
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            sys.exit(1)
+    else:
+        print("Kullanım: gs_api.py [port] | bench [saniye] [istemci sayısı]")
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sentetik veri üretici ve sıcak yol ölçümleri
+ - Tohumlu üretici: hastalar (fotoğraflı), tüm tekrar türlerinde görevler, yıllara yayılan tamamlanma
+   kayıtları (geçmiş veritabanına taşınmış) ve arşiv
+ - Ölçümler Qt "offscreen" platformunda, her ölçek ayrı süreçte ve ayrı GS_DATA_DIR altında çalışır
+ - python gs_bench.py run [--scales small,medium,large] [--out bench.json]
+ - python gs_bench.py generate <klasör> [--scale medium]
+ - python gs_bench.py plans [--scale large | --data-dir <klasör>]: adlandırılmış sorguların planlarını denetler;
+   sıcak bir sorgu tam tarama ya da geçici B-ağacı kullanırsa 1 ile çıkar
+ - python gs_bench.py idle [--scale small] [--seconds 60]: dokunulmayan pencerenin görünür ve gizliyken
+   dakikadaki işlemci süresi ve zamanlayıcı uyanışları
+ - python gs_bench.py archive [--scale small] [--retention-days 10]: süresi dolan görevleri arşivler ve
+   tamamlanma geçmişlerinin korunduğunu denetler; kayıp varsa 1 ile çıkar
+"""
+
+import os, sys, json, random, struct, zlib, time, tempfile, subprocess, argparse, platform, statistics
+from datetime import date, timedelta
+
+import gs_core
+import gs_sync
+
+# Ölçek: (hasta, görev, tamamlanma geçmişi gün sayısı)
+SCALES = {
+    "small": (20, 150, 90),
+    "medium": (80, 1500, 365),
+    "large": (200, 5000, 1095),
+}
+DEFAULT_REPEAT = 5
+COMPLETION_RATE = 0.9
+ARCHIVE_RATE = 0.1
+PHOTO_RATE = 0.8
+
+FIRST_NAMES = ["Ahmet", "Mehmet", "Ayşe", "Fatma", "Mustafa", "Emine", "Hasan", "Hatice", "Hüseyin", "Zeynep", "İbrahim", "Elif"]
+SURNAMES = ["Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Aydın", "Öztürk", "Arslan", "Doğan", "Kılıç", "Aslan"]
+TASK_NAMES = ["İlaç", "Tansiyon Ölçümü", "Şeker Ölçümü", "Pansuman", "Fizik Tedavi", "Banyo", "Yara Bakımı", "Sıvı Takibi"]
+REPEAT_WEIGHTS = [("Her Gün", 40), ("Tek Günler", 10), ("Çift Günler", 10), ("Haftanın Günleri", 15), ("Kaç Günde Bir", 10), ("", 15)]
+TIME_TYPE_WEIGHTS = [("Saat Belirt", 70), ("Gün İçinde", 15), ("Akşam", 15)]
+
+def weighted(rng, pairs):
+    return rng.choices([v for v, _ in pairs], [w for _, w in pairs])[0]
+
+def noise_png(rng, size=96):
+    """Random RGB PNG, close to a compressed photo in stored size."""
+    raw = b"".join(b"\x00" + bytes(rng.getrandbits(8) for _ in range(size * 3)) for _ in range(size))
+    chunk = lambda kind, data: struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+def scheduled(task, day):
+    rt, start = task["repeat_type"], task["start"]
+    if day < start or (task["end"] and day > task["end"]):
+        return False
+    if rt == "Her Gün":
+        return True
+    if rt == "Tek Günler":
+        return day.day % 2 == 1
+    if rt == "Çift Günler":
+        return day.day % 2 == 0
+    if rt == "Haftanın Günleri":
+        return day.weekday() in task["weekdays"]
+    if rt == "Kaç Günde Bir":
+        return (day - start).days % task["interval"] == 0
+    return day == start
+
+def generate(gs, scale, seed):
+    """Fill the database under gs.DATA_DIR; returns fixture statistics."""
+    residents, task_count, history_days = SCALES[scale]
+    rng = random.Random(seed)
+    today = date.today()
+    t0 = time.time()
+    photos = [noise_png(rng) for _ in range(8)]
+    rooms = [str(100 + i) for i in range(residents)]
+    patients = [
+        (room, rng.choice(FIRST_NAMES), rng.choice(SURNAMES), "", rng.choice(photos) if rng.random() < PHOTO_RATE else None)
+        for room in rooms
+    ]
+    tasks = []
+    for i in range(task_count):
+        rt = weighted(rng, REPEAT_WEIGHTS)
+        tt = weighted(rng, TIME_TYPE_WEIGHTS)
+        if rt:
+            start = today - timedelta(days=rng.randint(0, history_days))
+        else:
+            start = today + timedelta(days=rng.randint(-30, 30))
+        end = start + timedelta(days=rng.randint(30, 2 * history_days)) if rt and rng.random() < 0.1 else None
+        tasks.append({
+            "room": rng.choice(rooms), "task": rng.choice(TASK_NAMES), "repeat_type": rt, "time_type": tt,
+            "time": f"{rng.randint(0, 23):02d}:{rng.choice([0, 15, 30, 45]):02d}" if tt == "Saat Belirt" else None,
+            "start": start, "end": end, "cancelled": int(rng.random() < 0.03),
+            "weekdays": sorted(rng.sample(range(7), rng.randint(1, 3))), "interval": rng.randint(2, 4),
+        })
+
+    conn = gs.get_conn()
+    cur = conn.cursor()
+    gs_sync.set_local_only(cur, True)  # fikstür verisi eşitleme günlüğüne yazılmaz
+    cur.executemany("INSERT INTO patients (room_number, name, surname, notes, photo) VALUES (?,?,?,?,?)", patients)
+    for t in tasks:
+        cur.execute(
+            """INSERT INTO tasks (room_number, task, time, time_type, repeat_type, date, end_date, cancelled, repeat_days, repeat_interval, done, notified)
+            VALUES (?,?,?,?,?,?,?,?,?,?,0,0)""",
+            (t["room"], t["task"], t["time"], t["time_type"], t["repeat_type"], t["start"].isoformat(),
+             t["end"].isoformat() if t["end"] else None, t["cancelled"],
+             ",".join(map(str, t["weekdays"])) if t["repeat_type"] == "Haftanın Günleri" else None,
+             t["interval"] if t["repeat_type"] == "Kaç Günde Bir" else None)
+        )
+        t["id"] = cur.lastrowid
+    completions = 0
+    batch = []
+    for d in range(history_days, 0, -1):
+        day = today - timedelta(days=d)
+        for t in tasks:
+            if not t["cancelled"] and scheduled(t, day) and rng.random() < COMPLETION_RATE:
+                batch.append((t["id"], day.isoformat()))
+        if len(batch) >= 50000:
+            cur.executemany("INSERT INTO task_completions (task_id, completion_date) VALUES (?,?)", batch)
+            completions += len(batch)
+            batch = []
+    cur.executemany("INSERT INTO task_completions (task_id, completion_date) VALUES (?,?)", batch)
+    completions += len(batch)
+    gs_sync.set_local_only(cur, False)
+    conn.commit()
+    conn.close()
+
+    archived = rng.sample(patients, max(1, int(residents * ARCHIVE_RATE)))
+    conn = gs.get_archive_conn()
+    cur = conn.cursor()
+    cur.executemany(
+        "INSERT INTO arc.archive_patients (room_number, name, surname, notes, photo) VALUES (?,?,?,?,?)",
+        [(f"A{p[0]}",) + p[1:] for p in archived]
+    )
+    cur.executemany(
+        "INSERT INTO arc.archive (room_number, task, time, date, end_date, time_type) VALUES (?,?,?,?,?,?)",
+        [(f"A{p[0]}", rng.choice(TASK_NAMES), "09:00", (today - timedelta(days=rng.randint(0, history_days))).isoformat(), None, "Saat Belirt")
+         for p in archived for _ in range(rng.randint(3, 15))]
+    )
+    conn.commit()
+    conn.close()
+    moved = gs.move_old_completions(gs.DEFAULT_SETTINGS["completion_history_days"])
+    return {
+        "residents": residents, "tasks": task_count, "history_days": history_days, "completions": completions,
+        "completions_in_history": moved, "archived_residents": len(archived),
+        "db_bytes": sum(os.path.getsize(p) for p in (gs.DB_PATH, gs.HISTORY_DB_PATH, gs.ARCHIVE_DB_PATH) if os.path.exists(p)),
+        "generate_sec": round(time.time() - t0, 3),
+    }
+
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {
+        "runs": repeat, "min_ms": round(min(samples), 3), "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3), "max_ms": round(max(samples), 3),
+    }
+
+def measure(scale, seed, repeat):
+    """Runs inside a child process whose GS_DATA_DIR is an empty directory."""
+    import gs
+    from PyQt5.QtWidgets import QApplication, QDialog
+    from PyQt5.QtCore import QT_VERSION_STR
+    fixture = generate(gs, scale, seed)
+    gs.NotificationDialog.exec_ = lambda self: QDialog.Accepted  # bildirim penceresi ölçümü bekletmesin
+    app = QApplication([sys.argv[0]])
+    w = gs.PatientTaskApp()
+    app.processEvents()
+
+    def refresh_all():
+        w.refresh_all()
+        w.refresh_scheduler.flush()
+
+    def reload_calendar_tasks():
+        w.invalidate_calendar_cache()  # önbellek olmadan: görev değişikliğinden sonraki ilk çizim
+        w.reload_calendar_tasks()
+        app.processEvents()
+
+    refresh_all()
+    timings = {}
+    for name, fn in (
+        ("refresh_all", refresh_all),
+        ("update_task_sections", w.update_task_sections),
+        ("update_flashing", w.update_flashing),
+        ("reload_calendar_tasks", reload_calendar_tasks),
+        ("check_notifications", w.check_notifications),
+        ("reload_archive", w.reload_archive),
+    ):
+        timings[name] = time_calls(fn, repeat)
+        app.processEvents()
+    while w.calendar_workers:
+        app.processEvents()
+    return {"fixture": fixture, "timings": timings, "qt": QT_VERSION_STR}
+
+def idle(seconds):
+    """Runs inside a child process: CPU time and timer wakeups of an untouched window, first shown, then hidden."""
+    import gs
+    from PyQt5.QtWidgets import QApplication, QDialog
+    from PyQt5.QtCore import QEventLoop, QTimer
+    gs.NotificationDialog.exec_ = lambda self: QDialog.Accepted
+    for name in ("move_completion_history", "archive_expired", "backup_if_due", "maintenance_if_idle"):
+        setattr(gs.PatientTaskApp, name, lambda self: None)  # arka plan işleri ölçüme karışmasın
+    app = QApplication([sys.argv[0]])
+    w = gs.PatientTaskApp()
+    w.show()
+    app.processEvents()
+    w.refresh_scheduler.flush()
+    result = {"seconds": seconds, "due_sections": sum(1 for _, section in w.section_groups if section == "due")}
+    for phase in ("shown", "hidden"):
+        if phase == "hidden":
+            w.hide()
+        loop = QEventLoop()
+        QTimer.singleShot(seconds * 1000, loop.quit)
+        cpu, wakeups = time.process_time(), w.timers.wakeups
+        loop.exec_()
+        per_min = 60 / seconds
+        result[phase] = {
+            "cpu_ms_per_min": round((time.process_time() - cpu) * 1000 * per_min, 1),
+            "wakeups_per_min": round((w.timers.wakeups - wakeups) * per_min, 1),
+            "active_jobs": [name for name, job in w.timers.jobs.items() if job.active],
+        }
+    return result
+
+def check_plans(gs, verbose):
+    conn = gs.get_completions_conn(archived=True)
+    failed = []
+    for name, query, plan, problems in gs_core.check_query_plans(conn):
+        bad = problems and query.hot
+        print(f"{'HATA' if bad else 'OK  '} {name}")
+        if bad or verbose:
+            for detail in plan:
+                print(f"       {'!' if detail in problems else ' '} {detail}")
+        if bad:
+            failed.append(name)
+    conn.close()
+    if failed:
+        print(f"{len(failed)} sorgu indeks kullanmıyor: {', '.join(failed)}")
+    return 1 if failed else 0
+
+def check_archive(gs, retention_days):
+    """Archive expired tasks and verify that every completion of the moved tasks is still in all_completions
+    and that the compliance report and the completion export are unchanged."""
+    params = {"cutoff": date.today().toordinal() - retention_days}
+    conn = gs.get_conn()
+    expiring = [r[0] for r in conn.execute(f"SELECT id FROM tasks WHERE {gs.EXPIRED_TASKS_WHERE}", params)]
+    finished = conn.execute(
+        f"SELECT COUNT(*) FROM tasks WHERE ({gs.EXPIRED_TASKS_WHERE}) AND COALESCE(repeat_type, '') = '' AND cancelled=0", params
+    ).fetchone()[0]
+    conn.close()
+
+    def history():
+        conn = gs.get_completions_conn()
+        rows = conn.execute(
+            "SELECT id, task_id, completion_date FROM all_completions WHERE task_id IN (SELECT value FROM json_each(?)) ORDER BY id",
+            (json.dumps(expiring),)
+        ).fetchall()
+        conn.close()
+        return [tuple(r) for r in rows]
+
+    def reports():
+        start = date.today() - timedelta(days=365)
+        shifts = [tuple(r.values()) for r in gs.compliance_report(start, date.today(), "shift")]
+        unmatched = sum(1 for r in gs.iter_export_rows("task_completions") if r[4] == "")
+        return shifts, unmatched
+
+    before, reports_before = history(), reports()
+    moved = gs.archive_expired_tasks(retention_days)
+    after, reports_after = history(), reports()
+    conn = gs.get_conn()
+    left = conn.execute("SELECT COUNT(*) FROM tasks WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(expiring),)).fetchone()[0]
+    conn.close()
+    problems = []
+    if moved != len(expiring) or left:
+        problems.append(f"{len(expiring)} görevden {moved} taşındı, {left} görev kaldı")
+    if not finished:
+        problems.append("tamamlanmış tek seferlik görev arşivlenmedi")
+    if after != before:
+        problems.append(f"tamamlanma geçmişi {len(before)} kayıttan {len(after)} kayda düştü")
+    if reports_after[0] != reports_before[0]:
+        problems.append(f"uyum raporu değişti: {reports_before[0]} -> {reports_after[0]}")
+    if reports_after[1] != reports_before[1]:
+        problems.append(f"dışa aktarımda görevi bulunamayan tamamlanma kaydı {reports_before[1]} -> {reports_after[1]}")
+    print(f"{'HATA' if problems else 'OK  '} {moved} görev arşivlendi ({finished} tamamlanmış tek seferlik), "
+          f"{len(after)}/{len(before)} tamamlanma kaydı korundu")
+    for problem in problems:
+        print(f"       ! {problem}")
+    return 1 if problems else 0
+
+def in_data_dir(data_dir, argv):
+    """Re-run this command in a child whose GS_DATA_DIR is data_dir (paths are fixed when gs is imported)."""
+    os.makedirs(data_dir, exist_ok=True)
+    env = dict(os.environ, GS_DATA_DIR=os.path.abspath(data_dir), QT_QPA_PLATFORM="offscreen")
+    return subprocess.call([sys.executable, os.path.abspath(__file__)] + argv, env=env)
+
+def run(scales, seed, repeat, out):
+    results = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "seed": seed, "python": platform.python_version(),
+        "sqlite": __import__("sqlite3").sqlite_version, "platform": platform.platform(), "scales": {},
+    }
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix=f"gs_bench_{scale}_") as data_dir:
+            env = dict(os.environ, GS_DATA_DIR=data_dir, QT_QPA_PLATFORM="offscreen")
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "measure", scale, str(seed), str(repeat)],
+                env=env, stdout=subprocess.PIPE, check=True
+            )
+            result = json.loads(proc.stdout.decode("utf-8").splitlines()[-1])
+        results["qt"] = result.pop("qt")
+        results["scales"][scale] = result
+        print(f"{scale}: " + ", ".join(f"{k} {v['median_ms']:.1f} ms" for k, v in result["timings"].items()), file=sys.stderr)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="gs_bench", description="Sentetik veriyle sıcak yol ölçümleri")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("run", help="ölçümleri çalıştır ve JSON olarak yaz")
+    p.add_argument("--scales", default="small,medium,large")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    p.add_argument("--out", default="bench_results.json")
+    p = sub.add_parser("generate", help="yalnızca fikstür veritabanını üret")
+    p.add_argument("data_dir")
+    p.add_argument("--scale", choices=sorted(SCALES), default="medium")
+    p.add_argument("--seed", type=int, default=1)
+    p = sub.add_parser("plans", help="sorgu planlarını denetle")
+    p.add_argument("--scale", choices=sorted(SCALES), default="large")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--data-dir", help="üretmek yerine var olan veri klasörünü kullan")
+    p.add_argument("--verbose", action="store_true", help="başarılı sorguların planlarını da yazdır")
+    p = sub.add_parser("idle", help="boşta bekleyen pencerenin işlemci süresini ölç")
+    p.add_argument("--scale", choices=sorted(SCALES), default="small")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--seconds", type=int, default=60, help="görünür ve gizli evrelerin her birinin süresi")
+    p.add_argument("--data-dir", help="üretmek yerine var olan veri klasörünü kullan")
+    p = sub.add_parser("archive", help="süresi dolan görevleri arşivle ve tamamlanma geçmişini denetle")
+    p.add_argument("--scale", choices=sorted(SCALES), default="small")
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--retention-days", type=int, default=10)
+    p.add_argument("--data-dir", help="üretmek yerine var olan veri klasörünü kullan (görevler gerçekten arşivlenir)")
+    p = sub.add_parser("measure")
+    p.add_argument("scale", choices=sorted(SCALES))
+    p.add_argument("seed", type=int)
+    p.add_argument("repeat", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        scales = [s for s in args.scales.split(",") if s]
+        unknown = [s for s in scales if s not in SCALES]
+        if unknown:
+            parser.error(f"bilinmeyen ölçek: {', '.join(unknown)}")
+        run(scales, args.seed, args.repeat, args.out)
+    elif args.command == "generate":
+        if os.environ.get("GS_DATA_DIR") != os.path.abspath(args.data_dir):
+            return in_data_dir(args.data_dir, argv or sys.argv[1:])
+        import gs
+        print(json.dumps(generate(gs, args.scale, args.seed), ensure_ascii=False, indent=2))
+    elif args.command == "plans":
+        if args.data_dir and os.environ.get("GS_DATA_DIR") != os.path.abspath(args.data_dir):
+            return in_data_dir(args.data_dir, argv or sys.argv[1:])
+        if not args.data_dir:
+            with tempfile.TemporaryDirectory(prefix="gs_plans_") as data_dir:
+                argv = (argv or sys.argv[1:]) + ["--data-dir", data_dir]
+                if in_data_dir(data_dir, ["generate", data_dir, "--scale", args.scale, "--seed", str(args.seed)]):
+                    return 1
+                return in_data_dir(data_dir, argv)
+        import gs  # şema ve indeksler burada güncellenir
+        return check_plans(gs, args.verbose)
+    elif args.command == "idle":
+        if args.data_dir and os.environ.get("GS_DATA_DIR") != os.path.abspath(args.data_dir):
+            return in_data_dir(args.data_dir, argv or sys.argv[1:])
+        if not args.data_dir:
+            with tempfile.TemporaryDirectory(prefix="gs_idle_") as data_dir:
+                argv = (argv or sys.argv[1:]) + ["--data-dir", data_dir]
+                if in_data_dir(data_dir, ["generate", data_dir, "--scale", args.scale, "--seed", str(args.seed)]):
+                    return 1
+                return in_data_dir(data_dir, argv)
+        print(json.dumps(idle(args.seconds), ensure_ascii=False, indent=2))
+    elif args.command == "archive":
+        if args.data_dir and os.environ.get("GS_DATA_DIR") != os.path.abspath(args.data_dir):
+            return in_data_dir(args.data_dir, argv or sys.argv[1:])
+        if not args.data_dir:
+            with tempfile.TemporaryDirectory(prefix="gs_archive_") as data_dir:
+                argv = (argv or sys.argv[1:]) + ["--data-dir", data_dir]
+                if in_data_dir(data_dir, ["generate", data_dir, "--scale", args.scale, "--seed", str(args.seed)]):
+                    return 1
+                return in_data_dir(data_dir, argv)
+        import gs
+        return check_archive(gs, args.retention_days)
+    else:
+        print(json.dumps(measure(args.scale, args.seed, args.repeat), ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,652 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Görev zamanlama çekirdeği (Qt kullanmaz)
+ - Görev sınıflandırma (gündüz/gece, Vakti Gelenler/Bir Sonraki/...), tekrar ve bildirim kararları
+   bir veri anlık görüntüsü üzerinde saf fonksiyonlardır; arayüz yalnızca sonuçları gösterir
+ - Komut satırı: python gs.py report today | python gs.py due --shift night [--json]
+"""
+
+import os, sys, json, sqlite3, argparse, threading, traceback
+from collections import deque, Counter
+from dataclasses import dataclass, field
+from functools import wraps
+from time import perf_counter, monotonic
+from datetime import datetime, date, time, timedelta
+
+# Paths
+APP_DIR = os.path.abspath(os.path.dirname(__file__))
+DATA_DIR = os.environ.get("GS_DATA_DIR") or os.path.join(APP_DIR, "data")
+if not os.path.exists(DATA_DIR):
+    os.makedirs(DATA_DIR)
+
+DB_PATH = os.path.join(DATA_DIR, "huzurevi.db")
+HISTORY_DB_PATH = os.path.join(DATA_DIR, "huzurevi_history.db")  # eski tamamlanma kayıtları, aylık tablolar
+ARCHIVE_DB_PATH = os.path.join(DATA_DIR, "huzurevi_archive.db")  # arşivlenmiş hasta ve görevler
+BACKUP_DIR = os.path.join(DATA_DIR, "backups")
+SETTINGS_PATH = os.path.join(DATA_DIR, "settings.json")
+STALL_LOG_PATH = os.path.join(DATA_DIR, "stalls.log")
+STALL_LOG_MAX_BYTES = 1024 * 1024  # aşılınca stalls.log.1 olarak saklanır ve yeni dosyaya geçilir
+
+# Default settings
+DEFAULT_SETTINGS = {
+    "theme": "Galatasaray",
+    "font_size": 14,
+    "notifications_enabled": True,
+    "completed_task_timeout": 4,  # hours
+    "clock_format": "24 Saat",
+    "auto_refresh": True,
+    "notification_duration": 10,  # seconds
+    "day_start": "08:00",
+    "day_end": "20:00",
+    "night_start": "20:00",
+    "night_end": "08:00",
+    "completion_history_days": 180,
+    "task_retention_days": 30,  # bitişinden bu kadar gün sonra görev arşive taşınır; 0: kapalı
+    "backup_interval_hours": 24,
+    "backup_keep": 7,
+    "sync_enabled": False,
+    "sync_port": 8765,
+    "sync_peers": "",  # virgülle ayrılmış, ör. http://192.168.1.20:8765
+    "sync_bind": "127.0.0.1",  # eşitleme sunucusunun dinlediği adres; diğer istasyonlar için yerel ağ adresi girilir
+    "sync_token": "",  # tüm istasyonlarda aynı olmalı; boşken eşitleme başlatılmaz
+    "perf_enabled": False,
+    "stall_threshold_ms": 500,  # 0: olay döngüsü izlemesi kapalı
+    "maintenance_idle_minutes": 30,  # 0: boşta veritabanı bakımı kapalı
+    "api_enabled": False,  # tabletler için salt okunur JSON API (gs_api.py)
+    "api_port": 8766,
+    "api_bind": "127.0.0.1",  # API sunucusunun dinlediği adres; tabletler için yerel ağ adresi girilir
+    "api_token": ""  # tabletler Authorization: Bearer ile gönderir; boşken API başlatılmaz
+}
+
+NOTIFY_WINDOW_SEC = 300  # görev saatinden 5 dakika önce ve sonra bildirim gösterilir
+OVERDUE_THRESHOLD = timedelta(hours=24)
+SHIFTS = {"day": True, "night": False}
+
+# Performance instrumentation
+PERF_WINDOW = 1000  # her ölçüm için tutulan son örnek sayısı (kayan pencere)
+
+class PerfStats:
+    """Rolling timing samples per name. Off by default; callers check `enabled` before timing anything."""
+
+    def __init__(self, window=PERF_WINDOW):
+        self.enabled = False
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, ms):
+        with self.lock:
+            q = self.samples.get(name)
+            if q is None:
+                q = self.samples[name] = deque(maxlen=self.window)
+            q.append(ms)
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def extend_last(self, name, ms):
+        # SELECT sonuçlarının okunması aynı sorgu örneğine eklenir
+        with self.lock:
+            q = self.samples.get(name)
+            if q:
+                q[-1] += ms
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.counts.clear()
+
+    def summary(self):
+        """[{name, count, p50, p95, p99, max, total}] sorted by total time in the window, slowest first."""
+        with self.lock:
+            items = [(name, sorted(q), self.counts[name]) for name, q in self.samples.items()]
+        rows = []
+        for name, xs, count in items:
+            pick = lambda q: round(xs[min(len(xs) - 1, int(q * len(xs)))], 3)
+            rows.append({
+                "name": name, "count": count, "p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99),
+                "max": round(xs[-1], 3), "total": round(sum(xs), 3),
+            })
+        rows.sort(key=lambda r: r["total"], reverse=True)
+        return rows
+
+perf = PerfStats()
+
+def timed(name=None):
+    def decorate(fn):
+        label = name or fn.__name__
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not perf.enabled:
+                return fn(*args, **kwargs)
+            t0 = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                perf.record(label, (perf_counter() - t0) * 1000)
+        return wrapper
+    return decorate
+
+# Event-loop stall watchdog
+class StallWatchdog:
+    """Background thread that notices when the main thread stops calling beat() and records where it was stuck."""
+
+    def __init__(self, threshold_ms, heartbeat_ms, log_path=STALL_LOG_PATH):
+        self.threshold = threshold_ms / 1000
+        self.heartbeat = heartbeat_ms / 1000
+        self.log_path = log_path
+        self.main_ident = threading.main_thread().ident
+        self.last_beat = monotonic()
+        self.paused = False
+        self.sites = {}  # çağrı yeri -> [takılma sayısı, toplam ms, en uzun ms]
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="stall-watchdog", daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def beat(self):
+        self.last_beat = monotonic()
+
+    def set_paused(self, paused):
+        # Duraklatılmışken (ör. pencere gizli) nabız beklenmez
+        self.beat()
+        self.paused = paused
+
+    def interval(self):
+        # Bir sonraki nabzın gecikmiş sayılacağı ana kadar uyu
+        if self.threshold <= 0 or self.paused:
+            return 1.0
+        return max(self.last_beat + self.heartbeat + self.threshold - monotonic(), 0.02)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval()):
+            started = self.last_beat
+            if self.threshold <= 0 or self.paused or monotonic() - started < self.heartbeat + self.threshold:
+                continue
+            # Takılma sürdükçe ana iş parçacığının yığınını örnekle
+            samples = []
+            while self.last_beat == started and not self.stop_event.is_set():
+                frame = sys._current_frames().get(self.main_ident)
+                if frame is not None:
+                    samples.append(traceback.extract_stack(frame))
+                self.stop_event.wait(max(self.threshold / 4, 0.02))
+            if samples and not self.stop_event.is_set():
+                self.report((self.last_beat - started - self.heartbeat) * 1000, samples)
+
+    def call_site(self, stack):
+        # Uygulama dosyalarındaki en içteki çerçeve; Qt/sqlite çağrısını yapan satırı gösterir
+        for fs in reversed(stack):
+            if os.path.dirname(os.path.abspath(fs.filename)) == APP_DIR:
+                return f"{os.path.basename(fs.filename)}:{fs.lineno} {fs.name}"
+        fs = stack[-1]
+        return f"{os.path.basename(fs.filename)}:{fs.lineno} {fs.name}"
+
+    def report(self, ms, samples):
+        sites = [self.call_site(st) for st in samples]
+        site = Counter(sites).most_common(1)[0][0]
+        stack = samples[sites.index(site)]
+        with self.lock:
+            entry = self.sites.setdefault(site, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += ms
+            entry[2] = max(entry[2], ms)
+        line = f"{datetime.now():%Y-%m-%d %H:%M:%S} olay döngüsü {ms:.0f} ms takıldı: {site}"
+        print(line)
+        try:
+            if os.path.exists(self.log_path) and os.path.getsize(self.log_path) > STALL_LOG_MAX_BYTES:
+                os.replace(self.log_path, self.log_path + ".1")
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n" + "".join(traceback.format_list(stack)) + "\n")
+        except OSError as e:
+            print(f"Stall log error: {e}")
+
+    def summary(self):
+        """[{site, count, total_ms, max_ms}] sorted by blocked time, worst first."""
+        with self.lock:
+            rows = [{"site": k, "count": c, "total_ms": round(t, 1), "max_ms": round(m, 1)} for k, (c, t, m) in self.sites.items()]
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows
+
+class TimedCursor(sqlite3.Cursor):
+    perf_name = None
+
+    def execute(self, sql, parameters=()):
+        self.perf_name = "SQL " + " ".join(sql.split())[:120]
+        t0 = perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            perf.record(self.perf_name, (perf_counter() - t0) * 1000)
+
+    def executemany(self, sql, seq):
+        self.perf_name = "SQL " + " ".join(sql.split())[:120]
+        t0 = perf_counter()
+        try:
+            return super().executemany(sql, seq)
+        finally:
+            perf.record(self.perf_name, (perf_counter() - t0) * 1000)
+
+    def fetch_timed(self, fetch, *args):
+        t0 = perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            if self.perf_name:
+                perf.extend_last(self.perf_name, (perf_counter() - t0) * 1000)
+
+    def fetchone(self):
+        return self.fetch_timed(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self.fetch_timed(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self.fetch_timed(super().fetchall)
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq):
+        return self.cursor().executemany(sql, seq)
+
+# Database helpers
+def get_conn():
+    # Ölçüm kapalıyken standart bağlantı sınıfı kullanılır; ek maliyet yoktur
+    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES|sqlite3.PARSE_COLNAMES,
+                           factory=TimedConnection if perf.enabled else sqlite3.Connection)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+def get_readonly_conn():
+    """Read-only connection; CLI and other viewers never take write locks."""
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, factory=TimedConnection if perf.enabled else sqlite3.Connection)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+def completion_partition(month):
+    """History table (in HISTORY_DB_PATH) holding the completions of one YYYY-MM month."""
+    return "completions_" + month.replace("-", "_")
+
+class ChangeWatcher:
+    """Long-lived read-only connection that notices commits made by any other connection (PRAGMA data_version)."""
+
+    def __init__(self):
+        self.conn = get_readonly_conn()
+        self.data_version = self.read_data_version()
+        self.version = 1  # her değişiklikte bir artar; yalnızca bu süreç içinde anlamlıdır
+
+    def read_data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def poll(self):
+        """True if the database changed since the last poll."""
+        current = self.read_data_version()
+        if current == self.data_version:
+            return False
+        self.data_version = current
+        self.version += 1
+        return True
+
+    def close(self):
+        self.conn.close()
+
+# Named queries
+# Görünüm yenilemeleri, zamanlayıcılar ve tekil kayıt okumaları buradan alınır.
+# Plan denetimi (tam tarama / geçici B-ağacı): python gs_bench.py plans
+@dataclass(frozen=True)
+class Query:
+    sql: str
+    hot: bool = True
+    scans: tuple = ()  # bilerek taranan tablolar: "SCAN " sonrasının öneki, şema adı olmadan (ör. "t", "t USING INDEX x")
+
+TASKS_WITH_PATIENTS = "SELECT t.*, p.name, p.surname FROM tasks t LEFT JOIN patients p ON p.room_number=t.room_number"
+
+QUERIES = {
+    "task": Query("SELECT * FROM tasks WHERE id=?"),
+    "task_with_patient": Query("SELECT t.*, p.name, p.surname, p.photo FROM tasks t LEFT JOIN patients p ON p.room_number=t.room_number WHERE t.id=?"),
+    "tasks_with_patients": Query("SELECT t.*, p.name, p.surname, p.photo FROM tasks t LEFT JOIN patients p ON p.room_number=t.room_number ORDER BY t.date_ord, t.time_min", scans=("t",)),
+    "snapshot_tasks": Query(TASKS_WITH_PATIENTS + " ORDER BY t.date_ord, t.time_min", scans=("t",)),
+    "calendar_tasks": Query(TASKS_WITH_PATIENTS, scans=("t",)),
+    "pending_notifications": Query(
+        "SELECT t.*, p.name, p.surname, p.photo FROM tasks t INDEXED BY idx_tasks_pending_notify"
+        " LEFT JOIN patients p ON p.room_number=t.room_number"
+        " WHERE done=0 AND cancelled=0 AND (notified=0 OR notified IS NULL)",
+        # kısmi indeks yalnızca bekleyen görevleri tutar; ANALYZE istatistikleri tam taramayı seçtirmesin diye sabitlenir
+        scans=("t USING INDEX idx_tasks_pending_notify",)
+    ),
+    "patient_tasks": Query("SELECT * FROM tasks WHERE room_number=? ORDER BY date_ord, time_min"),
+    # Tarih parametreleri gün sırasıdır: date.toordinal()
+    "task_list_all": Query(TASKS_WITH_PATIENTS + " WHERE t.date_ord=?"),
+    "task_list_done": Query(TASKS_WITH_PATIENTS + " WHERE done=1 AND t.date_ord=?"),
+    "task_list_waiting": Query(TASKS_WITH_PATIENTS + " WHERE done=0 AND cancelled=0 AND t.date_ord=?"),
+    "task_list_upcoming": Query(TASKS_WITH_PATIENTS + " WHERE t.date_ord > ? AND t.date_ord <= ?"),
+    "task_list_cancelled": Query(TASKS_WITH_PATIENTS + " WHERE cancelled=1 AND t.date_ord=?"),
+    "completions_on_day": Query("SELECT task_id FROM task_completions WHERE completion_date=?"),
+    "completion_exists": Query("SELECT 1 FROM task_completions WHERE task_id=? AND completion_date=?"),
+    # all_completions: get_completions_conn() görünümü; geçmiş bölümleri tarih aralığına göre seçildiğinden taranabilir
+    "calendar_completions": Query("SELECT task_id, completion_date FROM all_completions WHERE completion_date BETWEEN ? AND ?", scans=("completions_",)),
+    "task_completion_dates": Query("SELECT completion_date FROM all_completions WHERE task_id=? AND completion_date BETWEEN ? AND ?"),
+    "patients": Query("SELECT * FROM patients ORDER BY room_number", scans=("patients",)),
+    "patient_names": Query("SELECT room_number, name, surname FROM patients ORDER BY room_number", scans=("patients",)),
+    "patient": Query("SELECT * FROM patients WHERE room_number=?"),
+    "patient_name": Query("SELECT room_number, name, surname FROM patients WHERE room_number=?"),
+    "archive_patients": Query("SELECT room_number, name, surname, tc_no FROM arc.archive_patients ORDER BY room_number", scans=("archive_patients",)),
+    # Parametre JSON dizisidir: bir olay grubundaki bütün anahtarlar tek sorguda okunur
+    "archive_patients_in": Query("SELECT room_number, name, surname, tc_no FROM arc.archive_patients WHERE room_number IN (SELECT value FROM json_each(?))", scans=("json_each",)),
+    "archive_tasks": Query("SELECT a.*, p.name, p.surname FROM arc.archive a LEFT JOIN main.patients p ON p.room_number=a.room_number ORDER BY a.date DESC", scans=("a",)),
+    "archive_tasks_in": Query("SELECT a.*, p.name, p.surname FROM arc.archive a LEFT JOIN main.patients p ON p.room_number=a.room_number WHERE a.id IN (SELECT value FROM json_each(?))", scans=("json_each",)),
+}
+
+def plan_problems(query, plan):
+    """Full scans of tables not listed in query.scans and temp B-tree sorts in an EXPLAIN QUERY PLAN result."""
+    problems = []
+    for detail in plan:
+        if "TEMP B-TREE" in detail:
+            problems.append(detail)
+        elif detail.startswith("SCAN ") and not detail.startswith(("SCAN CONSTANT", "SCAN SUBQUERY")):
+            target = detail[5:].split(".", 1)[-1] if "." in detail.split()[1] else detail[5:]
+            if not (query.scans and target.startswith(query.scans)):
+                problems.append(detail)
+    return problems
+
+def check_query_plans(conn, names=None):
+    """Return [(name, query, plan, problems)]; conn needs the arc database and the all_completions view."""
+    results = []
+    for name in names or QUERIES:
+        query = QUERIES[name]
+        params = (None,) * query.sql.count("?")
+        plan = [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + query.sql, params).fetchall()]
+        results.append((name, query, plan, plan_problems(query, plan)))
+    return results
+
+# Settings
+def load_settings():
+    if not os.path.exists(SETTINGS_PATH):
+        save_settings(DEFAULT_SETTINGS)
+        return DEFAULT_SETTINGS.copy()
+    try:
+        with open(SETTINGS_PATH, "r", encoding="utf-8") as f:
+            s = json.load(f)
+    except Exception:
+        s = DEFAULT_SETTINGS.copy()
+    for k, v in DEFAULT_SETTINGS.items():
+        if k not in s:
+            s[k] = v
+    return s
+
+def save_settings(s):
+    # Önce geçici dosyaya yaz, sonra tek adımda yerine koy: yarım kalmış settings.json oluşmaz
+    tmp_path = SETTINGS_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(s, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, SETTINGS_PATH)
+
+# Task scheduling helpers
+TURKISH_MONTHS = {
+    1: "Ocak", 2: "Şubat", 3: "Mart", 4: "Nisan", 5: "Mayıs", 6: "Haziran",
+    7: "Temmuz", 8: "Ağustos", 9: "Eylül", 10: "Ekim", 11: "Kasım", 12: "Aralık"
+}
+
+SECTION_TITLES = [
+    ("due", "Vakti Gelenler"),
+    ("completed", "Tamamlanmış Görevler"),
+    ("upcoming", "Bir Sonraki Görevler"),
+    ("cancelled", "İptal Edilen Görevler"),
+]
+
+def parse_time(time_str):
+    if not time_str:
+        return time(8, 0)
+    try:
+        hh, mm = map(int, time_str.split(":"))
+        return time(hh, mm)
+    except:
+        return time(8, 0)
+
+def task_date(t, default):
+    """Task start date from the integer date_ord column (date.toordinal()), or `default` when unset."""
+    return date.fromordinal(t["date_ord"]) if t["date_ord"] else default
+
+def task_clock(t):
+    """Clock time from the integer time_min column, or None when the task has no valid HH:MM."""
+    m = t["time_min"]
+    return time(m // 60, m % 60) if m is not None and 0 <= m < 24 * 60 else None
+
+def task_sort_key(t):
+    # SQL'deki ORDER BY date_ord, time_min ile aynı: boş tarih/saat önce gelir
+    return (t["date_ord"] or 0, -1 if t["time_min"] is None else t["time_min"])
+
+def is_daytime_task(t, settings):
+    day_start = settings.get("day_start_time") or parse_time(settings.get("day_start", "08:00"))
+    day_end = settings.get("day_end_time") or parse_time(settings.get("day_end", "20:00"))
+    if t["time_type"] == "Gün İçinde":
+        return True
+    if t["time_type"] == "Akşam":
+        return False
+    t_time = task_clock(t)
+    return t_time is not None and day_start <= t_time < day_end
+
+def classify_task(t, completed_tasks, now, settings):
+    """Return (is_daytime, section, t_dt) for a task shown on the shift boards, or None."""
+    today = now.date()
+    t_date = task_date(t, today)
+    if t["end_date_ord"] and t_date.toordinal() > t["end_date_ord"]:
+        return None
+    t_dt = task_time(t, t_date)
+
+    # Skip if more than 24 hours overdue
+    if t_dt < now - OVERDUE_THRESHOLD:
+        return None
+
+    is_daytime = is_daytime_task(t, settings)
+    is_due = (t_dt <= now and (is_daytime or t["time_type"] == "Akşam") and not t["cancelled"]) or (t["notified"] == 1 and not t["cancelled"])
+    is_today = t_date == today
+    is_next_24h = t_dt <= now + timedelta(hours=24)
+
+    include = False
+    if t["repeat_type"] == "Her Gün":
+        include = True
+    elif t["repeat_type"] == "Tek Günler" and t_date.day % 2 == 1:
+        include = True
+    elif t["repeat_type"] == "Çift Günler" and t_date.day % 2 == 0:
+        include = True
+    elif t["repeat_type"] == "Haftanın Günleri" and t["repeat_days"]:
+        days = [int(x) for x in t["repeat_days"].split(",") if x.strip().isdigit()]
+        if t_date.weekday() in days:
+            include = True
+    elif t["repeat_type"] == "Kaç Günde Bir" and t["repeat_interval"]:
+        delta = (today - t_date).days
+        if delta >= 0 and delta % t["repeat_interval"] == 0:
+            include = True
+    elif t_date == today:
+        include = True
+    if not include:
+        return None
+
+    completed = t["id"] in completed_tasks
+    if t["cancelled"] and is_today:
+        section = "cancelled"
+    elif completed and is_today:
+        section = "completed"
+    elif is_due and not completed:
+        section = "due"
+    elif is_next_24h and not completed:
+        section = "upcoming"
+    else:
+        return None
+    return is_daytime, section, t_dt
+
+def task_time(t, day):
+    """Scheduled datetime of `t` on `day`; tasks without a clock time count as noon."""
+    clock = task_clock(t) if t["time_type"] == "Saat Belirt" else None
+    return datetime.combine(day, clock or time(12, 0))
+
+def is_overdue(t, day, now):
+    return task_time(t, day) < now - OVERDUE_THRESHOLD
+
+def notification_time(t, settings, today):
+    """Datetime at which a reminder for `t` is shown, or None if it never notifies."""
+    t_date = task_date(t, today)
+    if t["time_type"] == "Saat Belirt":
+        clock = task_clock(t)
+        return datetime.combine(t_date, clock) if clock else None
+    if t["time_type"] == "Gün İçinde":
+        return datetime.combine(t_date, settings.get("day_start_time") or parse_time(settings.get("day_start", "08:00")))
+    if t["time_type"] == "Akşam":
+        return datetime.combine(t_date, settings.get("night_start_time") or parse_time(settings.get("night_start", "20:00")))
+    return None
+
+def notification_due(t, now, settings):
+    if t["done"] or t["cancelled"] or t["notified"]:
+        return False
+    tdt = notification_time(t, settings, now.date())
+    return tdt is not None and abs((tdt - now).total_seconds()) <= NOTIFY_WINDOW_SEC
+
+# Calendar
+def calendar_day_entries(rows, sel, completed_tasks):
+    """Return [(task_row, is_completed)] for the tasks scheduled on `sel`."""
+    weekday = sel.weekday()
+    sel_ord = sel.toordinal()
+    today_ord = date.today().toordinal()
+    entries = []
+    for r in rows:
+        include = False
+        try:
+            if r["end_date_ord"] and sel_ord > r["end_date_ord"]:
+                continue
+            rt = r["repeat_type"] or ""
+            if r["date_ord"] == sel_ord:
+                include = True
+            elif rt == "Her Gün":
+                include = True
+            elif rt == "Tek Günler" and sel.day % 2 == 1:
+                include = True
+            elif rt == "Çift Günler" and sel.day % 2 == 0:
+                include = True
+            elif rt == "Haftanın Günleri" and r["repeat_days"]:
+                days = [int(x) for x in r["repeat_days"].split(",") if x.strip().isdigit()]
+                if weekday in days:
+                    include = True
+            elif rt == "Kaç Günde Bir" and r["repeat_interval"]:
+                delta = sel_ord - (r["date_ord"] or today_ord)
+                if delta >= 0 and delta % r["repeat_interval"] == 0:
+                    include = True
+        except Exception:
+            pass
+        if include:
+            entries.append((r, r["id"] in completed_tasks))
+    return entries
+
+def visible_calendar_entries(entries, sel, now):
+    """Drop entries more than 24 hours overdue from a calendar_day_entries() result."""
+    return [(r, done) for r, done in entries if not is_overdue(r, sel, now)]
+
+# Snapshot
+@dataclass
+class Snapshot:
+    now: datetime
+    settings: dict
+    tasks: list = field(default_factory=list)
+    completed: set = field(default_factory=set)
+
+def completed_task_ids(conn, day):
+    cur = conn.execute(QUERIES["completions_on_day"].sql, (day.isoformat(),))
+    return {row["task_id"] for row in cur.fetchall()}
+
+def load_snapshot(now=None, conn=None):
+    now = now or datetime.now()
+    own = conn is None
+    conn = conn or get_readonly_conn()
+    try:
+        tasks = conn.execute(QUERIES["snapshot_tasks"].sql).fetchall()
+        completed = completed_task_ids(conn, now.date())
+    finally:
+        if own:
+            conn.close()
+    return Snapshot(now, load_settings(), tasks, completed)
+
+def classify_snapshot(snap):
+    """Return [(task, is_daytime, section, t_dt)] for every task placed on a shift board."""
+    placed = []
+    for t in snap.tasks:
+        placement = classify_task(t, snap.completed, snap.now, snap.settings)
+        if placement:
+            placed.append((t,) + placement)
+    return placed
+
+# Command line
+def task_json(t, is_daytime, section, t_dt):
+    return {
+        "id": t["id"], "room_number": t["room_number"],
+        "patient": f"{t['name'] or ''} {t['surname'] or ''}".strip(),
+        "task": t["task"], "time": t_dt.strftime("%H:%M"), "time_type": t["time_type"],
+        "shift": "day" if is_daytime else "night", "section": section,
+    }
+
+def print_rows(rows):
+    for r in rows:
+        print(f"  {r['time']}  {r['room_number']:>5}  {r['patient']:<24}  {r['task']}")
+
+def cmd_report(args):
+    snap = load_snapshot(parse_day(args.day))
+    rows = [task_json(*p) for p in classify_snapshot(snap)]
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return 0
+    print(f"Rapor: {snap.now.date().strftime('%d/%m/%Y')}")
+    for shift, title in (("day", "Gündüz"), ("night", "Gece")):
+        print(f"\n{title}")
+        for section, section_title in SECTION_TITLES:
+            part = [r for r in rows if r["shift"] == shift and r["section"] == section]
+            print(f" {section_title}: {len(part)}")
+            print_rows(part)
+    return 0
+
+def cmd_due(args):
+    snap = load_snapshot(parse_day(args.day))
+    rows = [task_json(*p) for p in classify_snapshot(snap) if p[2] == "due" and (args.shift is None or p[1] == SHIFTS[args.shift])]
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    else:
+        print_rows(rows)
+    return 0
+
+def parse_day(text):
+    now = datetime.now()
+    if text in (None, "today"):
+        return now
+    return datetime.combine(datetime.strptime(text, "%Y-%m-%d").date(), now.time())
+
+COMMANDS = {"report": cmd_report, "due": cmd_due}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="gs", description="Huzur evi görev durumu (arayüzsüz)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("report", help="vardiya panolarının özeti")
+    p.add_argument("day", nargs="?", default="today", help="today veya YYYY-AA-GG")
+    p.add_argument("--json", action="store_true")
+    p = sub.add_parser("due", help="vakti gelen görevler")
+    p.add_argument("--shift", choices=sorted(SHIFTS))
+    p.add_argument("--day", default="today")
+    p.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+    if not os.path.exists(DB_PATH):
+        print(f"Veritabanı bulunamadı: {DB_PATH}", file=sys.stderr)
+        return 1
+    return COMMANDS[args.command](args)
+
+if __name__ == "__main__":
+    sys.exit(main())
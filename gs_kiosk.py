@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Koridor ekranları için salt okunur görev panosu (kiosk)
+ - Yalnızca saat ile Vakti Gelenler / Bir Sonraki Görevler bölümleri; düzenleme araçları yoktur
+ - Veritabanı salt okunur bağlantıyla okunur: şema güncellenmez, yazma kilidi alınmaz
+ - Değişiklikler PRAGMA data_version ile fark edilir; ekranlarda yalnızca değişen satırlar güncellenir
+ - Tek süreçte birden çok ekran: python gs.py kiosk [--screens 0:day,1:night] [--windowed]
+"""
+
+import os, sys, bisect, sqlite3, argparse
+from dataclasses import dataclass
+from datetime import datetime
+
+from gs_core import DB_PATH, SECTION_TITLES, SHIFTS, TURKISH_MONTHS, ChangeWatcher, load_snapshot, classify_snapshot
+
+os.environ["QT_MAC_WANTS_LAYER"] = "1"
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QApplication, QWidget, QLabel, QVBoxLayout, QHBoxLayout, QGroupBox, QScrollArea
+
+KIOSK_SECTIONS = ("due", "upcoming")
+KIOSK_POLL_MS = 5000  # başka istasyon/pencereden gelen değişiklikler için yoklama aralığı
+SHIFT_TITLES = {True: "Gündüz Vardiyası", False: "Akşam Gece Vardiyası"}
+KIOSK_STYLE = """
+    QWidget { background: #1E1E1E; color: white; font-family: Helvetica; font-size: %(font)dpx; }
+    QLabel#clock { font-size: %(clock)dpx; font-weight: bold; }
+    QLabel#shift { font-weight: bold; }
+    QGroupBox { border: 3px solid #7F8C8D; border-radius: 8px; margin-top: %(font)dpx; padding: 6px; font-weight: bold; }
+    QGroupBox[section="due"] { border-color: #E74C3C; }
+    QGroupBox::title { subcontrol-origin: margin; subcontrol-position: top left; padding: 0 4px; }
+    QScrollArea { border: none; }
+"""
+
+@dataclass(frozen=True)
+class KioskRow:
+    is_daytime: bool
+    section: str
+    sort_key: tuple
+    text: str
+
+def kiosk_rows(snap):
+    """{task_id: KioskRow} for the tasks on the kiosk sections."""
+    rows = {}
+    for t, is_daytime, section, t_dt in classify_snapshot(snap):
+        if section not in KIOSK_SECTIONS:
+            continue
+        patient = f"{t['name'] or ''} {t['surname'] or ''}".strip()
+        when = t["time"] or t["time_type"] or ""
+        rows[t["id"]] = KioskRow(is_daytime, section, (t_dt, t["id"]), f"{when}   {t['room_number']} - {patient}   {t['task']}")
+    return rows
+
+class KioskModel(QtCore.QObject):
+    """Shared by every screen: reclassifies when the database changes or the minute turns and emits only the difference."""
+    changed = pyqtSignal(object, object)  # {task_id: KioskRow} eklenen/değişen, {task_id} kaldırılan
+    tick = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.watcher = ChangeWatcher()
+        self.rows = {}
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.poll)
+        self.poll_timer.start(KIOSK_POLL_MS)
+        self.minute_timer = QTimer(self)
+        self.minute_timer.setSingleShot(True)
+        self.minute_timer.timeout.connect(self.on_minute)
+        self.schedule_minute()
+        self.reload()
+
+    def schedule_minute(self):
+        now = datetime.now()
+        self.minute_timer.start(60 * 1000 - now.second * 1000 - now.microsecond // 1000 + 5)
+
+    def on_minute(self):
+        # Zaman ilerledikçe görevler bölüm değiştirir; saat de dakikada bir güncellenir
+        self.schedule_minute()
+        self.reload()
+        self.tick.emit(datetime.now())
+
+    def poll(self):
+        try:
+            if self.watcher.poll():
+                self.reload()
+        except sqlite3.Error as e:
+            print(f"Kiosk poll error: {e}")
+
+    def reload(self):
+        try:
+            rows = kiosk_rows(load_snapshot(conn=self.watcher.conn))
+        except sqlite3.Error as e:
+            print(f"Kiosk reload error: {e}")
+            return
+        changed = {task_id: row for task_id, row in rows.items() if self.rows.get(task_id) != row}
+        removed = self.rows.keys() - rows.keys()
+        self.rows = rows
+        if changed or removed:
+            self.changed.emit(changed, removed)
+
+class KioskWindow(QWidget):
+    """One screen: the clock and, for each shown shift, the Vakti Gelenler and Bir Sonraki Görevler lists."""
+
+    def __init__(self, model, screen, shifts, windowed=False):
+        super().__init__()
+        self.setWindowTitle("Galatasaraylılar Yurdu Huzur Evi - Görev Panosu")
+        font = max(14, screen.geometry().height() // 45)
+        self.setStyleSheet(KIOSK_STYLE % {"font": font, "clock": font * 3})
+        self.labels = {}  # task_id -> (QLabel, KioskRow)
+        self.groups = {}  # (is_daytime, section) -> (QGroupBox, QVBoxLayout, [sort_key])
+        layout = QVBoxLayout(self)
+        self.clock = QLabel()
+        self.clock.setObjectName("clock")
+        self.clock.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.clock)
+        columns = QHBoxLayout()
+        for is_daytime in shifts:
+            column = QVBoxLayout()
+            title = QLabel(SHIFT_TITLES[is_daytime])
+            title.setObjectName("shift")
+            title.setAlignment(Qt.AlignCenter)
+            column.addWidget(title)
+            for section in KIOSK_SECTIONS:
+                gb = QGroupBox(f"{dict(SECTION_TITLES)[section]} (0)")
+                gb.setProperty("section", section)
+                scroll = QScrollArea()
+                scroll.setWidgetResizable(True)
+                scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+                scroll.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)  # dokunulmayan ekran: taşan satırlar kırpılır
+                inner = QWidget()
+                vb = QVBoxLayout(inner)
+                vb.setAlignment(Qt.AlignTop)
+                scroll.setWidget(inner)
+                QVBoxLayout(gb).addWidget(scroll)
+                column.addWidget(gb, 1)
+                self.groups[(is_daytime, section)] = (gb, vb, [])
+            columns.addLayout(column, 1)
+        layout.addLayout(columns, 1)
+
+        self.update_clock(datetime.now())
+        self.apply_changes(model.rows, set())
+        model.changed.connect(self.apply_changes)
+        model.tick.connect(self.update_clock)
+        self.setGeometry(screen.availableGeometry())
+        if windowed:
+            self.show()
+        else:
+            self.setCursor(Qt.BlankCursor)
+            self.showFullScreen()
+
+    def update_clock(self, now):
+        self.clock.setText(f"{now:%H:%M}   {now.day} {TURKISH_MONTHS[now.month]} {now.year}")
+
+    def apply_changes(self, changed, removed):
+        touched = set()
+        self.setUpdatesEnabled(False)
+        for task_id in removed:
+            touched.add(self.remove_row(task_id))
+        for task_id, row in changed.items():
+            old = self.labels.get(task_id)
+            if old and (old[1].is_daytime, old[1].section, old[1].sort_key) == (row.is_daytime, row.section, row.sort_key):
+                old[0].setText(row.text)  # yalnızca metin değişti: satır yerinde kalır
+                self.labels[task_id] = (old[0], row)
+                continue
+            touched.add(self.remove_row(task_id))
+            touched.add(self.insert_row(task_id, row))
+        for key in touched:
+            if key in self.groups:
+                gb, vb, order = self.groups[key]
+                gb.setTitle(f"{dict(SECTION_TITLES)[key[1]]} ({len(order)})")
+        self.setUpdatesEnabled(True)
+
+    def insert_row(self, task_id, row):
+        key = (row.is_daytime, row.section)
+        if key not in self.groups:
+            return None  # bu ekranda gösterilmeyen vardiya
+        gb, vb, order = self.groups[key]
+        index = bisect.bisect(order, row.sort_key)
+        order.insert(index, row.sort_key)
+        label = QLabel(row.text)
+        vb.insertWidget(index, label)
+        self.labels[task_id] = (label, row)
+        return key
+
+    def remove_row(self, task_id):
+        entry = self.labels.pop(task_id, None)
+        if not entry:
+            return None
+        label, row = entry
+        key = (row.is_daytime, row.section)
+        gb, vb, order = self.groups[key]
+        order.remove(row.sort_key)
+        vb.removeWidget(label)
+        label.deleteLater()
+        return key
+
+def parse_screens(text, count):
+    """Parse --screens (e.g. 0:day,1:night) into [(screen index, [is_daytime, ...])]; empty means every screen, both shifts."""
+    both = [SHIFTS["day"], SHIFTS["night"]]
+    if not text:
+        return [(i, both) for i in range(count)]
+    result = []
+    for part in text.split(","):
+        index, _, shift = part.strip().partition(":")
+        if not index.isdigit() or int(index) >= count or (shift and shift not in SHIFTS):
+            raise ValueError(f"geçersiz ekran: {part.strip()} ({count} ekran var)")
+        result.append((int(index), [SHIFTS[shift]] if shift else both))
+    return result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="gs kiosk", description="Koridor ekranları için salt okunur görev panosu")
+    parser.add_argument("--screens", help="ekran sıra numaraları ve isteğe bağlı vardiya, ör. 0:day,1:night (varsayılan: tüm ekranlar)")
+    parser.add_argument("--windowed", action="store_true", help="tam ekran yerine pencerede aç")
+    args = parser.parse_args(argv)
+    if not os.path.exists(DB_PATH):
+        print(f"Veritabanı bulunamadı: {DB_PATH}", file=sys.stderr)
+        return 1
+    app = QApplication(sys.argv[:1])
+    screens = app.screens()
+    try:
+        layout = parse_screens(args.screens, len(screens))
+    except ValueError as e:
+        parser.error(str(e))
+    model = KioskModel()
+    app.aboutToQuit.connect(model.watcher.close)
+    # Pencereler üst nesnesiz; referans uygulamada tutulmazsa çöp toplayıcı kapatır
+    app.kiosk_windows = [KioskWindow(model, screens[index], shifts, args.windowed) for index, shifts in layout]
+    return app.exec_()
+
+if __name__ == "__main__":
+    sys.exit(main())
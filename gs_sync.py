@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+İstasyonlar arası veri eşitleme (Qt kullanmaz)
+ - patients, tasks ve task_completions değişiklikleri tetikleyicilerle sync_log tablosuna yazılır
+ - Tetikleyiciler yalnızca eşitleme açıkken kuruludur; kapatılınca kaldırılır ve sync_log boşaltılır
+ - Her istasyon HTTP üzerinden /changes uç noktasını ayarlanan adreste sunar, eşleri periyodik olarak sorgular;
+   her istek ortak anahtarı (Authorization: Bearer) taşımak zorundadır
+ - Tüm eşlerin çektiği kayıtlar budanır; çakışma çözümü için her satır/alanın en yeni sürümü tutulur
+ - patients ve task_completions için satır bazında, tasks için alan bazında "son yazan kazanır"
+ - Zaman damgası değişikliği yapan istasyonun duvar saatidir: aynı alanı iki istasyon değiştirirse saati ileride
+   olanınki kalır, saat farkı kadar sonra yapılan bir düzeltme bile kaybedebilir; istasyon saatleri NTP ile
+   eşit tutulmalıdır
+ - python gs_sync.py bench: iki yerel istasyonla yakınsama süresi ve hız ölçümü
+"""
+
+import os, sys, json, sqlite3, threading, time, uuid, tempfile, subprocess, hmac
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from urllib.request import urlopen, Request
+
+SYNC_BATCH_SIZE = 500
+SYNC_INTERVAL_SEC = 2
+SYNC_PRUNE_INTERVAL_SEC = 10 * 60
+SYNC_TIMEOUT_SEC = 3  # ulaşılamayan eş durdurmayı en fazla bu kadar geciktirir
+
+# Çakışmaları bu damga çözer; istasyonlar arası saat kayması sonucu belirler (bkz. modül açıklaması)
+NOW_TS = "strftime('%Y-%m-%dT%H:%M:%f', 'now')"
+CHANGE_TS = f"COALESCE((SELECT value FROM sync_state WHERE key='apply_ts'), {NOW_TS})"
+CHANGE_ORIGIN = "COALESCE((SELECT value FROM sync_state WHERE key='apply_origin'), (SELECT value FROM sync_state WHERE key='station_id'))"
+# Yerel bakım işlemleri (ör. eski kayıtların geçmiş veritabanına taşınması) bu anahtar varken kaydedilmez
+LOGGING_ON = "NOT EXISTS (SELECT 1 FROM sync_state WHERE key='local_only')"
+
+# Tablo: (anahtar ifadesi, {alan: ifade}, birleştirme kuralı). "notified" yerel bildirim durumudur, eşitlenmez.
+REPLICATED_TABLES = {
+    "patients": ("{r}.room_number", {
+        "room_number": "{r}.room_number", "name": "{r}.name", "surname": "{r}.surname", "notes": "{r}.notes",
+        "photo": "hex({r}.photo)", "tc_no": "{r}.tc_no", "birth_date": "{r}.birth_date", "phone": "{r}.phone",
+    }, "row"),
+    "tasks": ("{r}.uid", {
+        "uid": "{r}.uid", "room_number": "{r}.room_number", "task": "{r}.task", "time": "{r}.time", "done": "{r}.done",
+        "repeat_type": "{r}.repeat_type", "time_type": "{r}.time_type", "date": "{r}.date", "end_date": "{r}.end_date",
+        "cancelled": "{r}.cancelled", "repeat_days": "{r}.repeat_days", "repeat_interval": "{r}.repeat_interval",
+        "completed_time": "{r}.completed_time",
+    }, "field"),
+    "task_completions": ("(SELECT uid FROM tasks WHERE id = {r}.task_id) || '|' || {r}.completion_date", {
+        "task_uid": "(SELECT uid FROM tasks WHERE id = {r}.task_id)", "completion_date": "{r}.completion_date",
+    }, "row"),
+}
+
+def install_change_log(conn):
+    """Create the sync tables on an open connection (idempotent); enable_change_log() adds the triggers."""
+    cur = conn.cursor()
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS sync_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        tbl TEXT, row_key TEXT, op TEXT, changed TEXT, data TEXT, ts TEXT, origin TEXT
+    )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sync_log_key ON sync_log(tbl, row_key, ts)")
+    cur.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)")
+    cur.execute("CREATE TABLE IF NOT EXISTS sync_peers (url TEXT PRIMARY KEY, last_seq INTEGER DEFAULT 0)")
+    cur.execute("PRAGMA table_info(sync_peers)")
+    if "station" not in {r[1] for r in cur.fetchall()}:
+        cur.execute("ALTER TABLE sync_peers ADD COLUMN station TEXT")
+    # Eşlerin bu istasyonun günlüğünde nereye kadar çektiği (budama sınırı)
+    cur.execute("CREATE TABLE IF NOT EXISTS sync_acks (station TEXT PRIMARY KEY, seq INTEGER)")
+    cur.execute("INSERT OR IGNORE INTO sync_state (key, value) VALUES ('station_id', ?)", (uuid.uuid4().hex[:12],))
+    cur.execute("PRAGMA table_info(tasks)")
+    if "uid" not in {r[1] for r in cur.fetchall()}:
+        cur.execute("ALTER TABLE tasks ADD COLUMN uid TEXT")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_uid ON tasks(uid)")
+    conn.commit()
+
+def row_json(fields, r):
+    return "json_object(" + ", ".join(f"'{f}', {expr.format(r=r)}" for f, expr in fields.items()) + ")"
+
+def change_log_enabled(conn):
+    return conn.execute("SELECT EXISTS (SELECT 1 FROM sqlite_master WHERE type='trigger' AND name='tasks_sync_insert')").fetchone()[0] == 1
+
+def enable_change_log(conn, enabled):
+    """Create or drop the change-log triggers; nothing is logged while sync is off.
+    Turning logging on seeds the log with the current rows at the lowest version, so rows written while sync
+    was off reach the peers without overriding anything they changed; turning it off empties the log."""
+    if change_log_enabled(conn) == bool(enabled):
+        return
+    cur = conn.cursor()
+    if not enabled:
+        for tbl in REPLICATED_TABLES:
+            for op in ("insert", "update", "delete"):
+                cur.execute(f"DROP TRIGGER IF EXISTS {tbl}_sync_{op}")
+        cur.execute("DELETE FROM sync_log")
+        cur.execute("DELETE FROM sync_acks")
+        conn.commit()
+        return
+    cur.execute("UPDATE tasks SET uid = lower(hex(randomblob(16))) WHERE uid IS NULL")
+    for tbl, (key, fields, _) in REPLICATED_TABLES.items():
+        cur.execute(
+            f"INSERT INTO sync_log (tbl, row_key, op, changed, data, ts, origin) "
+            f"SELECT '{tbl}', {key.format(r=tbl)}, 'upsert', '', {row_json(fields, tbl)}, '', {CHANGE_ORIGIN} FROM {tbl}"
+        )
+        changed = " || ".join(f"(CASE WHEN {e.format(r='OLD')} IS NOT {e.format(r='NEW')} THEN '{f},' ELSE '' END)"
+                              for f, e in fields.items())
+        log = "INSERT INTO sync_log (tbl, row_key, op, changed, data, ts, origin) VALUES ('{tbl}', {key}, '{op}', {changed}, {data}, " \
+              + CHANGE_TS + ", " + CHANGE_ORIGIN + ");"
+        new_key, new_data, assign_uid = key.format(r="NEW"), row_json(fields, "NEW"), ""
+        if tbl == "tasks":
+            # Yeni görev önce istasyonlar arası kimliğini (uid) alır, sonra kaydedilir
+            assign_uid = "UPDATE tasks SET uid = lower(hex(randomblob(16))) WHERE id = NEW.id AND uid IS NULL;"
+            new_key = "(SELECT uid FROM tasks WHERE id = NEW.id)"
+            new_data = new_data.replace("NEW.uid", new_key)
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {tbl}_sync_insert AFTER INSERT ON {tbl} WHEN {LOGGING_ON} BEGIN
+            {assign_uid}
+            {log.format(tbl=tbl, key=new_key, op='upsert', changed="''", data=new_data)}
+        END
+        """)
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {tbl}_sync_update AFTER UPDATE ON {tbl}
+        WHEN {LOGGING_ON} AND {"OLD.uid IS NOT NULL AND " if tbl == "tasks" else ""}({changed}) <> '' BEGIN
+            {log.format(tbl=tbl, key=key.format(r='NEW'), op='update', changed=changed, data=row_json(fields, 'NEW'))}
+        END
+        """)
+        cur.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {tbl}_sync_delete AFTER DELETE ON {tbl} WHEN {LOGGING_ON} AND {key.format(r='OLD')} IS NOT NULL BEGIN
+            {log.format(tbl=tbl, key=key.format(r='OLD'), op='delete', changed="''", data="NULL")}
+        END
+        """)
+    conn.commit()
+
+def set_local_only(cur, enabled):
+    """Within the caller's transaction, stop (or resume) logging changes for replication."""
+    if enabled:
+        cur.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('local_only', '1')")
+    else:
+        cur.execute("DELETE FROM sync_state WHERE key='local_only'")
+
+def station_id(conn):
+    return conn.execute("SELECT value FROM sync_state WHERE key='station_id'").fetchone()[0]
+
+def changes_since(conn, since, exclude=None, limit=SYNC_BATCH_SIZE):
+    """Return (changes, last_seq) after since; changes that originated at exclude are skipped but still advance the cursor."""
+    rows = conn.execute(
+        "SELECT seq, tbl, row_key, op, changed, data, ts, origin FROM sync_log WHERE seq > ? ORDER BY seq LIMIT ?",
+        (since, limit)
+    ).fetchall()
+    changes = [
+        {"tbl": r[1], "key": r[2], "op": r[3], "changed": r[4], "data": json.loads(r[5]) if r[5] else None, "ts": r[6], "origin": r[7]}
+        for r in rows if r[7] != exclude
+    ]
+    return changes, rows[-1][0] if rows else since
+
+def latest_version(cur, tbl, key, field=None):
+    sql = "SELECT ts, origin FROM sync_log WHERE tbl=? AND row_key=?"
+    params = [tbl, key]
+    if field:
+        sql += " AND (op <> 'update' OR instr(',' || changed, ',' || ? || ',') > 0)"
+        params.append(field)
+    row = cur.execute(sql + " ORDER BY ts DESC, origin DESC LIMIT 1", params).fetchone()
+    return tuple(row) if row else ("", "")
+
+def apply_change(cur, ch):
+    tbl, key, data = ch["tbl"], ch["key"], ch["data"]
+    version = (ch["ts"], ch["origin"])
+    fields = REPLICATED_TABLES[tbl][1]
+    if REPLICATED_TABLES[tbl][2] == "field" and ch["op"] != "delete":
+        names = [f for f in (ch["changed"].strip(",").split(",") if ch["op"] == "update" else fields) if f]
+        names = [f for f in names if version > latest_version(cur, tbl, key, f)]
+    else:
+        names = list(fields) if version > latest_version(cur, tbl, key) else []
+    if not names:
+        return False
+    cur.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('apply_ts', ?), ('apply_origin', ?)", version)
+    if tbl == "patients":
+        if ch["op"] == "delete":
+            cur.execute("DELETE FROM patients WHERE room_number=?", (key,))
+        else:
+            values = dict(data, photo=bytes.fromhex(data["photo"]) if data.get("photo") else None)
+            cols = list(fields)
+            cur.execute(
+                f"INSERT INTO patients ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+                f"ON CONFLICT(room_number) DO UPDATE SET {', '.join(f'{c}=excluded.{c}' for c in cols if c != 'room_number')}",
+                [values.get(c) for c in cols]
+            )
+    elif tbl == "tasks":
+        row = cur.execute("SELECT id FROM tasks WHERE uid=?", (key,)).fetchone()
+        if ch["op"] == "delete":
+            cur.execute("DELETE FROM tasks WHERE uid=?", (key,))
+        elif row:
+            cur.execute(f"UPDATE tasks SET {', '.join(f'{f}=?' for f in names)} WHERE id=?", [data.get(f) for f in names] + [row[0]])
+        else:
+            cols = list(fields)
+            cur.execute(f"INSERT INTO tasks ({', '.join(cols)}, notified) VALUES ({', '.join('?' * len(cols))}, 0)", [data.get(c) for c in cols])
+    else:
+        task_uid, completion_date = key.rsplit("|", 1)
+        row = cur.execute("SELECT id FROM tasks WHERE uid=?", (task_uid,)).fetchone()
+        if row and ch["op"] == "delete":
+            cur.execute("DELETE FROM task_completions WHERE task_id=? AND completion_date=?", (row[0], completion_date))
+        elif row:
+            cur.execute(
+                "INSERT INTO task_completions (task_id, completion_date) SELECT ?, ? WHERE NOT EXISTS "
+                "(SELECT 1 FROM task_completions WHERE task_id=? AND completion_date=?)",
+                (row[0], completion_date, row[0], completion_date)
+            )
+    cur.execute("DELETE FROM sync_state WHERE key IN ('apply_ts', 'apply_origin')")
+    return True
+
+def apply_changes(conn, changes):
+    """Apply remote changes in one transaction; each applied change is re-logged with its original version."""
+    cur = conn.cursor()
+    applied = 0
+    try:
+        for ch in changes:
+            if apply_change(cur, ch):
+                applied += 1
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return applied
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA foreign_keys=ON")  # görev silinince tamamlanma kayıtları da silinir (ON DELETE CASCADE)
+    return conn
+
+def auth_request(url, token):
+    return Request(url, headers={"Authorization": f"Bearer {token}"})
+
+def pull_from_peer(db_path, url, token, timeout=SYNC_TIMEOUT_SEC, stop=None):
+    """Fetch and apply everything new from one peer, stopping between batches once stop is set.
+    Returns the number of applied changes."""
+    conn = connect(db_path)
+    try:
+        me = station_id(conn)
+        row = conn.execute("SELECT last_seq FROM sync_peers WHERE url=?", (url,)).fetchone()
+        since = row[0] if row else 0
+        applied = 0
+        while True:
+            request = auth_request(f"{url.rstrip('/')}/changes?since={since}&exclude={me}&limit={SYNC_BATCH_SIZE}", token)
+            with urlopen(request, timeout=timeout) as resp:
+                payload = json.loads(resp.read().decode("utf-8"))
+            applied += apply_changes(conn, payload["changes"])
+            # Eşin istasyon kimliği budama sınırını bulmak için saklanır (sync_acks)
+            conn.execute(
+                "INSERT INTO sync_peers (url, last_seq, station) VALUES (?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET last_seq=excluded.last_seq, station=excluded.station",
+                (url, payload["last_seq"], payload["station"])
+            )
+            conn.commit()
+            if payload["last_seq"] == since or not payload["more"] or (stop and stop.is_set()):
+                break
+            since = payload["last_seq"]
+        return applied
+    finally:
+        conn.close()
+
+def prune_log(conn, peers):
+    """Drop log entries every configured peer has already pulled. The newest entry of each row (and, for tasks,
+    of each field) is kept without its data, since conflict resolution compares against it. Returns the deleted count."""
+    if not peers:
+        return 0
+    acks = []
+    for url in peers:
+        row = conn.execute(
+            "SELECT a.seq FROM sync_peers p JOIN sync_acks a ON a.station = p.station WHERE p.url=?", (url,)
+        ).fetchone()
+        if row is None:
+            return 0  # henüz çekmemiş bir eş var: hiçbir kayıt silinemez
+        acks.append(row[0])
+    bound = min(acks)
+    rows = conn.execute("SELECT seq, tbl, row_key, op, changed FROM sync_log ORDER BY tbl, row_key, ts DESC, origin DESC, seq DESC")
+    redundant, current, covered = [], None, set()
+    for seq, tbl, row_key, op, changed in rows:
+        if (tbl, row_key) != current:
+            current, covered = (tbl, row_key), set()
+        fields = REPLICATED_TABLES[tbl][1]
+        if op == "update" and REPLICATED_TABLES[tbl][2] == "field":
+            fields = {f for f in changed.split(",") if f}
+        if seq <= bound and covered.issuperset(fields):
+            redundant.append((seq,))  # daha yeni bir kayıt bu alanların hepsini kapsıyor
+        covered.update(fields)
+    try:
+        conn.executemany("DELETE FROM sync_log WHERE seq=?", redundant)
+        conn.execute("UPDATE sync_log SET data=NULL WHERE seq<=? AND data IS NOT NULL", (bound,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(redundant)
+
+class SyncRequestHandler(BaseHTTPRequestHandler):
+    db_path = None
+    token = None
+
+    def authorized(self):
+        expected = f"Bearer {self.token}".encode("utf-8")
+        return hmac.compare_digest(self.headers.get("Authorization", "").encode("utf-8"), expected)
+
+    def do_GET(self):
+        if not self.authorized():
+            self.send_error(401)
+            return
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        conn = connect(self.db_path)
+        try:
+            if parsed.path == "/changes":
+                since = int(query.get("since", ["0"])[0])
+                limit = min(int(query.get("limit", [str(SYNC_BATCH_SIZE)])[0]), SYNC_BATCH_SIZE)
+                exclude = query.get("exclude", [None])[0]
+                if exclude:
+                    # İstemci since'e kadarki her şeyi uygulamış ve kaydetmiştir
+                    conn.execute(
+                        "INSERT INTO sync_acks (station, seq) VALUES (?, ?) ON CONFLICT(station) DO UPDATE SET seq=MAX(seq, excluded.seq)",
+                        (exclude, since)
+                    )
+                    conn.commit()
+                changes, last_seq = changes_since(conn, since, exclude, limit)
+                more = conn.execute("SELECT EXISTS (SELECT 1 FROM sync_log WHERE seq > ?)", (last_seq,)).fetchone()[0]
+                body = {"station": station_id(conn), "changes": changes, "last_seq": last_seq, "more": bool(more)}
+            elif parsed.path == "/status":
+                body = {"station": station_id(conn), "last_seq": conn.execute("SELECT COALESCE(MAX(seq), 0) FROM sync_log").fetchone()[0]}
+            else:
+                self.send_error(404)
+                return
+        finally:
+            conn.close()
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        pass
+
+def start_server(db_path, port, host, token):
+    if not token:
+        raise ValueError("Eşitleme için ortak anahtar gerekli")
+    handler = type("BoundSyncRequestHandler", (SyncRequestHandler,), {"db_path": db_path, "token": token})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_node(db_path, port, peers, token, host="127.0.0.1", interval=SYNC_INTERVAL_SEC, stop=None, on_applied=None):
+    """Serve this station's changes on host:port and pull from peers until stop is set."""
+    conn = connect(db_path)
+    try:
+        enable_change_log(conn, True)
+    finally:
+        conn.close()
+    server = start_server(db_path, port, host, token)
+    stop = stop or threading.Event()
+    pruned_at = time.monotonic()
+    try:
+        while not stop.is_set():
+            for url in peers:
+                if stop.is_set():
+                    break
+                try:
+                    n = pull_from_peer(db_path, url, token, stop=stop)
+                    if n and on_applied:
+                        on_applied(n)
+                except Exception as e:
+                    print(f"Sync error ({url}): {e}")
+            if time.monotonic() - pruned_at >= SYNC_PRUNE_INTERVAL_SEC:
+                pruned_at = time.monotonic()
+                conn = connect(db_path)
+                try:
+                    prune_log(conn, peers)
+                except sqlite3.Error as e:
+                    print(f"Sync prune error: {e}")
+                finally:
+                    conn.close()
+            stop.wait(interval)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+# Two-node harness
+def bench(changes=2000, interval=0.2):
+    base = tempfile.mkdtemp(prefix="gs_sync_")
+    ports = (18761, 18762)
+    token = uuid.uuid4().hex
+    nodes = []
+    for i, port in enumerate(ports):
+        data_dir = os.path.join(base, f"node{i}")
+        os.makedirs(data_dir)
+        peer = f"http://127.0.0.1:{ports[1 - i]}"
+        env = dict(os.environ, GS_DATA_DIR=data_dir, QT_QPA_PLATFORM="offscreen")
+        nodes.append(subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "node", str(port), peer, str(interval), token], env=env
+        ))
+    dbs = [os.path.join(base, f"node{i}", "huzurevi.db") for i in range(2)]
+    try:
+        for port in ports:
+            wait_for(lambda: urlopen(auth_request(f"http://127.0.0.1:{port}/status", token), timeout=1).read(), 30)
+        a, b = (sqlite3.connect(db, timeout=30) for db in dbs)
+        a.execute("INSERT INTO patients (room_number, name, surname) VALUES ('900', 'Bench', 'Hasta')")
+        a.commit()
+        t0 = time.time()
+        a.executemany(
+            "INSERT INTO tasks (room_number, task, time, time_type, repeat_type, date, done, cancelled) VALUES ('900', ?, '09:00', 'Saat Belirt', 'Her Gün', '2026-01-01', 0, 0)",
+            [(f"Görev {i}",) for i in range(changes)]
+        )
+        a.commit()
+        wait_for(lambda: b.execute("SELECT COUNT(*) FROM tasks WHERE room_number='900'").fetchone()[0] == changes, 120)
+        elapsed = time.time() - t0
+        # Çakışma: iki istasyon aynı görevi neredeyse aynı anda farklı alanlarda ve aynı alanda değiştirir
+        a.execute("UPDATE tasks SET time='10:00', task='A' WHERE task='Görev 0'")
+        a.commit()
+        b.execute("UPDATE tasks SET cancelled=1, task='B' WHERE task='Görev 0'")
+        b.commit()
+        t1 = time.time()
+        row = lambda c: c.execute("SELECT task, time, cancelled FROM tasks WHERE uid=(SELECT uid FROM tasks ORDER BY id LIMIT 1)").fetchone()
+        wait_for(lambda: row(a) == row(b) and row(a)[1] == "10:00" and row(a)[2] == 1, 30)
+        conflict = time.time() - t1
+        result = {
+            "changes": changes, "convergence_sec": round(elapsed, 3), "throughput_per_sec": round(changes / elapsed, 1),
+            "conflict_convergence_sec": round(conflict, 3), "merged_row": list(row(a)), "poll_interval_sec": interval,
+        }
+        a.close()
+        b.close()
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return result
+    finally:
+        for p in nodes:
+            p.terminate()
+            p.wait()
+
+def wait_for(predicate, timeout):
+    end = time.time() + timeout
+    while True:
+        try:
+            if predicate():
+                return
+        except Exception:
+            pass
+        if time.time() > end:
+            raise TimeoutError("Eşitleme zaman aşımına uğradı")
+        time.sleep(0.01)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "node":
+        import gs  # GS_DATA_DIR altında şemayı ve tetikleyicileri oluşturur
+        run_node(gs.DB_PATH, int(sys.argv[2]), sys.argv[3].split(","), sys.argv[5], interval=float(sys.argv[4]))
+    elif len(sys.argv) > 1 and sys.argv[1] == "bench":
+        bench(int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
+    else:
+        print("Kullanım: gs_sync.py bench [değişiklik sayısı] | node <port> <eş url,...> <aralık sn> <ortak anahtar>")